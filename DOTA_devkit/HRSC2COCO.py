@@ -1,8 +1,7 @@
 import dota_utils as util
 import os
-import cv2
-import json
-from PIL import Image
+from multiprocessing import Pool
+from functools import partial
 
 L1_names = ['ship']
 # TODO: finish them
@@ -10,120 +9,89 @@ L2_names = []
 L3_names = []
 
 
-def HRSC2COCOTrain(srcpath, destfile, cls_names):
+def parse_image(filename, imageparent, cls_names, with_label=True):
+    """
+        image dict and annotations of an image, the ids are left to util.write_coco_json
+    :param filename: labelTxt file of the image, or any file with the image basename if not with_label
+    :return: (image dict, list of annotation dicts)
+    """
+    basename = util.custombasename(filename)
+    width, height = util.image_size(os.path.join(imageparent, basename + '.bmp'))
+    single_image = {}
+    single_image['file_name'] = basename + '.bmp'
+    single_image['id'] = None
+    single_image['width'] = width
+    single_image['height'] = height
+    annotations = []
+    if with_label:
+        objects = util.parse_dota_poly2(filename)
+        for obj in objects:
+            single_obj = {}
+            single_obj['area'] = obj['area']
+            single_obj['category_id'] = cls_names.index(obj['name']) + 1
+            single_obj['segmentation'] = []
+            single_obj['segmentation'].append(obj['poly'])
+            single_obj['iscrowd'] = 0
+            xmin, ymin, xmax, ymax = min(obj['poly'][0::2]), min(obj['poly'][1::2]), \
+                                     max(obj['poly'][0::2]), max(obj['poly'][1::2])
+
+            width, height = xmax - xmin, ymax - ymin
+            single_obj['bbox'] = xmin, ymin, width, height
+            single_obj['image_id'] = None
+            single_obj['id'] = None
+            annotations.append(single_obj)
+    return single_image, annotations
+
+
+def HRSC2COCOTrain(srcpath, destfile, cls_names, num_process=None):
+    # the image sizes are read from the file headers, the label files are parsed by num_process processes
+    # (all cpus if None) and the json is written while they are parsed
     imageparent = os.path.join(srcpath, 'images')
     labelparent = os.path.join(srcpath, 'labelTxt')
 
-    data_dict = {}
     info = {'contributor': 'Jian Ding',
             'data_created': '2019',
             'description': 'This is the L1 of HRSC',
             'url': 'sss',
             'version': '1.0',
             'year': 2019}
-    data_dict['info'] = info
-    data_dict['images'] = []
-    data_dict['categories'] = []
-    data_dict['annotations'] = []
+    categories = []
     for idex, name in enumerate(cls_names):
         single_cat = {'id': idex + 1, 'name': name, 'supercategory': name}
-        data_dict['categories'].append(single_cat)
+        categories.append(single_cat)
 
-    inst_count = 1
-    image_id = 1
-    with open(destfile, 'w') as f_out:
-        filenames = util.GetFileFromThisRootDir(labelparent)
-        # with open(train_set_file, 'r') as f_in:
-        #     lines = f_in.readlines()
-        #     filenames = [os.path.join(labelparent, x.strip()) + '.txt' for x in lines]
+    filenames = util.GetFileFromThisRootDir(labelparent)
+    # with open(train_set_file, 'r') as f_in:
+    #     lines = f_in.readlines()
+    #     filenames = [os.path.join(labelparent, x.strip()) + '.txt' for x in lines]
+    worker = partial(parse_image, imageparent=imageparent, cls_names=cls_names)
+    with Pool(num_process) as pool:
+        images = pool.imap(worker, filenames, chunksize=64)
+        util.write_coco_json(destfile, categories, images, info=info)
 
-        for file in filenames:
-            basename = util.custombasename(file)
-            # image_id = int(basename[1:])
 
-            imagepath = os.path.join(imageparent, basename + '.bmp')
-
-            img = Image.open(imagepath)
-            height = img.height
-            width = img.width
-
-            print('height: ', height)
-            print('width: ', width)
-
-            single_image = {}
-            single_image['file_name'] = basename + '.bmp'
-            single_image['id'] = image_id
-            single_image['width'] = width
-            single_image['height'] = height
-            data_dict['images'].append(single_image)
-
-            # annotations
-            objects = util.parse_dota_poly2(file)
-            for obj in objects:
-                single_obj = {}
-                single_obj['area'] = obj['area']
-                single_obj['category_id'] = cls_names.index(obj['name']) + 1
-                single_obj['segmentation'] = []
-                single_obj['segmentation'].append(obj['poly'])
-                single_obj['iscrowd'] = 0
-                xmin, ymin, xmax, ymax = min(obj['poly'][0::2]), min(obj['poly'][1::2]), \
-                                         max(obj['poly'][0::2]), max(obj['poly'][1::2])
-
-                width, height = xmax - xmin, ymax - ymin
-                single_obj['bbox'] = xmin, ymin, width, height
-                single_obj['image_id'] = image_id
-                data_dict['annotations'].append(single_obj)
-                single_obj['id'] = inst_count
-                inst_count = inst_count + 1
-            image_id = image_id + 1
-        json.dump(data_dict, f_out)
-
-
-def HRSC2COCOTest(srcpath, destfile, cls_names):
+def HRSC2COCOTest(srcpath, destfile, cls_names, num_process=None):
     imageparent = os.path.join(srcpath, 'images')
     # labelparent = os.path.join(srcpath, 'labelTxt')
-    data_dict = {}
     info = {'contributor': 'Jian Ding',
             'data_created': '2019',
             'description': 'This is HRSC.',
             'url': 'http://captain.whu.edu.cn/DOTAweb/',
             'version': '1.0',
             'year': 2018}
-    data_dict['info'] = info
-    data_dict['images'] = []
-    data_dict['categories'] = []
+    categories = []
     for idex, name in enumerate(cls_names):
         single_cat = {'id': idex + 1, 'name': name, 'supercategory': name}
-        data_dict['categories'].append(single_cat)
-
-    inst_count = 1
-    image_id = 1
-    with open(destfile, 'w') as f_out:
-        filenames = util.GetFileFromThisRootDir(imageparent)
-        # with open(test_set_file, 'r') as f_in:
-        #     lines = f_in.readlines()
-        #     filenames = [os.path.join(imageparent, x.strip()) + '.bmp' for x in lines]
-
-        for file in filenames:
-            basename = util.custombasename(file)
-            # image_id = int(basename[1:])
-
-            imagepath = os.path.join(imageparent, basename + '.bmp')
-            # img = cv2.imread(imagepath)
-            img = Image.open(imagepath)
-            # height, width, c = img.shape
-            height = img.height
-            width = img.width
-
-            single_image = {}
-            single_image['file_name'] = basename + '.bmp'
-            single_image['id'] = image_id
-            single_image['width'] = width
-            single_image['height'] = height
-            data_dict['images'].append(single_image)
-
-            image_id = image_id + 1
-        json.dump(data_dict, f_out)
+        categories.append(single_cat)
+
+    filenames = util.GetFileFromThisRootDir(imageparent)
+    # with open(test_set_file, 'r') as f_in:
+    #     lines = f_in.readlines()
+    #     filenames = [os.path.join(imageparent, x.strip()) + '.bmp' for x in lines]
+    worker = partial(parse_image, imageparent=imageparent, cls_names=cls_names, with_label=False)
+    with Pool(num_process) as pool:
+        images = pool.imap(worker, filenames, chunksize=64)
+        util.write_coco_json(destfile, categories, images, info=info, with_annotations=False)
 
 
 if __name__ == '__main__':
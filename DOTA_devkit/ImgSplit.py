@@ -12,20 +12,7 @@ def choose_best_pointorder_fit_another(poly1, poly2):
     """
         To make the two polygons best fit with each point
     """
-    x1 = poly1[0]
-    y1 = poly1[1]
-    x2 = poly1[2]
-    y2 = poly1[3]
-    x3 = poly1[4]
-    y3 = poly1[5]
-    x4 = poly1[6]
-    y4 = poly1[7]
-    combinate = [np.array([x1, y1, x2, y2, x3, y3, x4, y4]), np.array([x2, y2, x3, y3, x4, y4, x1, y1]),
-                 np.array([x3, y3, x4, y4, x1, y1, x2, y2]), np.array([x4, y4, x1, y1, x2, y2, x3, y3])]
-    dst_coordinate = np.array(poly2)
-    distances = np.array([np.sum((coord - dst_coordinate)**2) for coord in combinate])
-    sorted = distances.argsort()
-    return combinate[sorted[0]]
+    return util.choose_best_pointorder_fit_another_batch([poly1], [poly2])[0]
 
 def cal_line_length(point1, point2):
     return math.sqrt( math.pow(point1[0] - point2[0], 2) + math.pow(point1[1] - point2[1], 2))
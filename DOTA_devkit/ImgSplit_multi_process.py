@@ -10,7 +10,7 @@ from dota_utils import GetFileFromThisRootDir
 import cv2
 import shapely.geometry as shgeo
 import dota_utils as util
-import copy
+from patch_writer import PatchWriter
 from multiprocessing import Pool
 from functools import partial
 import time
@@ -19,20 +19,7 @@ def choose_best_pointorder_fit_another(poly1, poly2):
     """
         To make the two polygons best fit with each point
     """
-    x1 = poly1[0]
-    y1 = poly1[1]
-    x2 = poly1[2]
-    y2 = poly1[3]
-    x3 = poly1[4]
-    y3 = poly1[5]
-    x4 = poly1[6]
-    y4 = poly1[7]
-    combinate = [np.array([x1, y1, x2, y2, x3, y3, x4, y4]), np.array([x2, y2, x3, y3, x4, y4, x1, y1]),
-                 np.array([x3, y3, x4, y4, x1, y1, x2, y2]), np.array([x4, y4, x1, y1, x2, y2, x3, y3])]
-    dst_coordinate = np.array(poly2)
-    distances = np.array([np.sum((coord - dst_coordinate)**2) for coord in combinate])
-    sorted = distances.argsort()
-    return combinate[sorted[0]]
+    return util.choose_best_pointorder_fit_another_batch([poly1], [poly2])[0]
 
 def cal_line_length(point1, point2):
     return math.sqrt( math.pow(point1[0] - point2[0], 2) + math.pow(point1[1] - point2[1], 2))
@@ -50,7 +37,11 @@ class splitbase():
                  choosebestpoint=True,
                  ext = '.png',
                  padding=True,
-                 num_process=8
+                 num_process=8,
+                 encoder=None,
+                 png_compression=None,
+                 jpeg_quality=None,
+                 write_threads=1
                  ):
         """
         :param basepath: base path for dota data
@@ -63,6 +54,11 @@ class splitbase():
         :param choosebestpoint: used to choose the first point for the
         :param ext: ext for the image format
         :param padding: if to padding the images so that all the images have the same size
+        :param num_process: number of processes splitting the images
+        :param encoder: format of the patches, 'png', 'jpg' or 'npy' (raw arrays), None to use ext
+        :param png_compression: png compression level in [0, 9], None for the cv2 default
+        :param jpeg_quality: jpeg quality in [0, 100], None for the cv2 default
+        :param write_threads: number of threads writing the patches of each process, 0 to write synchronously
         """
         self.basepath = basepath
         self.outpath = outpath
@@ -78,6 +74,11 @@ class splitbase():
         self.choosebestpoint = choosebestpoint
         self.ext = ext
         self.padding = padding
+        self.encoder = encoder if encoder is not None else ext
+        self.png_compression = png_compression
+        self.jpeg_quality = jpeg_quality
+        self.write_threads = write_threads
+        self.writer = None
         self.pool = Pool(num_process)
         print('padding:', padding)
 
@@ -111,16 +112,16 @@ class splitbase():
         half_iou = inter_area / poly1_area
         return inter_poly, half_iou
 
+    def build_writer(self):
+        return PatchWriter(self.subsize,
+                           padding=self.padding,
+                           encoder=self.encoder,
+                           png_compression=self.png_compression,
+                           jpeg_quality=self.jpeg_quality,
+                           num_threads=self.write_threads)
+
     def saveimagepatches(self, img, subimgname, left, up):
-        subimg = copy.deepcopy(img[up: (up + self.subsize), left: (left + self.subsize)])
-        outdir = os.path.join(self.outimagepath, subimgname + self.ext)
-        h, w, c = np.shape(subimg)
-        if (self.padding):
-            outimg = np.zeros((self.subsize, self.subsize, 3))
-            outimg[0:h, 0:w, :] = subimg
-            cv2.imwrite(outdir, outimg)
-        else:
-            cv2.imwrite(outdir, subimg)
+        self.writer.write(img, os.path.join(self.outimagepath, subimgname), left, up)
 
     def GetPoly4FromPoly5(self, poly):
         distances = [cal_line_length((poly[i * 2], poly[i * 2 + 1] ), (poly[(i + 1) * 2], poly[(i + 1) * 2 + 1])) for i in range(int(len(poly)/2 - 1))]
@@ -144,20 +145,49 @@ class splitbase():
                 count = count + 1
         return outpoly
 
+    def index_objects(self, objects):
+        """
+            build the polygons of the objects of an image once, with their bounds for a vectorized window test
+        :param objects: objects of an image, from parse_dota_poly2
+        :return: dict of the objects with a positive area, their shapely polygons and the (n, 4) array of their
+            bounds (xmin, ymin, xmax, ymax)
+        """
+        keep_objects = []
+        gtpolys = []
+        for obj in objects:
+            gtpoly = shgeo.Polygon([(obj['poly'][0], obj['poly'][1]),
+                                     (obj['poly'][2], obj['poly'][3]),
+                                     (obj['poly'][4], obj['poly'][5]),
+                                     (obj['poly'][6], obj['poly'][7])])
+            if (gtpoly.area <= 0):
+                continue
+            keep_objects.append(obj)
+            gtpolys.append(gtpoly)
+        polys = np.array([obj['poly'] for obj in keep_objects], dtype=np.float64).reshape(-1, 8)
+        bounds = np.stack([polys[:, 0::2].min(1), polys[:, 1::2].min(1),
+                           polys[:, 0::2].max(1), polys[:, 1::2].max(1)], axis=1)
+        return {'objects': keep_objects, 'gtpolys': gtpolys, 'bounds': bounds}
+
     def savepatches(self, resizeimg, objects, subimgname, left, up, right, down):
+        """
+        :param objects: the objects of the image indexed by index_objects
+        """
         outdir = os.path.join(self.outlabelpath, subimgname + '.txt')
         mask_poly = []
         imgpoly = shgeo.Polygon([(left, up), (right, up), (right, down),
                                  (left, down)])
+        bounds = objects['bounds']
+        # objects whose bounds do not overlap the window have no intersection, objects inside it are kept whole,
+        # only the ones across the window border are clipped with shapely
+        overlap = (bounds[:, 2] > left) & (bounds[:, 0] < right) & (bounds[:, 3] > up) & (bounds[:, 1] < down)
+        inside = (bounds[:, 0] >= left) & (bounds[:, 2] <= right) & (bounds[:, 1] >= up) & (bounds[:, 3] <= down)
         with codecs.open(outdir, 'w', self.code) as f_out:
-            for obj in objects:
-                gtpoly = shgeo.Polygon([(obj['poly'][0], obj['poly'][1]),
-                                         (obj['poly'][2], obj['poly'][3]),
-                                         (obj['poly'][4], obj['poly'][5]),
-                                         (obj['poly'][6], obj['poly'][7])])
-                if (gtpoly.area <= 0):
-                    continue
-                inter_poly, half_iou = self.calchalf_iou(gtpoly, imgpoly)
+            for index in np.nonzero(overlap)[0]:
+                obj = objects['objects'][index]
+                if inside[index]:
+                    half_iou = 1
+                else:
+                    inter_poly, half_iou = self.calchalf_iou(objects['gtpolys'][index], imgpoly)
 
                 # print('writing...')
                 if (half_iou == 1):
@@ -227,6 +257,7 @@ class splitbase():
         for obj in objects:
             obj['poly'] = list(map(lambda x:rate*x, obj['poly']))
             #obj['poly'] = list(map(lambda x: ([2 * y for y in x]), obj['poly']))
+        objects = self.index_objects(objects)
 
         if (rate != 1):
             resizeimg = cv2.resize(img, None, fx=rate, fy=rate, interpolation = cv2.INTER_CUBIC)
@@ -239,6 +270,7 @@ class splitbase():
         # if (max(weight, height) < self.subsize):
         #     return
 
+        self.writer = self.build_writer()
         left, up = 0, 0
         while (left < weight):
             if (left + self.subsize >= weight):
@@ -260,6 +292,9 @@ class splitbase():
                 break
             else:
                 left = left + self.slide
+        # wait for the queued patches
+        self.writer.close()
+        self.writer = None
 
     def splitdata(self, rate):
         """
@@ -278,6 +313,7 @@ class splitbase():
     def __getstate__(self):
         self_dict = self.__dict__.copy()
         del self_dict['pool']
+        del self_dict['writer']
         return self_dict
 
     def __setstate__(self, state):
@@ -23,9 +23,9 @@ import math
 from multiprocessing import Pool
 from functools import partial
 try:
-    from DOTA_devkit.nms import obb_hybrid_NMS, obb_HNMS
+    from DOTA_devkit.nms import obb_hybrid_NMS, obb_HNMS, py_cpu_nms_poly_grid
 except:
-    from nms import obb_hybrid_NMS, obb_HNMS # modified by lyx 2020.9.20
+    from nms import obb_hybrid_NMS, obb_HNMS, py_cpu_nms_poly_grid # modified by lyx 2020.9.20
 
 #TODO: there is a bug at 5 decimal places of mAP when using the program
 def py_cpu_nms_poly(dets, thresh):
@@ -222,6 +222,22 @@ def mergebyrec(srcpath, dstpath, nms_thresh=0.3):
               dstpath,
               py_cpu_nms, nms_thresh)
 
+def get_poly_nms(nms_type='py_cpu_nms_poly_fast', o_thresh=0.1, h_thresh=0.5):
+    """
+        nms function and threshold of a nms_type
+    :return: nms, nms_thresh, nms(dets, nms_thresh) gives the kept indices of dets
+    """
+    if nms_type == 'py_cpu_nms_poly_fast':
+        return py_cpu_nms_poly_fast, o_thresh
+    elif nms_type == 'py_cpu_nms_poly_grid':
+        # grid bucketed version of py_cpu_nms_poly_fast for large scenes
+        return py_cpu_nms_poly_grid, o_thresh
+    elif nms_type == 'obb_HNMS':
+        return obb_HNMS, o_thresh
+    elif nms_type == 'obb_hybrid_NMS':
+        return partial(obb_hybrid_NMS, o_thresh), h_thresh
+    raise ValueError('unknown nms_type {}'.format(nms_type))
+
 def mergebypoly_multiprocess(srcpath, dstpath, nms_type='py_cpu_nms_poly_fast', o_thresh=0.1, h_thresh=0.5):
     """
     srcpath: result files before merge and nms
@@ -229,19 +245,61 @@ def mergebypoly_multiprocess(srcpath, dstpath, nms_type='py_cpu_nms_poly_fast',
     """
     # srcpath = r'/home/dingjian/evaluation_task1/result/faster-rcnn-59/comp4_test_results'
     # dstpath = r'/home/dingjian/evaluation_task1/result/faster-rcnn-59/testtime'
-    if nms_type == 'py_cpu_nms_poly_fast':
-        mergebase_parallel(srcpath,
-                           dstpath,
-                           py_cpu_nms_poly_fast, o_thresh)
-    elif nms_type == 'obb_HNMS':
-        mergebase_parallel(srcpath,
-                           dstpath,
-                           obb_HNMS, o_thresh)
-    elif nms_type == 'obb_hybrid_NMS':
-        obb_hybrid_NMS_partial = partial(obb_hybrid_NMS, o_thresh)
-        mergebase_parallel(srcpath,
-                           dstpath,
-                           obb_hybrid_NMS_partial, h_thresh)
+    nms, nms_thresh = get_poly_nms(nms_type, o_thresh, h_thresh)
+    mergebase_parallel(srcpath,
+                       dstpath,
+                       nms, nms_thresh)
+
+def mergesinglearrays(nms, nms_thresh, dets):
+    return np.asarray(nms(dets, nms_thresh), dtype=np.int64).reshape(-1)
+
+def mergearrays(class_dets, nms, nms_thresh, num_process=16):
+    """
+        in memory version of mergebase_parallel, the nms of each class in each original image is a task of the pool
+    :param class_dets: dict of classname: (imagenames (n, ) str, dets (n, 9) x1 y1 ... x4 y4 score) of the
+        detections in the original images, see mmdet.core.evaluation.dota_utils.results2scene_dets
+    :param nms, nms_thresh: see get_poly_nms
+    :param num_process: size of the process pool, 1 to run in this process
+    :return: the kept dets in the same format, images in the order of their first detection and
+        dets in the order given by the nms, like the files written by mergesingle
+    """
+    tasks = []
+    groups = []
+    for classname, (imagenames, dets) in class_dets.items():
+        names, first, inverse = np.unique(imagenames, return_index=True, return_inverse=True)
+        order = np.argsort(inverse.reshape(-1), kind='mergesort')
+        inds = np.split(order, np.cumsum(np.bincount(inverse.reshape(-1), minlength=len(names)))[:-1])
+        for k in np.argsort(first):
+            tasks.append(dets[inds[k]])
+            groups.append((classname, inds[k]))
+    mergesingle_fn = partial(mergesinglearrays, nms, nms_thresh)
+    if num_process == 1:
+        keeps = list(map(mergesingle_fn, tasks))
+    else:
+        with Pool(num_process) as pool:
+            keeps = pool.map(mergesingle_fn, tasks, chunksize=max(1, len(tasks) // (4 * num_process)))
+
+    kept = {classname: [] for classname in class_dets}
+    for (classname, inds), keep in zip(groups, keeps):
+        kept[classname].append(inds[keep])
+    merged = {}
+    for classname, (imagenames, dets) in class_dets.items():
+        keep = np.concatenate(kept[classname]) if kept[classname] else np.zeros(0, dtype=np.int64)
+        merged[classname] = (imagenames[keep], dets[keep])
+    return merged
+
+def writearrays(class_dets, dstpath, prefix='Task1_'):
+    """
+        write the dets of mergearrays to dstpath/prefix + classname + .txt, in the format of mergesingle
+    """
+    if not os.path.exists(dstpath):
+        os.makedirs(dstpath)
+    for classname, (imagenames, dets) in class_dets.items():
+        with open(os.path.join(dstpath, prefix + classname + '.txt'), 'w') as f_out:
+            for imgname, det in zip(imagenames.tolist(), dets.tolist()):
+                outline = imgname + ' ' + str(det[-1]) + ' ' + ' '.join(map(str, det[0:-1]))
+                f_out.write(outline + '\n')
+
 if __name__ == '__main__':
     # mergebypoly(r'/home/dingjian/code/DOTA_devkit/Test_nms2/Task1_results', r'/home/dingjian/code/DOTA_devkit/Test_nms2/Task1_results_0.1_nms_fast')
     mergebypoly_multiprocess(r'/project/jmhan/AerialDetection/work_dirs/ensemble_test/Task1_results/',
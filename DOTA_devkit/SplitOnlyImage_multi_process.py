@@ -1,8 +1,8 @@
 import os
 import numpy as np
 import cv2
-import copy
 import dota_utils as util
+from patch_writer import PatchWriter
 from multiprocessing import Pool
 from functools import partial
 
@@ -14,7 +14,17 @@ class splitbase():
                  subsize=1024,
                  ext='.png',
                  padding=True,
-                 num_process=32):
+                 num_process=32,
+                 encoder=None,
+                 png_compression=None,
+                 jpeg_quality=None,
+                 write_threads=1):
+        """
+        :param encoder: format of the patches, 'png', 'jpg' or 'npy' (raw arrays), None to use the image ext
+        :param png_compression: png compression level in [0, 9], None for the cv2 default
+        :param jpeg_quality: jpeg quality in [0, 100], None for the cv2 default
+        :param write_threads: number of threads writing the patches of each process, 0 to write synchronously
+        """
         self.srcpath = srcpath
         self.outpath = dstpath
         self.gap = gap
@@ -24,21 +34,26 @@ class splitbase():
         self.dstpath = dstpath
         self.ext = ext
         self.padding = padding
+        self.encoder = encoder
+        self.png_compression = png_compression
+        self.jpeg_quality = jpeg_quality
+        self.write_threads = write_threads
+        self.writer = None
         self.pool = Pool(num_process)
 
         if not os.path.isdir(self.outpath):
             os.mkdir(self.outpath)
 
-    def saveimagepatches(self, img, subimgname, left, up, ext='.png'):
-        subimg = copy.deepcopy(img[up: (up + self.subsize), left: (left + self.subsize)])
-        outdir = os.path.join(self.dstpath, subimgname + ext)
-        h, w, c = np.shape(subimg)
-        if (self.padding):
-            outimg = np.zeros((self.subsize, self.subsize, 3))
-            outimg[0:h, 0:w, :] = subimg
-            cv2.imwrite(outdir, outimg)
-        else:
-            cv2.imwrite(outdir, subimg)
+    def build_writer(self, ext):
+        return PatchWriter(self.subsize,
+                           padding=self.padding,
+                           encoder=self.encoder if self.encoder is not None else ext,
+                           png_compression=self.png_compression,
+                           jpeg_quality=self.jpeg_quality,
+                           num_threads=self.write_threads)
+
+    def saveimagepatches(self, img, subimgname, left, up):
+        self.writer.write(img, os.path.join(self.dstpath, subimgname), left, up)
 
     def SplitSingle(self, name, rate, extent):
         img = cv2.imread(os.path.join(self.srcpath, name + extent))
@@ -56,6 +71,7 @@ class splitbase():
         # if (max(weight, height) < self.subsize/2):
         #     return
 
+        self.writer = self.build_writer(extent)
         left, up = 0, 0
         while (left < weight):
             if (left + self.subsize >= weight):
@@ -65,7 +81,7 @@ class splitbase():
                 if (up + self.subsize >= height):
                     up = max(height - self.subsize, 0)
                 subimgname = outbasename + str(left) + '___' + str(up)
-                self.saveimagepatches(resizeimg, subimgname, left, up, ext=extent)
+                self.saveimagepatches(resizeimg, subimgname, left, up)
                 if (up + self.subsize >= height):
                     break
                 else:
@@ -74,6 +90,9 @@ class splitbase():
                 break
             else:
                 left = left + self.slide
+        # wait for the queued patches
+        self.writer.close()
+        self.writer = None
 
     def splitdata(self, rate):
 
@@ -89,6 +108,7 @@ class splitbase():
     def __getstate__(self):
         self_dict = self.__dict__.copy()
         del self_dict['pool']
+        del self_dict['writer']
         return self_dict
 
     def __setstate__(self, state):
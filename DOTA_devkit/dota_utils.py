@@ -5,6 +5,10 @@ import shapely.geometry as shgeo
 import os
 import re
 import math
+import json
+import shutil
+import tempfile
+from PIL import Image
 # import polyiou
 """
     some basic functions which are useful for process DOTA data
@@ -315,3 +319,60 @@ def get_best_begin_point(coordinate):
     if force_flag != 0:
         print("choose one direction!")
     return  combinate[force_flag]
+
+def choose_best_pointorder_fit_another_batch(polys1, polys2):
+    """
+        Vectorized choose_best_pointorder_fit_another: reorder each polygon of
+        polys1 (n, 8) to the cyclic order which best fits the same row of polys2
+    """
+    polys1 = np.asarray(polys1, dtype=np.float64).reshape(-1, 4, 2)
+    polys2 = np.asarray(polys2, dtype=np.float64).reshape(-1, 1, 8)
+    # combinate[:, i] starts from the i-th point
+    orders = (np.arange(4)[:, np.newaxis] + np.arange(4)) % 4
+    combinate = polys1[:, orders].reshape(-1, 4, 8)
+    distances = np.sum((combinate - polys2)**2, axis=2)
+    return combinate[np.arange(combinate.shape[0]), distances.argmin(axis=1)]
+
+def image_size(imagepath):
+    """
+        (width, height) of an image, read from the file header without decoding the image
+    """
+    with Image.open(imagepath) as img:
+        return img.size
+
+def write_coco_json(destfile, categories, images, info=None, with_annotations=True):
+    """
+        stream a COCO json to destfile, one image at a time
+    :param categories: list of the category dicts
+    :param images: iterable of (image dict, list of annotation dicts), the image and annotation ids are assigned here
+    :param info: optional 'info' dict
+    :param with_annotations: if to write the 'annotations' list, the annotations are buffered in a temporary file
+        until all the images are written
+    """
+    with open(destfile, 'w') as f_out, tempfile.TemporaryFile('w+') as f_ann:
+        f_out.write('{')
+        if info is not None:
+            f_out.write('"info": ' + json.dumps(info) + ', ')
+        f_out.write('"images": [')
+        image_id = 1
+        inst_count = 1
+        for single_image, annotations in images:
+            single_image['id'] = image_id
+            if image_id > 1:
+                f_out.write(', ')
+            f_out.write(json.dumps(single_image))
+            for single_obj in annotations:
+                single_obj['image_id'] = image_id
+                single_obj['id'] = inst_count
+                if inst_count > 1:
+                    f_ann.write(', ')
+                f_ann.write(json.dumps(single_obj))
+                inst_count = inst_count + 1
+            image_id = image_id + 1
+        f_out.write('], "categories": ' + json.dumps(categories))
+        if with_annotations:
+            f_out.write(', "annotations": [')
+            f_ann.seek(0)
+            shutil.copyfileobj(f_ann, f_out)
+            f_out.write(']')
+        f_out.write('}')
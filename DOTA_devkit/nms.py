@@ -6,6 +6,7 @@ try:
 except:
     import DOTA_devkit.dota_utils as util
 import DOTA_devkit.polyiou as polyiou
+from DOTA_devkit.polyiou_batch import iou_poly_matrix
 
 def py_cpu_nms_poly_fast(dets, thresh):
     try:
@@ -74,6 +75,78 @@ def py_cpu_nms_poly_fast(dets, thresh):
         # order = np.concatenate((order_obb, order_hbb), axis=0).astype(np.int)
     return keep
 
+def py_cpu_nms_poly_grid(dets, thresh, cell_size=None):
+    """
+    Same result as py_cpu_nms_poly_fast, but the hbbs are bucketed into a
+    uniform grid first, so each kept box is only tested against the boxes
+    sharing a cell with it instead of all remaining boxes.
+    Useful for the scene level merge, where most boxes are far apart.
+    :param dets: shape (n, 9) (x1, y1, ..., x4, y4, score)
+    :param thresh: obb iou threshold
+    :param cell_size: side of the grid cells, defaults to twice the median
+        hbb side, boxes larger than a cell are put into every cell they cover
+    :return: keep, indices of the kept dets in descending score order
+    """
+    dets = np.asarray(dets, dtype=np.float64)
+    if dets.shape[0] == 0:
+        return []
+    polys = np.ascontiguousarray(dets[:, :8])
+    x1 = np.min(polys[:, 0::2], axis=1)
+    y1 = np.min(polys[:, 1::2], axis=1)
+    x2 = np.max(polys[:, 0::2], axis=1)
+    y2 = np.max(polys[:, 1::2], axis=1)
+    scores = dets[:, 8]
+
+    if cell_size is None:
+        cell_size = 2 * np.median(np.maximum(x2 - x1, y2 - y1))
+    cell_size = max(float(cell_size), 1.)
+    cx1 = np.floor((x1 - x1.min()) / cell_size).astype(np.int64)
+    cy1 = np.floor((y1 - y1.min()) / cell_size).astype(np.int64)
+    cx2 = np.floor((x2 - x1.min()) / cell_size).astype(np.int64)
+    cy2 = np.floor((y2 - y1.min()) / cell_size).astype(np.int64)
+    grid_w = cx2.max() + 1
+
+    # (cell, box) entries for every cell covered by a box, sorted by cell
+    ncx = cx2 - cx1 + 1
+    ncy = cy2 - cy1 + 1
+    ncells = ncx * ncy
+    box_ids = np.repeat(np.arange(len(dets)), ncells)
+    local = np.arange(ncells.sum()) - np.repeat(np.cumsum(ncells) - ncells, ncells)
+    cell_x = cx1[box_ids] + local % ncx[box_ids]
+    cell_y = cy1[box_ids] + local // ncx[box_ids]
+    box_cells = cell_y * grid_w + cell_x
+    box_starts = np.cumsum(ncells) - ncells
+    cell_order = np.argsort(box_cells, kind='stable')
+    cell_ids = box_cells[cell_order]
+    cell_boxes = box_ids[cell_order]
+
+    order = scores.argsort()[::-1]
+    rank = np.empty(len(dets), dtype=np.int64)
+    rank[order] = np.arange(len(dets))
+    suppressed = np.zeros(len(dets), dtype=np.bool_)
+
+    keep = []
+    for i in order:
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        cells = box_cells[box_starts[i]:box_starts[i] + ncells[i]]
+        lo = np.searchsorted(cell_ids, cells, side='left')
+        hi = np.searchsorted(cell_ids, cells, side='right')
+        cand = np.unique(np.concatenate(
+            [cell_boxes[l:h] for l, h in zip(lo, hi)]))
+        cand = cand[(rank[cand] > rank[i]) & ~suppressed[cand]]
+        if cand.size == 0:
+            continue
+        w = np.minimum(x2[i], x2[cand]) - np.maximum(x1[i], x1[cand])
+        h = np.minimum(y2[i], y2[cand]) - np.maximum(y1[i], y1[cand])
+        cand = cand[(w > 0) & (h > 0)]
+        if cand.size == 0:
+            continue
+        ovr = iou_poly_matrix(polys[i:i + 1], polys[cand])[0]
+        suppressed[cand[ovr > thresh]] = True
+    return keep
+
 def py_cpu_nms(dets, thresh):
     """Pure Python NMS baseline."""
     #print('dets:', dets)
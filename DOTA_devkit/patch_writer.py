@@ -0,0 +1,124 @@
+"""
+    Patch writer shared by the dataset splitters
+"""
+import queue
+import threading
+
+import cv2
+import numpy as np
+
+
+class PatchWriter():
+    """
+        Write the patches of a split image.
+        Patches are views of the image, only the edge patches are padded, into reused uint8 buffers.
+        With num_threads > 0 the encoding runs in background threads fed by a bounded queue, so cutting the next
+        patches overlaps with the encoding (cv2 releases the GIL while encoding).
+    """
+    def __init__(self,
+                 subsize=1024,
+                 padding=True,
+                 encoder='png',
+                 png_compression=None,
+                 jpeg_quality=None,
+                 num_threads=1,
+                 queue_size=8):
+        """
+        :param subsize: size of the patches
+        :param padding: if to pad the edge patches with zeros to subsize
+        :param encoder: 'npy' to save the raw arrays, otherwise an image extension for cv2.imwrite, e.g. 'png', 'jpg'
+        :param png_compression: png compression level in [0, 9], None for the cv2 default
+        :param jpeg_quality: jpeg quality in [0, 100], None for the cv2 default
+        :param num_threads: number of writer threads, 0 to write in the calling thread
+        :param queue_size: max number of patches waiting for a writer thread
+        """
+        self.subsize = subsize
+        self.padding = padding
+        self.encoder = encoder.lstrip('.').lower()
+        self.ext = '.' + self.encoder
+        self.params = []
+        if self.encoder == 'png' and png_compression is not None:
+            self.params = [cv2.IMWRITE_PNG_COMPRESSION, int(png_compression)]
+        elif self.encoder in ('jpg', 'jpeg') and jpeg_quality is not None:
+            self.params = [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)]
+        # padded buffers which are free again after their patch is written
+        self.buffers = queue.Queue()
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.threads = []
+        for _ in range(num_threads):
+            thread = threading.Thread(target=self._worker)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, img, outname, left, up):
+        """
+            write the patch of img at (left, up)
+        :param img: the (resized) image, it must not be modified until the writer is closed
+        :param outname: output filename without extension
+        :return: output filename
+        """
+        patch = img[up: (up + self.subsize), left: (left + self.subsize)]
+        buffer = None
+        h, w = patch.shape[:2]
+        if self.padding and (h != self.subsize or w != self.subsize):
+            buffer = self._get_buffer(patch)
+            buffer[:h, :w] = patch
+            buffer[h:] = 0
+            buffer[:h, w:] = 0
+            patch = buffer
+        filename = outname + self.ext
+        if self.threads:
+            if self.error is not None:
+                raise self.error
+            self.queue.put((filename, patch, buffer))
+        else:
+            self._write(filename, patch, buffer)
+        return filename
+
+    def close(self):
+        """
+            wait for the queued patches to be written
+        """
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        if self.error is not None:
+            raise self.error
+
+    def _get_buffer(self, patch):
+        shape = (self.subsize, self.subsize) + patch.shape[2:]
+        try:
+            buffer = self.buffers.get_nowait()
+        except queue.Empty:
+            buffer = None
+        if buffer is None or buffer.shape != shape or buffer.dtype != patch.dtype:
+            buffer = np.empty(shape, dtype=patch.dtype)
+        return buffer
+
+    def _write(self, filename, patch, buffer):
+        if self.encoder == 'npy':
+            np.save(filename, patch)
+        elif not cv2.imwrite(filename, patch, self.params):
+            raise IOError('failed to write ' + filename)
+        if buffer is not None:
+            self.buffers.put(buffer)
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            try:
+                self._write(*item)
+            except Exception as e:
+                self.error = e
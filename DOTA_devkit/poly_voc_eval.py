@@ -0,0 +1,265 @@
+# --------------------------------------------------------
+# Shared Task1 (oriented bounding box) evaluator
+# Licensed under The MIT License [see LICENSE for details]
+# Based on dota_evaluation_task1.py by Jian Ding and Bharath Hariharan
+# --------------------------------------------------------
+
+"""
+    The evaluation of dota_evaluation_task1.py, dota_v15_evaluation_task1.py, hrsc2016_evaluation.py and UCAS_AOD_eval_800.py.
+    The ground truths are parsed once into per image arrays for all the classes, the detections of a class are grouped by
+    image and all their overlaps with the ground truths of the image are computed in one iou_poly_matrix call, and the
+    classes are evaluated in a process pool. The tp/fp assignment and the APs are the same as the per detection loop of voc_eval.
+    voc_eval_arrays takes the merged detections in memory, see ResultMerge_multi_process.mergearrays.
+"""
+import os
+from multiprocessing import Pool
+from functools import partial
+import numpy as np
+try:
+    from polyiou_batch import iou_poly_matrix
+except ImportError:
+    from DOTA_devkit.polyiou_batch import iou_poly_matrix
+
+
+def parse_gt_arrays(filename, with_difficult=True):
+    """
+        parse a ground truth file into arrays
+    :param filename: ground truth file to parse
+    :param with_difficult: if False, all the objects are evaluated as not difficult
+    :return: dict of names (n, ) str, polys (n, 8) float64 and difficult (n, ) bool arrays
+    """
+    names = []
+    polys = []
+    difficult = []
+    with open(filename, 'r') as f:
+        for line in f:
+            splitlines = line.strip().split(' ')
+            if len(splitlines) < 9:
+                continue
+            names.append(splitlines[8])
+            polys.append([float(x) for x in splitlines[:8]])
+            difficult.append(with_difficult and len(splitlines) == 10 and int(splitlines[9]) != 0)
+    return {'names': np.array(names, dtype=str),
+            'polys': np.array(polys, dtype=np.float64).reshape(-1, 8),
+            'difficult': np.array(difficult, dtype=bool)}
+
+
+def select_class(gts, classname):
+    """
+        gather the ground truths of a class into flat arrays
+    :param gts: dict of imagename: parse_gt_arrays result
+    :return: dict of polys (G, 8), difficult (G, ) and ranges, imagename: (start, end) rows of the image
+    """
+    polys = []
+    difficult = []
+    ranges = {}
+    start = 0
+    for imagename, gt in gts.items():
+        mask = gt['names'] == classname
+        polys.append(gt['polys'][mask])
+        difficult.append(gt['difficult'][mask])
+        ranges[imagename] = (start, start + int(mask.sum()))
+        start = ranges[imagename][1]
+    return {'polys': np.concatenate(polys) if polys else np.zeros((0, 8)),
+            'difficult': np.concatenate(difficult) if difficult else np.zeros(0, dtype=bool),
+            'ranges': ranges}
+
+
+def parse_dets(detfile, strip_ext=False):
+    """
+    :param detfile: Task1 result file, each line is "imagename score x1 y1 ... x4 y4"
+    :param strip_ext: remove the extension of the image names
+    :return: image_ids (n, ) str, confidence (n, ) and polys (n, 8) arrays
+    """
+    with open(detfile, 'r') as f:
+        splitlines = [x.strip().split(' ') for x in f]
+    image_ids = [x[0] for x in splitlines]
+    if strip_ext:
+        image_ids = [os.path.splitext(x)[0] for x in image_ids]
+    values = np.array([x[1:10] for x in splitlines], dtype=str).astype(np.float64).reshape(-1, 9)
+    return np.array(image_ids, dtype=str), values[:, 0], values[:, 1:]
+
+
+def voc_ap(rec, prec, use_07_metric=False):
+    """ ap = voc_ap(rec, prec, [use_07_metric])
+    Compute VOC AP given precision and recall.
+    If use_07_metric is true, uses the
+    VOC 07 11 point method (default:False).
+    """
+    if use_07_metric:
+        # 11 point metric
+        ap = 0.
+        for t in np.arange(0., 1.1, 0.1):
+            if np.sum(rec >= t) == 0:
+                p = 0
+            else:
+                p = np.max(prec[rec >= t])
+            ap = ap + p / 11.
+    else:
+        # correct AP calculation
+        # first append sentinel values at the end
+        mrec = np.concatenate(([0.], rec, [1.]))
+        mpre = np.concatenate(([0.], prec, [0.]))
+
+        # compute the precision envelope
+        mpre = np.maximum.accumulate(mpre[::-1])[::-1]
+
+        # to calculate area under PR curve, look for points
+        # where X axis (recall) changes value
+        i = np.where(mrec[1:] != mrec[:-1])[0]
+
+        # and sum (\Delta recall) * prec
+        ap = np.sum((mrec[i + 1] - mrec[i]) * mpre[i + 1])
+    return ap
+
+
+def voc_eval_dets(image_ids, confidence, BB, class_gts, ovthresh=0.5, use_07_metric=False):
+    """
+        evaluate the detections of a class
+    :param image_ids, confidence, BB: detections, see parse_dets
+    :param class_gts: ground truths of the class, see select_class
+    :return: rec, prec, ap
+    """
+    npos = int((~class_gts['difficult']).sum())
+
+    # sort by confidence
+    sorted_ind = np.argsort(-confidence)
+    BB = BB[sorted_ind, :]
+    image_ids = image_ids[sorted_ind]
+    nd = len(image_ids)
+
+    # best overlap and the matched ground truth (row of class_gts) of each detection,
+    # the overlaps of all the detections of an image are computed at once
+    ovmax = np.zeros(nd)
+    jmax = np.zeros(nd, dtype=np.int64)
+    names, inverse = np.unique(image_ids, return_inverse=True)
+    order = np.argsort(inverse, kind='mergesort')
+    splits = np.cumsum(np.bincount(inverse.reshape(-1), minlength=len(names)))[:-1]
+    for imagename, inds in zip(names, np.split(order, splits)):
+        start, end = class_gts['ranges'][imagename]
+        if end == start:
+            continue
+        overlaps = iou_poly_matrix(BB[inds], class_gts['polys'][start:end])
+        ovmax[inds] = overlaps.max(axis=1)
+        jmax[inds] = start + overlaps.argmax(axis=1)
+
+    # go down dets and mark TPs and FPs: a detection is a TP if it is the first one (by confidence)
+    # matched to a ground truth which is not difficult, detections matched to difficult ones are neither
+    matched = ovmax > ovthresh
+    cand = np.where(matched)[0]
+    cand = cand[~class_gts['difficult'][jmax[cand]]]
+    first = np.zeros(len(cand), dtype=bool)
+    first[np.unique(jmax[cand], return_index=True)[1]] = True
+    tp = np.zeros(nd)
+    fp = np.zeros(nd)
+    tp[cand[first]] = 1.
+    fp[cand[~first]] = 1.
+    fp[~matched] = 1.
+
+    # compute precision recall
+    fp = np.cumsum(fp)
+    tp = np.cumsum(tp)
+    rec = tp / float(npos)
+    # avoid divide by zero in case the first detection matches a difficult
+    # ground truth
+    prec = tp / np.maximum(tp + fp, np.finfo(np.float64).eps)
+    ap = voc_ap(rec, prec, use_07_metric)
+
+    return rec, prec, ap
+
+
+def _eval_class(task, ovthresh, use_07_metric, strip_ext):
+    dets, class_gts = task
+    if isinstance(dets, str):
+        image_ids, confidence, BB = parse_dets(dets, strip_ext)
+    else:
+        image_ids, dets = dets
+        confidence, BB = dets[:, 8].astype(np.float64), dets[:, :8].astype(np.float64)
+    return voc_eval_dets(image_ids, confidence, BB, class_gts, ovthresh, use_07_metric)
+
+
+def _eval_classes(tasks, num_process=None, **kwargs):
+    worker = partial(_eval_class, **kwargs)
+    if num_process == 1 or len(tasks) == 1:
+        return [worker(task) for task in tasks]
+    with Pool(num_process) as pool:
+        return pool.map(worker, tasks)
+
+
+def load_class_gts(annopath, imagesetfile, classnames, with_difficult=True):
+    """
+        parse the ground truths once for all the classes
+    :return: list of the select_class results of the classes
+    """
+    with open(imagesetfile, 'r') as f:
+        imagenames = [x.strip() for x in f]
+    gts = {imagename: parse_gt_arrays(annopath.format(imagename), with_difficult) for imagename in imagenames}
+    return [select_class(gts, classname) for classname in classnames]
+
+
+def voc_eval_classes(detpath,
+                     annopath,
+                     imagesetfile,
+                     classnames,
+                     ovthresh=0.5,
+                     use_07_metric=False,
+                     with_difficult=True,
+                     strip_ext=False,
+                     num_process=None):
+    """
+        evaluate the Task1 results of several classes
+    :param detpath: detpath.format(classname) should produce the detection results file
+    :param annopath: annopath.format(imagename) should produce the ground truth file
+    :param imagesetfile: text file containing the list of images, one image per line
+    :param classnames: classes to evaluate
+    :param ovthresh: overlap threshold
+    :param use_07_metric: whether to use VOC07's 11 point AP computation, the area under the PR curve otherwise
+    :param with_difficult: if False, the difficult flags of the ground truths are ignored
+    :param strip_ext: remove the extension of the image names in the detection files
+    :param num_process: size of the process pool over the classes, None for the number of cpus, 1 to run in this process
+    :return: list of (rec, prec, ap) of the classes
+    """
+    class_gts = load_class_gts(annopath, imagesetfile, classnames, with_difficult)
+    tasks = [(detpath.format(classname), gts) for classname, gts in zip(classnames, class_gts)]
+    return _eval_classes(tasks, num_process, ovthresh=ovthresh, use_07_metric=use_07_metric, strip_ext=strip_ext)
+
+
+def voc_eval_arrays(class_dets,
+                    annopath,
+                    imagesetfile,
+                    classnames,
+                    ovthresh=0.5,
+                    use_07_metric=False,
+                    with_difficult=True,
+                    num_process=None):
+    """
+        voc_eval_classes of detections held in memory instead of the Task1 files
+    :param class_dets: dict of classname: (imagenames (n, ) str, dets (n, 9) x1 y1 ... x4 y4 score),
+        see ResultMerge_multi_process.mergearrays, classes without an entry have no detections
+    :return: list of (rec, prec, ap) of the classes
+    """
+    class_gts = load_class_gts(annopath, imagesetfile, classnames, with_difficult)
+    empty = (np.zeros(0, dtype=str), np.zeros((0, 9)))
+    tasks = [(class_dets.get(classname, empty), gts) for classname, gts in zip(classnames, class_gts)]
+    return _eval_classes(tasks, num_process, ovthresh=ovthresh, use_07_metric=use_07_metric, strip_ext=False)
+
+
+def voc_eval(detpath,
+             annopath,
+             imagesetfile,
+             classname,
+             ovthresh=0.5,
+             use_07_metric=False,
+             with_difficult=True,
+             strip_ext=False):
+    """rec, prec, ap = voc_eval(detpath,
+                                annopath,
+                                imagesetfile,
+                                classname,
+                                [ovthresh],
+                                [use_07_metric])
+    PASCAL VOC evaluation of a single class, see voc_eval_classes.
+    """
+    return voc_eval_classes(detpath, annopath, imagesetfile, [classname], ovthresh=ovthresh,
+                            use_07_metric=use_07_metric, with_difficult=with_difficult,
+                            strip_ext=strip_ext, num_process=1)[0]
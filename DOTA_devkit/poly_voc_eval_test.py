@@ -0,0 +1,96 @@
+import unittest
+import numpy as np
+from DOTA_devkit.poly_voc_eval import select_class, voc_ap, voc_eval_dets
+from DOTA_devkit.polyiou_batch import iou_poly_matrix
+
+
+def voc_eval_dets_ref(image_ids, confidence, BB, class_gts, ovthresh=0.5, use_07_metric=False):
+    """
+        the per detection loop of the old voc_eval, the reference of voc_eval_dets
+    """
+    npos = int((~class_gts['difficult']).sum())
+    sorted_ind = np.argsort(-confidence)
+    BB = BB[sorted_ind, :]
+    image_ids = [image_ids[x] for x in sorted_ind]
+    det = np.zeros(len(class_gts['difficult']), dtype=bool)
+    nd = len(image_ids)
+    tp = np.zeros(nd)
+    fp = np.zeros(nd)
+    for d in range(nd):
+        start, end = class_gts['ranges'][image_ids[d]]
+        ovmax = -np.inf
+        if end > start:
+            overlaps = iou_poly_matrix(BB[d:d + 1], class_gts['polys'][start:end])[0]
+            ovmax = overlaps.max()
+            jmax = start + overlaps.argmax()
+        if ovmax > ovthresh:
+            if not class_gts['difficult'][jmax]:
+                if not det[jmax]:
+                    tp[d] = 1.
+                    det[jmax] = True
+                else:
+                    fp[d] = 1.
+        else:
+            fp[d] = 1.
+    fp = np.cumsum(fp)
+    tp = np.cumsum(tp)
+    rec = tp / float(npos)
+    prec = tp / np.maximum(tp + fp, np.finfo(np.float64).eps)
+    ap = voc_ap(rec, prec, use_07_metric)
+    return rec, prec, ap
+
+
+def random_polys(rng, n, span=300):
+    ctr = rng.rand(n, 2) * span
+    wh = rng.rand(n, 2) * 40 + 10
+    theta = rng.rand(n) * np.pi
+    corners = np.array([[-0.5, -0.5], [0.5, -0.5], [0.5, 0.5], [-0.5, 0.5]])
+    cos, sin = np.cos(theta)[:, None], np.sin(theta)[:, None]
+    xs = ctr[:, :1] + corners[:, 0] * wh[:, :1] * cos - corners[:, 1] * wh[:, 1:] * sin
+    ys = ctr[:, 1:] + corners[:, 0] * wh[:, :1] * sin + corners[:, 1] * wh[:, 1:] * cos
+    return np.stack([xs, ys], axis=2).reshape(-1, 8)
+
+
+class TestVocEvalDets(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.gts = {}
+        for i in range(4):
+            n = 30
+            self.gts['P{:04d}'.format(i)] = {
+                'names': np.array(['plane'] * 20 + ['ship'] * (n - 20), dtype=str),
+                'polys': random_polys(rng, n),
+                'difficult': rng.rand(n) < 0.2}
+        # detections jittered from the ground truths, plus false positives
+        image_ids, BB = [], []
+        for imagename, gt in self.gts.items():
+            image_ids += [imagename] * (len(gt['polys']) + 10)
+            BB += [gt['polys'] + rng.randn(*gt['polys'].shape) * 2, random_polys(rng, 10)]
+        self.image_ids = np.array(image_ids, dtype=str)
+        self.BB = np.concatenate(BB)
+        self.confidence = rng.rand(len(self.BB))
+
+    def assert_same_as_ref(self, class_gts, use_07_metric):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rec, prec, ap = voc_eval_dets(self.image_ids, self.confidence, self.BB, class_gts,
+                                          use_07_metric=use_07_metric)
+            rec_ref, prec_ref, ap_ref = voc_eval_dets_ref(self.image_ids, self.confidence, self.BB, class_gts,
+                                                          use_07_metric=use_07_metric)
+        np.testing.assert_array_equal(rec, rec_ref)
+        np.testing.assert_array_equal(prec, prec_ref)
+        np.testing.assert_array_equal(ap, ap_ref)
+
+    def test_class(self):
+        for use_07_metric in [False, True]:
+            self.assert_same_as_ref(select_class(self.gts, 'plane'), use_07_metric)
+
+    def test_class_without_gts(self):
+        class_gts = select_class(self.gts, 'harbor')
+        self.assertEqual(len(class_gts['difficult']), 0)
+        for use_07_metric in [False, True]:
+            self.assert_same_as_ref(class_gts, use_07_metric)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -105,7 +105,7 @@ double intersectArea(Point*ps1,int n1,Point*ps2,int n2){
 
 
 
-double iou_poly(vector<double> p, vector<double> q) {
+double iou_poly_ptr(const double* p, const double* q) {
     Point ps1[maxn],ps2[maxn];
     int n1 = 4;
     int n2 = 4;
@@ -131,6 +131,38 @@ double iou_poly(vector<double> p, vector<double> q) {
 
     return iou;
 }
+
+double iou_poly(vector<double> p, vector<double> q) {
+    return iou_poly_ptr(&p[0], &q[0]);
+}
+
+//计算两组多边形的iou矩阵, 外接矩形不相交的多边形对直接置0
+void iou_poly_batch(const double* p, int n, const double* q, int k, double* ious) {
+    vector<double> q_hbbs(k * 4);
+    for (int j = 0; j < k; j++) {
+        const double* qj = q + j * 8;
+        q_hbbs[j * 4 + 0] = min(min(qj[0], qj[2]), min(qj[4], qj[6]));
+        q_hbbs[j * 4 + 1] = min(min(qj[1], qj[3]), min(qj[5], qj[7]));
+        q_hbbs[j * 4 + 2] = max(max(qj[0], qj[2]), max(qj[4], qj[6]));
+        q_hbbs[j * 4 + 3] = max(max(qj[1], qj[3]), max(qj[5], qj[7]));
+    }
+    for (int i = 0; i < n; i++) {
+        const double* pi = p + i * 8;
+        double xmin = min(min(pi[0], pi[2]), min(pi[4], pi[6]));
+        double ymin = min(min(pi[1], pi[3]), min(pi[5], pi[7]));
+        double xmax = max(max(pi[0], pi[2]), max(pi[4], pi[6]));
+        double ymax = max(max(pi[1], pi[3]), max(pi[5], pi[7]));
+        for (int j = 0; j < k; j++) {
+            const double* hb = &q_hbbs[j * 4];
+            if (min(xmax, hb[2]) < max(xmin, hb[0]) ||
+                min(ymax, hb[3]) < max(ymin, hb[1])) {
+                ious[i * k + j] = 0;
+                continue;
+            }
+            ious[i * k + j] = iou_poly_ptr(pi, q + j * 8);
+        }
+    }
+}
 //
 int main(){
 
@@ -7,4 +7,10 @@
 
 #include <vector>
 double iou_poly(std::vector<double> p, std::vector<double> q);
+#ifndef SWIG
+// raw pointer versions used by the cython batch wrapper (polyiou_batch.pyx),
+// polygons are stored as contiguous (x1, y1, ..., x4, y4) doubles
+double iou_poly_ptr(const double* p, const double* q);
+void iou_poly_batch(const double* p, int n, const double* q, int k, double* ious);
+#endif
 #endif //POLYIOU_POLYIOU_H
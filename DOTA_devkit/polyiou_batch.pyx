@@ -0,0 +1,114 @@
+# --------------------------------------------------------
+# Batched polygon iou on top of polyiou.cpp
+# The per-pair swig api (polyiou.iou_poly) needs two VectorDouble objects for
+# every pair, here the whole (N, 8) x (K, 8) problem is solved in one call.
+# --------------------------------------------------------
+
+cimport cython
+import numpy as np
+cimport numpy as np
+from libcpp.vector cimport vector
+from libc.string cimport memcpy
+
+DTYPE = np.float64
+ctypedef np.float64_t DTYPE_t
+
+cdef extern from "polyiou.h":
+    double iou_poly_ptr(const double* p, const double* q) nogil
+    void iou_poly_batch(const double* p, int n, const double* q, int k, double* ious) nogil
+
+
+cdef np.ndarray _to_array(vector[np.int64_t]& v):
+    cdef np.ndarray[np.int64_t, ndim=1] arr = np.empty(v.size(), dtype=np.int64)
+    if v.size() > 0:
+        memcpy(&arr[0], v.data(), v.size() * sizeof(np.int64_t))
+    return arr
+
+
+def _as_polys(polys):
+    polys = np.ascontiguousarray(polys, dtype=DTYPE)
+    if polys.ndim == 1:
+        polys = polys.reshape(-1, 8)
+    assert polys.ndim == 2 and polys.shape[1] == 8, \
+        'polys should be in shape (n, 8), but got {}'.format(polys.shape)
+    return polys
+
+
+def iou_poly_matrix(polys1, polys2):
+    """
+    Parameters
+    ----------
+    polys1: (N, 8) ndarray of float, (x1, y1, ..., x4, y4)
+    polys2: (K, 8) ndarray of float
+    Returns
+    -------
+    ious: (N, K) ndarray of polygon iou, pairs whose hbbs do not intersect
+        are set to 0 without computing the polygon intersection
+    """
+    cdef np.ndarray[DTYPE_t, ndim=2] p = _as_polys(polys1)
+    cdef np.ndarray[DTYPE_t, ndim=2] q = _as_polys(polys2)
+    cdef int N = p.shape[0]
+    cdef int K = q.shape[0]
+    cdef np.ndarray[DTYPE_t, ndim=2] ious = np.zeros((N, K), dtype=DTYPE)
+    if N == 0 or K == 0:
+        return ious
+    with nogil:
+        iou_poly_batch(&p[0, 0], N, &q[0, 0], K, &ious[0, 0])
+    return ious
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def iou_poly_pairs(polys1, polys2, double thr=0):
+    """
+    Sparse version of iou_poly_matrix, only the pairs with iou > thr are
+    returned.
+
+    Parameters
+    ----------
+    polys1: (N, 8) ndarray of float
+    polys2: (K, 8) ndarray of float
+    thr: pairs with iou <= thr are dropped
+    Returns
+    -------
+    inds1: (P, ) int64 indices into polys1
+    inds2: (P, ) int64 indices into polys2
+    ious: (P, ) float64 ious of the pairs
+    """
+    cdef np.ndarray[DTYPE_t, ndim=2] p = _as_polys(polys1)
+    cdef np.ndarray[DTYPE_t, ndim=2] q = _as_polys(polys2)
+    cdef int N = p.shape[0]
+    cdef int K = q.shape[0]
+    cdef np.ndarray[DTYPE_t, ndim=2] hbb1 = np.empty((N, 4), dtype=DTYPE)
+    cdef np.ndarray[DTYPE_t, ndim=2] hbb2 = np.empty((K, 4), dtype=DTYPE)
+    cdef vector[np.int64_t] out1
+    cdef vector[np.int64_t] out2
+    cdef vector[double] out_ious
+    cdef int i, j
+    cdef double iou
+    if N > 0:
+        hbb1[:, 0] = p[:, 0::2].min(axis=1)
+        hbb1[:, 1] = p[:, 1::2].min(axis=1)
+        hbb1[:, 2] = p[:, 0::2].max(axis=1)
+        hbb1[:, 3] = p[:, 1::2].max(axis=1)
+    if K > 0:
+        hbb2[:, 0] = q[:, 0::2].min(axis=1)
+        hbb2[:, 1] = q[:, 1::2].min(axis=1)
+        hbb2[:, 2] = q[:, 0::2].max(axis=1)
+        hbb2[:, 3] = q[:, 1::2].max(axis=1)
+    with nogil:
+        for i in range(N):
+            for j in range(K):
+                if min(hbb1[i, 2], hbb2[j, 2]) < max(hbb1[i, 0], hbb2[j, 0]):
+                    continue
+                if min(hbb1[i, 3], hbb2[j, 3]) < max(hbb1[i, 1], hbb2[j, 1]):
+                    continue
+                iou = iou_poly_ptr(&p[i, 0], &q[j, 0])
+                if iou > thr:
+                    out1.push_back(i)
+                    out2.push_back(j)
+                    out_ious.push_back(iou)
+    cdef np.ndarray[DTYPE_t, ndim=1] ious = np.empty(out_ious.size(), dtype=DTYPE)
+    if out_ious.size() > 0:
+        memcpy(&ious[0], out_ious.data(), out_ious.size() * sizeof(double))
+    return _to_array(out1), _to_array(out2), ious
@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+import DOTA_devkit.polyiou as polyiou
+from DOTA_devkit.polyiou_batch import iou_poly_matrix, iou_poly_pairs
+
+
+def iou_poly_matrix_ref(polys1, polys2):
+    """
+        the per pair polyiou.iou_poly loop that iou_poly_matrix replaces
+    """
+    ious = np.zeros((len(polys1), len(polys2)))
+    for i, p in enumerate(polys1):
+        for j, q in enumerate(polys2):
+            ious[i, j] = polyiou.iou_poly(polyiou.VectorDouble(p.tolist()), polyiou.VectorDouble(q.tolist()))
+    return ious
+
+
+def random_polys(rng, n, span=200):
+    ctr = rng.rand(n, 2) * span
+    wh = rng.rand(n, 2) * 40 + 10
+    theta = rng.rand(n) * np.pi
+    corners = np.array([[-0.5, -0.5], [0.5, -0.5], [0.5, 0.5], [-0.5, 0.5]])
+    cos, sin = np.cos(theta)[:, None], np.sin(theta)[:, None]
+    xs = ctr[:, :1] + corners[:, 0] * wh[:, :1] * cos - corners[:, 1] * wh[:, 1:] * sin
+    ys = ctr[:, 1:] + corners[:, 0] * wh[:, :1] * sin + corners[:, 1] * wh[:, 1:] * cos
+    return np.stack([xs, ys], axis=2).reshape(-1, 8)
+
+
+class TestPolyIouBatch(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.polys1 = random_polys(rng, 60)
+        # jittered copies of polys1, so that many pairs overlap
+        self.polys2 = np.concatenate([self.polys1[:30] + rng.randn(30, 8) * 3, random_polys(rng, 40)])
+
+    def test_matrix(self):
+        ious = iou_poly_matrix(self.polys1, self.polys2)
+        self.assertEqual(ious.shape, (60, 70))
+        self.assertTrue((ious > 0).sum() > 30)
+        # the pairs whose hbbs are disjoint have an iou of 0 with iou_poly too
+        np.testing.assert_allclose(ious, iou_poly_matrix_ref(self.polys1, self.polys2), atol=1e-12)
+
+    def test_pairs(self):
+        ious = iou_poly_matrix(self.polys1, self.polys2)
+        for thr in [0, 0.5]:
+            inds1, inds2, pair_ious = iou_poly_pairs(self.polys1, self.polys2, thr)
+            np.testing.assert_array_equal(np.stack([inds1, inds2], axis=1), np.argwhere(ious > thr))
+            np.testing.assert_array_equal(pair_ious, ious[inds1, inds2])
+
+    def test_empty(self):
+        self.assertEqual(iou_poly_matrix(np.zeros((0, 8)), self.polys2).shape, (0, 70))
+        self.assertEqual(iou_poly_matrix(self.polys1, np.zeros((0, 8))).shape, (60, 0))
+        inds1, inds2, pair_ious = iou_poly_pairs(np.zeros((0, 8)), self.polys2)
+        self.assertEqual(len(inds1), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,14 +3,21 @@
 """
 from distutils.core import setup, Extension
 import numpy
+from Cython.Build import cythonize
 
 polyiou_module = Extension('_polyiou',
                            sources=['polyiou_wrap.cxx', 'polyiou.cpp'],
                            )
+# batched polygon iou, shares polyiou.cpp with the swig module
+polyiou_batch_module = Extension('polyiou_batch',
+                                 sources=['polyiou_batch.pyx', 'polyiou.cpp'],
+                                 include_dirs=[numpy.get_include()],
+                                 language='c++',
+                                 )
 setup(name = 'polyiou',
       version = '0.1',
       author = "SWIG Docs",
       description = """Simple swig example from docs""",
-      ext_modules = [polyiou_module],
+      ext_modules = [polyiou_module] + cythonize([polyiou_batch_module]),
       py_modules = ["polyiou"],
-)
\ No newline at end of file
+)
@@ -0,0 +1,9 @@
+from .core import (BENCHMARKS, register_benchmark, select_benchmarks,
+                   run_benchmark, time_callable, environment_info,
+                   compare_results)
+from . import bench_bbox, bench_nms, bench_devkit  # noqa: F401, registration
+
+__all__ = [
+    'BENCHMARKS', 'register_benchmark', 'select_benchmarks', 'run_benchmark',
+    'time_callable', 'environment_info', 'compare_results'
+]
@@ -0,0 +1,70 @@
+import numpy as np
+import torch
+
+from .core import register_benchmark
+from .synthetic import random_polys, random_rbboxes
+
+BOX_SIZES = [1000, 10000, 100000]
+
+
+@register_benchmark('bbox.RotBox2Polys', BOX_SIZES)
+def bench_rotbox2polys(size, rng):
+    from mmdet.core.bbox.transforms_rbbox import RotBox2Polys
+    rbboxes = random_rbboxes(rng, size).astype(np.float64)
+    yield lambda: RotBox2Polys(rbboxes)
+
+
+@register_benchmark('bbox.polygonToRotRectangle_batch', BOX_SIZES)
+def bench_polygon_to_rot_rectangle(size, rng):
+    from mmdet.core.bbox.transforms_rbbox import polygonToRotRectangle_batch
+    polys = random_polys(rng, size)
+    yield lambda: polygonToRotRectangle_batch(polys)
+
+
+@register_benchmark('bbox.get_best_begin_point', BOX_SIZES)
+def bench_get_best_begin_point(size, rng):
+    from mmdet.core.bbox.transforms_rbbox import get_best_begin_point
+    polys = random_polys(rng, size)
+    # start from a random corner
+    shifts = rng.randint(0, 4, size)
+    coordinates = np.stack([
+        np.roll(p, s, axis=0)
+        for p, s in zip(polys.reshape(-1, 4, 2), shifts)
+    ])
+    yield lambda: get_best_begin_point(coordinates)
+
+
+@register_benchmark('bbox.dbbox2delta', BOX_SIZES)
+def bench_dbbox2delta(size, rng):
+    from mmdet.core.bbox.transforms_rbbox import dbbox2delta
+    proposals = torch.from_numpy(random_rbboxes(rng, size))
+    gts = proposals + torch.from_numpy(
+        rng.randn(size, 5).astype(np.float32))
+    gts[:, 2:4] = gts[:, 2:4].abs() + 2
+    yield lambda: dbbox2delta(proposals, gts)
+
+
+@register_benchmark('bbox.delta2dbbox', BOX_SIZES)
+def bench_delta2dbbox(size, rng):
+    from mmdet.core.bbox.transforms_rbbox import delta2dbbox
+    rrois = torch.from_numpy(random_rbboxes(rng, size))
+    deltas = torch.from_numpy(rng.randn(size, 5).astype(np.float32) * 0.1)
+    yield lambda: delta2dbbox(rrois, deltas, max_shape=(1024, 1024))
+
+
+@register_benchmark('bbox.rbbox_overlaps_cy', [1000, 10000, 50000])
+def bench_rbbox_overlaps_cy(size, rng):
+    """200 gts against `size` boxes."""
+    from mmdet.core.bbox.geometry import rbbox_overlaps_cy
+    gts = random_rbboxes(rng, 200).astype(np.float64)
+    rbboxes = random_rbboxes(rng, size).astype(np.float64)
+    yield lambda: rbbox_overlaps_cy(gts, rbboxes)
+
+
+@register_benchmark('bbox.rbbox_overlaps_torch', [1000, 10000, 50000])
+def bench_rbbox_overlaps_torch(size, rng):
+    """200 gts against `size` boxes, see bbox.rbbox_overlaps_cy."""
+    from mmdet.core.bbox.geometry_rbbox import rbbox_overlaps_torch
+    gts = torch.from_numpy(random_rbboxes(rng, 200))
+    rbboxes = torch.from_numpy(random_rbboxes(rng, size))
+    yield lambda: rbbox_overlaps_torch(gts, rbboxes)
@@ -0,0 +1,104 @@
+import importlib
+import os
+import os.path as osp
+import shutil
+import sys
+import tempfile
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from .core import register_benchmark
+from .synthetic import (write_dota_labels, write_dota_split, write_patch_dets,
+                        write_task1_dets)
+
+DEVKIT_DIR = osp.join(osp.dirname(osp.dirname(osp.abspath(__file__))),
+                      'DOTA_devkit')
+
+
+def import_devkit(name):
+    """Import a DOTA_devkit module, some of them use flat imports of their
+    neighbours and need DOTA_devkit on the path."""
+    if DEVKIT_DIR not in sys.path:
+        sys.path.append(DEVKIT_DIR)
+    return importlib.import_module(name)
+
+
+def _tempdir(*subdirs):
+    root = tempfile.mkdtemp(prefix='bench_')
+    for subdir in subdirs:
+        os.makedirs(osp.join(root, subdir))
+    return root
+
+
+@register_benchmark('devkit.voc_eval', [1000, 10000, 50000])
+def bench_voc_eval(size, rng):
+    """Task1 evaluation of `size` detections of a class over 20 images of
+    200 objects."""
+    voc_eval = import_devkit('poly_voc_eval').voc_eval
+    root = _tempdir('labelTxt')
+    try:
+        names = write_dota_split(rng, root, 20, 200)
+        imagesetfile = osp.join(root, 'imageset.txt')
+        with open(imagesetfile, 'w') as f:
+            f.write('\n'.join(names) + '\n')
+        write_task1_dets(rng, osp.join(root, 'Task1_plane.txt'), names, size)
+        yield lambda: voc_eval(
+            osp.join(root, 'Task1_{:s}.txt'),
+            osp.join(root, 'labelTxt', '{:s}.txt'),
+            imagesetfile,
+            'plane',
+            ovthresh=0.5)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+@register_benchmark('devkit.splitbase.SplitSingle', [100, 1000, 5000])
+def bench_split_single(size, rng):
+    """Split a 2048 x 2048 image with `size` objects into 1024 patches."""
+    import cv2
+    splitbase = import_devkit('ImgSplit_multi_process').splitbase
+    root = _tempdir('images', 'labelTxt')
+    split = None
+    try:
+        # smooth content, the encoding of pure noise would dominate
+        ys, xs = np.mgrid[:2048, :2048]
+        img = np.stack([xs % 256, ys % 256, (xs + ys) % 256], axis=2)
+        img = np.minimum(img + rng.randint(0, 8, img.shape), 255)
+        img = img.astype(np.uint8)
+        cv2.imwrite(osp.join(root, 'images', 'P0000.png'), img)
+        write_dota_labels(rng, osp.join(root, 'labelTxt', 'P0000.txt'), size,
+                          scene_size=2048)
+        with open(os.devnull, 'w') as devnull:
+            with redirect_stdout(devnull):
+                split = splitbase(
+                    root, osp.join(root, 'split'), gap=200, subsize=1024,
+                    num_process=1)
+
+            def split_single():
+                # SplitSingle prints the name of the image
+                with redirect_stdout(devnull):
+                    split.SplitSingle('P0000', 1, '.png')
+
+            yield split_single
+    finally:
+        if split is not None:
+            split.pool.close()
+            split.pool.join()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+@register_benchmark('devkit.mergesingle', [1000, 5000, 20000])
+def bench_mergesingle(size, rng):
+    """Merge the `size` patch detections of a 4000 x 4000 image with
+    py_cpu_nms_poly_fast."""
+    merge = import_devkit('ResultMerge_multi_process')
+    root = _tempdir('merged')
+    try:
+        filename = osp.join(root, 'Task1_plane.txt')
+        write_patch_dets(rng, filename, size)
+        yield lambda: merge.mergesingle(
+            osp.join(root, 'merged'), merge.py_cpu_nms_poly_fast, 0.1,
+            filename)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
@@ -0,0 +1,43 @@
+import torch
+
+from .core import register_benchmark
+from .synthetic import random_dets, random_proposals
+
+NMS_SIZES = [500, 2000, 5000]
+
+
+def _rnms_case(nms_name, input_type, **kwargs):
+    """Benchmark of a nms of `rnms_wrapper`, `input_type` is 'tensor' or
+    'array' for the (n, 9) poly dets and 'hbb' for (n, 5) hbb dets."""
+
+    def bench(size, rng):
+        from mmdet.ops.nms import rnms_wrapper
+        nms = getattr(rnms_wrapper, nms_name)
+        dets = random_dets(rng, size)
+        if input_type == 'tensor':
+            dets = torch.from_numpy(dets)
+        elif input_type == 'hbb':
+            dets = rnms_wrapper.bbox_poly2hbb(dets)
+        yield lambda: nms(dets, **kwargs)
+
+    register_benchmark('nms.rnms_wrapper.' + nms_name, NMS_SIZES)(bench)
+
+
+_rnms_case('py_cpu_nms_poly_fast', 'tensor', iou_thr=0.1)
+_rnms_case('py_cpu_nms_poly_fast_np', 'array', thresh=0.1)
+_rnms_case('py_cpu_nms', 'hbb', thresh=0.5)
+_rnms_case('obb_HNMS', 'tensor', iou_thr=0.5)
+_rnms_case('obb_hybrid_NMS', 'tensor', thresh_hbb=0.5, thresh_obb=0.3)
+
+
+@register_benchmark('nms.multiclass_nms_rbbox', [1000, 2000, 5000])
+def bench_multiclass_nms_rbbox(size, rng):
+    """`size` proposals of 16 classes with the test_cfg of the DOTA
+    configs."""
+    from mmdet.core.post_processing.rbbox_nms import multiclass_nms_rbbox
+    multi_bboxes, multi_scores = random_proposals(rng, size)
+    multi_bboxes = torch.from_numpy(multi_bboxes)
+    multi_scores = torch.from_numpy(multi_scores)
+    nms_cfg = dict(type='py_cpu_nms_poly_fast', iou_thr=0.1)
+    yield lambda: multiclass_nms_rbbox(
+        multi_bboxes, multi_scores, 0.05, nms_cfg, max_num=2000)
@@ -0,0 +1,157 @@
+import fnmatch
+import os
+import os.path as osp
+import platform
+import subprocess
+import time
+import traceback
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+BENCHMARKS = OrderedDict()
+
+
+def register_benchmark(name, sizes):
+    """Register a benchmark case.
+
+    The decorated function is a generator taking `(size, rng)`: it builds
+    the synthetic inputs of `size` boxes (or detections, objects) with the
+    `np.random.RandomState` rng, yields the callable to time and cleans up
+    after the yield.
+
+    Args:
+        name (str): name of the case, e.g. 'bbox.RotBox2Polys'.
+        sizes (list[int]): default sizes of the sweep.
+    """
+
+    def _register(func):
+        assert name not in BENCHMARKS, 'duplicate benchmark ' + name
+        BENCHMARKS[name] = (contextmanager(func), list(sizes))
+        return func
+
+    return _register
+
+
+def select_benchmarks(patterns=None):
+    """Names of the benchmarks matching any of the fnmatch `patterns`."""
+    if not patterns:
+        return list(BENCHMARKS)
+    return [
+        name for name in BENCHMARKS
+        if any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+    ]
+
+
+def case_seed(seed, name, size):
+    """Seed of a case, fixed for a (seed, name, size) across runs."""
+    return (seed + sum((i + 1) * ord(c) for i, c in enumerate(name)) +
+            size * 7919) % (2**31)
+
+
+def time_callable(func, repeat=5, warmup=1, min_time=0.05):
+    """Time `func` like `timeit`.
+
+    The number of calls per repeat is doubled until a repeat takes at least
+    `min_time` seconds, then `repeat` repeats are timed.
+
+    Returns:
+        tuple: seconds per call of every repeat and the number of calls per
+            repeat.
+    """
+    for _ in range(warmup):
+        func()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return times, number
+
+
+def run_benchmark(name, size, seed=0, repeat=5, warmup=1, min_time=0.05):
+    """Run a case, the errors are recorded in the result instead of being
+    raised so one broken primitive does not stop the suite."""
+    bench, _ = BENCHMARKS[name]
+    result = OrderedDict(name=name, size=size)
+    rng = np.random.RandomState(case_seed(seed, name, size))
+    try:
+        with bench(size, rng) as func:
+            times, number = time_callable(func, repeat, warmup, min_time)
+    except Exception as e:
+        result['error'] = '{}: {}'.format(type(e).__name__, e)
+        result['traceback'] = traceback.format_exc()
+        return result
+    times = np.array(times)
+    result.update(
+        number=number,
+        times=times.tolist(),
+        min=float(times.min()),
+        median=float(np.median(times)),
+        mean=float(times.mean()),
+        std=float(times.std()),
+        throughput=float(size / np.median(times)))
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=osp.dirname(osp.abspath(__file__)),
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment_info():
+    """Where the results come from, to tell apart the runs of different
+    commits from the ones of different machines."""
+    import torch
+    return OrderedDict(
+        commit=_git_commit(),
+        python=platform.python_version(),
+        numpy=np.__version__,
+        torch=torch.__version__,
+        torch_threads=torch.get_num_threads(),
+        platform=platform.platform(),
+        processor=platform.processor(),
+        cpu_count=os.cpu_count())
+
+
+def compare_results(baseline, results, threshold=1.2):
+    """Compare the median times with the ones of a baseline run.
+
+    Returns:
+        list[dict]: name, size, baseline and current median and their ratio
+            of the cases present in both runs, `regression` is set when the
+            ratio is above `threshold`.
+    """
+    base = {(r['name'], r['size']): r for r in baseline['results']}
+    rows = []
+    for result in results['results']:
+        key = (result['name'], result['size'])
+        if key not in base or 'median' not in base[key] or \
+                'median' not in result:
+            continue
+        ratio = result['median'] / base[key]['median']
+        rows.append(
+            OrderedDict(
+                name=result['name'],
+                size=result['size'],
+                baseline=base[key]['median'],
+                current=result['median'],
+                ratio=ratio,
+                regression=ratio > threshold))
+    return rows
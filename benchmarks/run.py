@@ -0,0 +1,121 @@
+"""Run the CPU benchmarks of the rotated detection primitives.
+
+Usage (from the repo root):
+
+    python -m benchmarks.run --out bench.json
+    python -m benchmarks.run --filter 'nms.*' --sizes 1000 \
+        --compare bench.json
+"""
+import argparse
+import json
+import sys
+from collections import OrderedDict
+
+import torch
+
+from . import (BENCHMARKS, compare_results, environment_info, run_benchmark,
+               select_benchmarks)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the rotated detection primitives on '
+        'synthetic DOTA-like data')
+    parser.add_argument(
+        '--filter',
+        nargs='+',
+        help='fnmatch patterns of the benchmarks to run, e.g. "bbox.*"')
+    parser.add_argument(
+        '--list', action='store_true', help='list the benchmarks and exit')
+    parser.add_argument(
+        '--sizes',
+        type=int,
+        nargs='+',
+        help='sizes to sweep instead of the defaults of each benchmark')
+    parser.add_argument(
+        '--quick',
+        action='store_true',
+        help='only run the smallest default size of each benchmark')
+    parser.add_argument('--seed', type=int, default=0, help='data seed')
+    parser.add_argument(
+        '--repeat', type=int, default=5, help='timed repeats per case')
+    parser.add_argument(
+        '--warmup', type=int, default=1, help='untimed calls per case')
+    parser.add_argument(
+        '--min_time',
+        type=float,
+        default=0.05,
+        help='min seconds per repeat, fast cases are called several times')
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=1,
+        help='torch threads, keep it fixed to compare runs')
+    parser.add_argument('--out', help='json file of the results')
+    parser.add_argument(
+        '--compare', help='json file of a baseline run to compare with')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=1.2,
+        help='median time ratio over the baseline reported as a regression')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    names = select_benchmarks(args.filter)
+    if args.list:
+        for name in names:
+            print('{:45s} {}'.format(name, BENCHMARKS[name][1]))
+        return
+    torch.set_num_threads(args.threads)
+
+    results = []
+    for name in names:
+        sizes = args.sizes or BENCHMARKS[name][1]
+        if args.quick and not args.sizes:
+            sizes = sizes[:1]
+        for size in sizes:
+            result = run_benchmark(name, size, args.seed, args.repeat,
+                                   args.warmup, args.min_time)
+            results.append(result)
+            if 'error' in result:
+                print('{:45s} {:>8d}  error: {}'.format(
+                    name, size, result['error'].splitlines()[0]))
+            else:
+                print('{:45s} {:>8d} {:12.3f} ms {:14.0f} /s'.format(
+                    name, size, result['median'] * 1e3,
+                    result['throughput']))
+            sys.stdout.flush()
+
+    output = OrderedDict(
+        environment=environment_info(),
+        config=OrderedDict(
+            seed=args.seed,
+            repeat=args.repeat,
+            warmup=args.warmup,
+            min_time=args.min_time,
+            threads=args.threads),
+        results=results)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(output, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare_results(baseline, output, args.threshold)
+        print('\ncompared with {} ({})'.format(
+            args.compare, baseline['environment'].get('commit')))
+        for row in rows:
+            print('{:45s} {:>8d} {:10.3f} ms -> {:10.3f} ms  x{:.2f}{}'.format(
+                row['name'], row['size'], row['baseline'] * 1e3,
+                row['current'] * 1e3, row['ratio'],
+                '  REGRESSION' if row['regression'] else ''))
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
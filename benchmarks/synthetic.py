@@ -0,0 +1,127 @@
+"""Synthetic DOTA-like data for the benchmarks.
+
+The objects are rotated boxes with log-normal sizes and aspect ratios,
+grouped in clusters like the vehicles, ships and planes of the aerial
+scenes. Everything is drawn from the given `np.random.RandomState`, so the
+data only depends on the seed.
+"""
+import os.path as osp
+
+import numpy as np
+
+DOTA_CLASSES = ('plane', 'baseball-diamond', 'bridge', 'ground-track-field',
+                'small-vehicle', 'large-vehicle', 'ship', 'tennis-court',
+                'basketball-court', 'storage-tank', 'soccer-ball-field',
+                'roundabout', 'harbor', 'swimming-pool', 'helicopter')
+
+
+def random_rbboxes(rng, num, scene_size=1024, num_clusters=None):
+    """Rotated boxes (x_ctr, y_ctr, w, h, angle), shape (num, 5)."""
+    if num_clusters is None:
+        num_clusters = max(num // 50, 1)
+    centers = rng.rand(num_clusters, 2) * scene_size
+    cluster_inds = rng.randint(0, num_clusters, num)
+    spread = rng.uniform(20, 150, num_clusters)[cluster_inds]
+    ctrs = centers[cluster_inds] + rng.randn(num, 2) * spread[:, None]
+    ctrs = np.clip(ctrs, 0, scene_size - 1)
+    sizes = np.clip(rng.lognormal(np.log(30), 0.8, num), 6, 600)
+    ratios = np.clip(rng.lognormal(np.log(2), 0.5, num), 1, 10)
+    w = sizes * np.sqrt(ratios)
+    h = sizes / np.sqrt(ratios)
+    angles = rng.rand(num) * np.pi
+    return np.stack([ctrs[:, 0], ctrs[:, 1], w, h, angles],
+                    axis=1).astype(np.float32)
+
+
+def rbboxes2polys(rbboxes):
+    """Corners (x1, y1, ..., x4, y4) of rotated boxes, shape (n, 8)."""
+    x, y, w, h, a = [rbboxes[:, i].astype(np.float64) for i in range(5)]
+    cos, sin = np.cos(a), np.sin(a)
+    dx = np.array([0.5, 0.5, -0.5, -0.5])
+    dy = np.array([-0.5, 0.5, 0.5, -0.5])
+    xs = x[:, None] + cos[:, None] * w[:, None] * dx - \
+        sin[:, None] * h[:, None] * dy
+    ys = y[:, None] + sin[:, None] * w[:, None] * dx + \
+        cos[:, None] * h[:, None] * dy
+    return np.stack([xs, ys], axis=2).reshape(-1, 8)
+
+
+def random_polys(rng, num, scene_size=1024):
+    return rbboxes2polys(random_rbboxes(rng, num, scene_size))
+
+
+def random_dets(rng, num, scene_size=1024, jitter=3.):
+    """Detections (x1, y1, ..., x4, y4, score), shape (num, 9), with a few
+    near duplicates of every object like the raw outputs of a detector."""
+    num_objects = max(num // 4, 1)
+    rbboxes = random_rbboxes(rng, num_objects, scene_size)
+    rbboxes = rbboxes[rng.randint(0, num_objects, num)]
+    rbboxes[:, :4] += rng.randn(num, 4).astype(np.float32) * jitter
+    rbboxes[:, 2:4] = np.abs(rbboxes[:, 2:4]) + 2
+    rbboxes[:, 4] += rng.randn(num).astype(np.float32) * 0.05
+    scores = rng.rand(num, 1)
+    return np.hstack([rbboxes2polys(rbboxes), scores])
+
+
+def random_proposals(rng, num, num_classes=16, scene_size=1024):
+    """Class specific rotated boxes (num, 5 * num_classes) and softmax
+    scores (num, num_classes) like the input of `multiclass_nms_rbbox`."""
+    rbboxes = random_rbboxes(rng, num, scene_size)
+    multi_bboxes = np.tile(rbboxes, (1, num_classes))
+    multi_bboxes += rng.randn(*multi_bboxes.shape).astype(np.float32)
+    logits = rng.randn(num, num_classes).astype(np.float32) * 3
+    scores = np.exp(logits - logits.max(axis=1, keepdims=True))
+    scores /= scores.sum(axis=1, keepdims=True)
+    return multi_bboxes, scores
+
+
+def _format_poly(poly):
+    return ' '.join('{:.1f}'.format(v) for v in poly)
+
+
+def write_dota_labels(rng, filename, num, scene_size=1024,
+                      difficult_ratio=0.1):
+    """Write a DOTA label file of `num` objects, returns their polys."""
+    polys = random_polys(rng, num, scene_size)
+    labels = rng.randint(0, len(DOTA_CLASSES), num)
+    difficult = rng.rand(num) < difficult_ratio
+    with open(filename, 'w') as f:
+        f.write('imagesource:GoogleEarth\ngsd:0.146343590398\n')
+        for poly, label, diff in zip(polys, labels, difficult):
+            f.write('{} {} {}\n'.format(
+                _format_poly(poly), DOTA_CLASSES[label], int(diff)))
+    return polys
+
+
+def write_dota_split(rng, root, num_images, num_objects, scene_size=1024):
+    """Write the ground truths of a DOTA like split to `root`/labelTxt,
+    returns the image names."""
+    names = ['P{:04d}'.format(i) for i in range(num_images)]
+    for name in names:
+        write_dota_labels(rng, osp.join(root, 'labelTxt', name + '.txt'),
+                          num_objects, scene_size)
+    return names
+
+
+def write_task1_dets(rng, filename, imagenames, num, scene_size=1024):
+    """Write a Task1 result file of `num` detections over `imagenames`."""
+    dets = random_dets(rng, num, scene_size)
+    inds = rng.randint(0, len(imagenames), num)
+    with open(filename, 'w') as f:
+        for i, det in zip(inds, dets):
+            f.write('{} {:.3f} {}\n'.format(imagenames[i], det[8],
+                                            _format_poly(det[:8])))
+
+
+def write_patch_dets(rng, filename, num, name='P0000', scene_size=4000,
+                     subsize=1024, gap=200):
+    """Write the Task1 detections of the patches of an image, named like the
+    patches of `ImgSplit` (name__rate__left___up), for `mergesingle`."""
+    slide = subsize - gap
+    lefts = np.arange(0, scene_size - gap, slide)
+    inds = rng.randint(0, len(lefts), (num, 2))
+    dets = random_dets(rng, num, subsize)
+    with open(filename, 'w') as f:
+        for (i, j), det in zip(inds, dets):
+            f.write('{}__1__{}___{} {:.3f} {}\n'.format(
+                name, lefts[i], lefts[j], det[8], _format_poly(det[:8])))
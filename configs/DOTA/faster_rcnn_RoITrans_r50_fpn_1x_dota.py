@@ -113,7 +113,8 @@ train_cfg = dict(
                 pos_iou_thr=0.5,
                 neg_iou_thr=0.5,
                 min_pos_iou=0.5,
-                ignore_iof_thr=-1),
+                ignore_iof_thr=-1,
+                iou_calculator='torch'),
             sampler=dict(
                 type='RandomRbboxSampler',
                 num=512,
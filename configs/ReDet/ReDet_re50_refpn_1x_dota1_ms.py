@@ -111,7 +111,8 @@ train_cfg = dict(
                 pos_iou_thr=0.5,
                 neg_iou_thr=0.5,
                 min_pos_iou=0.5,
-                ignore_iof_thr=-1),
+                ignore_iof_thr=-1,
+                iou_calculator='torch'),
             sampler=dict(
                 type='RandomRbboxSampler',
                 num=512,
@@ -131,7 +132,10 @@ test_cfg = dict(
         nms_thr=0.7,
         min_bbox_size=0),
     rcnn=dict(
-        score_thr=0.05, nms=dict(type='py_cpu_nms_poly_fast', iou_thr=0.1), max_per_img=2000)
+        score_thr=0.05, nms=dict(type='py_cpu_nms_poly_fast', iou_thr=0.1), max_per_img=2000),
+    # share backbone features between rpn and rcnn in rotated aug test
+    feat_cache=True,
+    feat_cache_max_mb=4096
 )
 # dataset settings
 dataset_type = 'DOTADataset'
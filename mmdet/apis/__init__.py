@@ -1,9 +1,12 @@
 from .env import init_dist, get_root_logger, set_random_seed
 from .train import train_detector
 from .inference import init_detector, inference_detector, show_result, draw_poly_detections
+from .inference_large import (LargeImageInferencer, LargeImageReader,
+                              sliding_windows)
 
 __all__ = [
     'init_dist', 'get_root_logger', 'set_random_seed', 'train_detector',
     'init_detector', 'inference_detector', 'show_result',
-    'draw_poly_detections'
+    'draw_poly_detections', 'LargeImageInferencer', 'LargeImageReader',
+    'sliding_windows'
 ]
@@ -45,16 +45,19 @@ def init_detector(config, checkpoint=None, device='cuda:0'):
     return model
 
 
-def inference_detector(model, imgs):
+def inference_detector(model, imgs, batch_size=1):
     """Inference image(s) with the detector.
 
     Args:
         model (nn.Module): The loaded detector.
         imgs (str/ndarray or list[str/ndarray]): Either image files or loaded
             images.
+        batch_size (int): Number of images of a list tested in one forward,
+            the images are zero padded to the largest one. Detectors without
+            `supports_batch_test` test one image at a time.
 
     Returns:
-        If imgs is a str, a generator will be returned, otherwise return the
+        If imgs is a list, a generator will be returned, otherwise return the
         detection results directly.
     """
     cfg = model.cfg
@@ -64,6 +67,9 @@ def inference_detector(model, imgs):
     device = next(model.parameters()).device  # model device
     if not isinstance(imgs, list):
         return _inference_single(model, imgs, img_transform, device)
+    elif batch_size > 1 and getattr(model, 'supports_batch_test', False):
+        return _inference_batch_generator(model, imgs, img_transform, device,
+                                          batch_size)
     else:
         return _inference_generator(model, imgs, img_transform, device)
 
@@ -99,6 +105,37 @@ def _inference_generator(model, imgs, img_transform, device):
         yield _inference_single(model, img, img_transform, device)
 
 
+def _stack_padded(imgs):
+    """Stack (1, c, h, w) tensors into a zero padded (n, c, h, w) batch."""
+    h = max(img.size(2) for img in imgs)
+    w = max(img.size(3) for img in imgs)
+    batch = imgs[0].new_zeros((len(imgs), imgs[0].size(1), h, w))
+    for i, img in enumerate(imgs):
+        batch[i, :, :img.size(2), :img.size(3)] = img[0]
+    return batch
+
+
+def _inference_batch(model, imgs, img_transform, device):
+    datas = [
+        _prepare_data(mmcv.imread(img), img_transform, model.cfg, device)
+        for img in imgs
+    ]
+    img = _stack_padded([data['img'][0] for data in datas])
+    img_meta = [data['img_meta'][0][0] for data in datas]
+    with torch.no_grad():
+        results = model(
+            return_loss=False, rescale=True, img=[img], img_meta=[img_meta])
+    return [results] if len(imgs) == 1 else results
+
+
+def _inference_batch_generator(model, imgs, img_transform, device,
+                               batch_size):
+    for start in range(0, len(imgs), batch_size):
+        for result in _inference_batch(model, imgs[start:start + batch_size],
+                                       img_transform, device):
+            yield result
+
+
 # TODO: merge this method with the one in BaseDetector
 def show_result(img, result, class_names, score_thr=0.3, out_file=None):
     """Visualize the detection results on the image.
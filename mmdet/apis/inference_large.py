@@ -0,0 +1,314 @@
+import os.path as osp
+import threading
+import time
+from collections import OrderedDict
+
+import mmcv
+import numpy as np
+import torch
+from six.moves import queue
+
+from mmdet.datasets import to_tensor
+from mmdet.datasets.transforms import ImageTransform
+from mmdet.ops.poly_nms import batched_poly_nms
+
+
+class LargeImageReader(object):
+    """Random access to the chips of a large image.
+
+    ``.npy`` files are memory mapped and uncompressed ``.tif`` files are
+    memory mapped through `tifffile` when it is installed, so a chip only
+    touches the pages it covers. Other formats are decoded once with
+    `mmcv.imread`, since png/jpg can not be read partially.
+
+    The chips are BGR like the images of `mmcv.imread`. Memory mapped tif
+    and npy files hold RGB pixels, their chips are flipped to BGR as they
+    are read.
+
+    Args:
+        img (str or np.ndarray): image file or an (h, w, c) array, which may
+            itself be a `np.memmap`.
+        channel_order (str, optional): 'rgb' or 'bgr', channel order of an
+            array or of a memory mapped file. Defaults to 'bgr' for arrays,
+            like `inference_detector`, and 'rgb' for tif/npy files. Decoded
+            files are always BGR.
+    """
+
+    def __init__(self, img, channel_order=None):
+        assert channel_order in (None, 'rgb', 'bgr')
+        if isinstance(img, np.ndarray):
+            self.data, decoded = img, False
+            order = 'bgr'
+        elif isinstance(img, str):
+            self.data, decoded = self._open(img)
+            order = 'bgr' if decoded else 'rgb'
+        else:
+            raise TypeError('img must be a filename or ndarray, '
+                            'but got {}'.format(type(img)))
+        if self.data.ndim == 2:
+            self.data = self.data[:, :, None]
+        if channel_order is not None and not decoded:
+            order = channel_order
+        self.to_bgr = order == 'rgb' and self.data.shape[2] >= 3
+
+    @staticmethod
+    def _open(filename):
+        """The image and whether it was decoded by `mmcv.imread`."""
+        ext = osp.splitext(filename)[1].lower()
+        if ext == '.npy':
+            return np.load(filename, mmap_mode='r'), False
+        if ext in ('.tif', '.tiff'):
+            try:
+                import tifffile
+                return tifffile.memmap(filename, mode='r'), False
+            except (ImportError, ValueError):
+                # tifffile missing or compressed tiff
+                pass
+        return mmcv.imread(filename), True
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def read(self, x, y, chip_w, chip_h):
+        """Return the chip at (x, y) as a uint8 (chip_h, chip_w, 3) array.
+
+        Inner chips are views of the source, edge chips are zero padded.
+        """
+        chip = self.data[y:y + chip_h, x:x + chip_w, :3]
+        if self.to_bgr:
+            chip = chip[:, :, ::-1]
+        if chip.shape[0] == chip_h and chip.shape[1] == chip_w:
+            return np.ascontiguousarray(chip)
+        padded = np.zeros((chip_h, chip_w, chip.shape[2]), dtype=chip.dtype)
+        padded[:chip.shape[0], :chip.shape[1]] = chip
+        return padded
+
+
+def sliding_windows(height, width, chip_size, slide_size):
+    """Top-left corners (x, y) of the chips covering an image.
+
+    The last row/column of chips stops as soon as it reaches the image
+    border, so no chip lies entirely in the padding.
+    """
+    chip_h, chip_w = chip_size
+    slide_h, slide_w = slide_size
+
+    def _starts(length, chip, slide):
+        starts = [0]
+        while starts[-1] + chip < length:
+            starts.append(starts[-1] + slide)
+        return starts
+
+    return [(x, y) for x in _starts(width, chip_w, slide_w)
+            for y in _starts(height, chip_h, slide_h)]
+
+
+class _DetBuffer(object):
+    """Growable (n, 10) buffer of (poly, score, label) rows."""
+
+    def __init__(self, capacity=4096):
+        self.data = np.empty((capacity, 10), dtype=np.float32)
+        self.size = 0
+
+    def extend(self, rows):
+        n = rows.shape[0]
+        if self.size + n > self.data.shape[0]:
+            capacity = max(self.data.shape[0] * 2, self.size + n)
+            data = np.empty((capacity, 10), dtype=np.float32)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+        self.data[self.size:self.size + n] = rows
+        self.size += n
+
+    def view(self):
+        return self.data[:self.size]
+
+
+class LargeImageInferencer(object):
+    """Sliding window inference on large aerial scenes.
+
+    Chips are read and normalized by a prefetch thread while the model runs,
+    detections of every chip are shifted to scene coordinates and appended to
+    one buffer, and a single batched polygon NMS merges all classes at the
+    end.
+
+    Args:
+        model (nn.Module): detector from `init_detector`, its results are per
+            class arrays of (x1, y1, ..., x4, y4, score).
+        chip_size (tuple): (h, w) of the chips cut from the scene.
+        slide_size (tuple): (h, w) stride between chips.
+        batch_size (int): number of chips prepared, moved to the device and,
+            if the detector supports it, tested together.
+        prefetch (int): number of batches prepared ahead of the model.
+        nms_thr (float): iou threshold of the final merge, None to skip it.
+
+    Example:
+        >>> inferencer = LargeImageInferencer(model, (1024, 1024), (824, 824))
+        >>> detections = inferencer('P0006.png')
+        >>> print(inferencer.timings)
+    """
+
+    def __init__(self,
+                 model,
+                 chip_size=(1024, 1024),
+                 slide_size=(824, 824),
+                 batch_size=1,
+                 prefetch=2,
+                 nms_thr=0.1):
+        self.model = model
+        self.chip_size = chip_size
+        self.slide_size = slide_size
+        self.batch_size = batch_size
+        self.prefetch = prefetch
+        self.nms_thr = nms_thr
+        cfg = model.cfg
+        self.img_transform = ImageTransform(
+            size_divisor=cfg.data.test.size_divisor, **cfg.img_norm_cfg)
+        self.device = next(model.parameters()).device
+        self.timings = OrderedDict()
+
+    def _prepare_chip(self, chip):
+        cfg = self.model.cfg
+        img, img_shape, pad_shape, scale_factor = self.img_transform(
+            chip,
+            scale=cfg.data.test.img_scale,
+            keep_ratio=cfg.data.test.get('resize_keep_ratio', True))
+        img_meta = dict(
+            ori_shape=chip.shape,
+            img_shape=img_shape,
+            pad_shape=pad_shape,
+            scale_factor=scale_factor,
+            flip=False)
+        return img, img_meta
+
+    def _producer(self, reader, windows, out_queue, stop):
+        chip_h, chip_w = self.chip_size
+        try:
+            for start in range(0, len(windows), self.batch_size):
+                if stop.is_set():
+                    return
+                batch_windows = windows[start:start + self.batch_size]
+                t0 = time.time()
+                chips = [reader.read(x, y, chip_w, chip_h)
+                         for x, y in batch_windows]
+                t1 = time.time()
+                prepared = [self._prepare_chip(chip) for chip in chips]
+                imgs = torch.stack([to_tensor(img) for img, _ in prepared])
+                if self.device.type == 'cuda':
+                    imgs = imgs.pin_memory().to(self.device, non_blocking=True)
+                img_metas = [meta for _, meta in prepared]
+                t2 = time.time()
+                out_queue.put((batch_windows, imgs, img_metas, t1 - t0,
+                               t2 - t1))
+        except Exception as e:
+            out_queue.put(e)
+            return
+        out_queue.put(None)
+
+    def _forward(self, imgs, img_metas):
+        # detectors with supports_batch_test run the chips of a batch in one
+        # forward, the others one chip per forward
+        if imgs.size(0) > 1 and getattr(self.model, 'supports_batch_test',
+                                        False):
+            with torch.no_grad():
+                return self.model(
+                    return_loss=False,
+                    rescale=True,
+                    img=[imgs],
+                    img_meta=[img_metas])
+        results = []
+        with torch.no_grad():
+            for i in range(imgs.size(0)):
+                results.append(
+                    self.model(
+                        return_loss=False,
+                        rescale=True,
+                        img=[imgs[i:i + 1]],
+                        img_meta=[[img_metas[i]]]))
+        return results
+
+    def __call__(self, img, channel_order=None):
+        """Detect objects in a large image.
+
+        Args:
+            img (str or np.ndarray): image file or loaded (memmap) image.
+            channel_order (str, optional): see `LargeImageReader`.
+
+        Returns:
+            list[np.ndarray]: per class (n, 9) arrays of polys and scores in
+                scene coordinates. Stage timings in seconds are kept in
+                `self.timings`.
+        """
+        timings = OrderedDict(
+            (k, 0.) for k in ('read', 'prepare', 'wait', 'forward', 'merge',
+                              'nms', 'total'))
+        start = time.time()
+        reader = LargeImageReader(img, channel_order)
+        height, width = reader.shape[:2]
+        windows = sliding_windows(height, width, self.chip_size,
+                                  self.slide_size)
+
+        out_queue = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        producer = threading.Thread(
+            target=self._producer, args=(reader, windows, out_queue, stop))
+        producer.daemon = True
+        producer.start()
+
+        num_classes = None
+        buffer = _DetBuffer()
+        try:
+            while True:
+                t0 = time.time()
+                item = out_queue.get()
+                timings['wait'] += time.time() - t0
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                batch_windows, imgs, img_metas, t_read, t_prepare = item
+                timings['read'] += t_read
+                timings['prepare'] += t_prepare
+
+                t0 = time.time()
+                results = self._forward(imgs, img_metas)
+                timings['forward'] += time.time() - t0
+
+                t0 = time.time()
+                for (x, y), result in zip(batch_windows, results):
+                    num_classes = len(result)
+                    for cls_id, dets in enumerate(result):
+                        if dets.shape[0] == 0:
+                            continue
+                        rows = np.empty((dets.shape[0], 10), dtype=np.float32)
+                        rows[:, :9] = dets[:, :9]
+                        rows[:, 0:8:2] += x
+                        rows[:, 1:8:2] += y
+                        rows[:, 9] = cls_id
+                        buffer.extend(rows)
+                timings['merge'] += time.time() - t0
+        finally:
+            stop.set()
+            # unblock the producer if it is waiting on a full queue
+            while producer.is_alive():
+                try:
+                    out_queue.get_nowait()
+                except queue.Empty:
+                    producer.join(0.01)
+
+        t0 = time.time()
+        if num_classes is None:
+            num_classes = len(self.model.CLASSES)
+        dets = buffer.view()
+        if self.nms_thr is not None and dets.shape[0] > 0:
+            _, keep = batched_poly_nms(dets[:, :9].astype(np.float64),
+                                       dets[:, 9].astype(np.int64),
+                                       self.nms_thr)
+            dets = dets[keep]
+        labels = dets[:, 9].astype(np.int64)
+        detections = [dets[labels == i, :9] for i in range(num_classes)]
+        timings['nms'] = time.time() - t0
+        timings['total'] = time.time() - start
+        self.timings = timings
+        return detections
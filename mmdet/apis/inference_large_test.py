@@ -0,0 +1,61 @@
+import os.path as osp
+import shutil
+import tempfile
+import unittest
+
+import mmcv
+import numpy as np
+
+from mmdet.apis.inference_large import LargeImageReader
+
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+
+
+class TestLargeImageReader(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.tmp_dir = tempfile.mkdtemp()
+        # distinct channels, a swap of red and blue would show
+        self.bgr = rng.randint(0, 256, (300, 500, 3)).astype(np.uint8)
+        self.bgr[:, :, 0] //= 2
+        self.png = osp.join(self.tmp_dir, 'scene.png')
+        mmcv.imwrite(self.bgr, self.png)
+        self.rgb = np.ascontiguousarray(mmcv.imread(self.png)[:, :, ::-1])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def assert_same_chips(self, reader):
+        # the chips are those of mmcv.imread, zero padded at the border
+        img = mmcv.imread(self.png)
+        for x, y in [(0, 0), (130, 70), (450, 250)]:
+            expected = np.zeros((80, 100, 3), dtype=np.uint8)
+            crop = img[y:y + 80, x:x + 100]
+            expected[:crop.shape[0], :crop.shape[1]] = crop
+            np.testing.assert_array_equal(reader.read(x, y, 100, 80),
+                                          expected)
+
+    def test_npy(self):
+        filename = osp.join(self.tmp_dir, 'scene.npy')
+        np.save(filename, self.rgb)
+        self.assert_same_chips(LargeImageReader(filename))
+        np.save(filename, mmcv.imread(self.png))
+        self.assert_same_chips(LargeImageReader(filename, 'bgr'))
+
+    @unittest.skipIf(tifffile is None, 'tifffile is not installed')
+    def test_tif(self):
+        filename = osp.join(self.tmp_dir, 'scene.tif')
+        tifffile.imwrite(filename, self.rgb)
+        self.assert_same_chips(LargeImageReader(filename))
+
+    def test_array(self):
+        self.assert_same_chips(LargeImageReader(mmcv.imread(self.png)))
+        self.assert_same_chips(LargeImageReader(self.rgb, 'rgb'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,8 +4,10 @@ from .guided_anchor_target import ga_loc_target, ga_shape_target
 from .anchor_target_rbbox import anchor_target_rbbox
 
 from .anchor_generator_rbbox import AnchorGeneratorRbbox
+from .anchor_cache import AnchorCache
 
 __all__ = [
     'AnchorGenerator', 'anchor_target', 'anchor_inside_flags', 'ga_loc_target',
-    'ga_shape_target', 'anchor_target_rbbox', 'AnchorGeneratorRbbox'
+    'ga_shape_target', 'anchor_target_rbbox', 'AnchorGeneratorRbbox',
+    'AnchorCache'
 ]
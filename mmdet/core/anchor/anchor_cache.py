@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import torch
+
+from .anchor_target_rbbox import anchor_inside_flags
+
+
+class AnchorCache(object):
+    """Bounded LRU cache of the anchors of an anchor head.
+
+    The anchor grid of a level only depends on the feature map size, the
+    valid flags on the feature map size and the pad shape, and the inside
+    flags of an image on the feature map sizes, pad shape, image shape and
+    allowed border, so the heads look them up here instead of rebuilding
+    them for every image of every iteration. With fixed size patches all the
+    images hit the same entries.
+
+    The cached tensors are shared by the callers and must not be modified in
+    place.
+
+    Args:
+        anchor_generators (list): anchor generator of each level.
+        anchor_strides (list): anchor stride of each level.
+        max_size (int): max number of cached tensors, 0 disables the cache.
+    """
+
+    def __init__(self, anchor_generators, anchor_strides, max_size=64):
+        self.anchor_generators = anchor_generators
+        self.anchor_strides = anchor_strides
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        # DataParallel replicas share the cache from their threads
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _get(self, key, compute):
+        if self.max_size <= 0:
+            return compute()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        value = compute()
+        with self._lock:
+            self._cache[key] = value
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return value
+
+    def grid_anchors(self, level, featmap_size, device='cuda'):
+        """Anchors of a level, see `AnchorGenerator.grid_anchors`."""
+        featmap_size = tuple(int(s) for s in featmap_size)
+        generator = self.anchor_generators[level]
+        key = ('anchors', level, featmap_size, str(device),
+               generator.base_anchors.dtype)
+        return self._get(
+            key, lambda: generator.grid_anchors(
+                featmap_size, self.anchor_strides[level], device=device))
+
+    def valid_flags(self, level, featmap_size, pad_shape, device='cuda'):
+        """Valid flags of the anchors of a level in an image padded to
+        `pad_shape`, see `AnchorGenerator.valid_flags`."""
+        feat_h, feat_w = (int(s) for s in featmap_size)
+        stride = self.anchor_strides[level]
+        h, w = pad_shape[:2]
+        valid_h = min(int(np.ceil(h / stride)), feat_h)
+        valid_w = min(int(np.ceil(w / stride)), feat_w)
+        key = ('valid', level, (feat_h, feat_w), (valid_h, valid_w),
+               str(device))
+        return self._get(
+            key, lambda: self.anchor_generators[level].valid_flags(
+                (feat_h, feat_w), (valid_h, valid_w), device=device))
+
+    def inside_flags(self,
+                     featmap_sizes,
+                     pad_shape,
+                     img_shape,
+                     allowed_border,
+                     device='cuda'):
+        """Flags of the anchors of all the levels (concatenated) which are
+        valid and inside the image, see `anchor_inside_flags`."""
+        featmap_sizes = tuple(
+            tuple(int(s) for s in size) for size in featmap_sizes)
+        key = ('inside', featmap_sizes, tuple(pad_shape[:2]),
+               tuple(img_shape[:2]), allowed_border, str(device))
+
+        def compute():
+            anchors = torch.cat([
+                self.grid_anchors(i, size, device)
+                for i, size in enumerate(featmap_sizes)
+            ])
+            valid_flags = torch.cat([
+                self.valid_flags(i, size, pad_shape, device)
+                for i, size in enumerate(featmap_sizes)
+            ])
+            return anchor_inside_flags(anchors, valid_flags, img_shape,
+                                       allowed_border)
+
+        return self._get(key, compute)
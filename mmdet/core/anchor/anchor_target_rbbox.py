@@ -21,7 +21,8 @@ def anchor_target_rbbox(anchor_list,
                   sampling=True,
                   unmap_outputs=True,
                   with_module=True,
-                  hbb_trans='hbb2obb_v2'):
+                  hbb_trans='hbb2obb_v2',
+                  inside_flag_list=None):
     """Compute regression and classification targets for anchors.
 
     Args:
@@ -32,6 +33,9 @@ def anchor_target_rbbox(anchor_list,
         target_means (Iterable): Mean value of regression targets.
         target_stds (Iterable): Std value of regression targets.
         cfg (dict): RPN train configs.
+        inside_flag_list (list[Tensor], optional): Flags of the valid anchors
+            inside each image (all levels concatenated), e.g. from an
+            `AnchorCache`, computed from the valid flags if not given.
 
     Returns:
         tuple
@@ -41,17 +45,28 @@ def anchor_target_rbbox(anchor_list,
 
     # anchor number of multi levels
     num_level_anchors = [anchors.size(0) for anchors in anchor_list[0]]
-    # concat all level anchors and flags to a single tensor
+    # concat all level anchors and flags to a single tensor, the images
+    # sharing the same level tensors (see AnchorCache) share the concat
+    concats = {}
+
+    def _concat(tensors):
+        key = tuple(id(t) for t in tensors)
+        if key not in concats:
+            concats[key] = torch.cat(tensors)
+        return concats[key]
+
     for i in range(num_imgs):
         assert len(anchor_list[i]) == len(valid_flag_list[i])
-        anchor_list[i] = torch.cat(anchor_list[i])
-        valid_flag_list[i] = torch.cat(valid_flag_list[i])
+        anchor_list[i] = _concat(anchor_list[i])
+        valid_flag_list[i] = _concat(valid_flag_list[i])
 
     # compute targets for each image
     if gt_bboxes_ignore_list is None:
         gt_bboxes_ignore_list = [None for _ in range(num_imgs)]
     if gt_labels_list is None:
         gt_labels_list = [None for _ in range(num_imgs)]
+    if inside_flag_list is None:
+        inside_flag_list = [None for _ in range(num_imgs)]
     (all_labels, all_label_weights, all_bbox_targets, all_bbox_weights,
      pos_inds_list, neg_inds_list) = multi_apply(
          anchor_target_rbbox_single,
@@ -62,6 +77,7 @@ def anchor_target_rbbox(anchor_list,
          gt_bboxes_ignore_list,
          gt_labels_list,
          img_metas,
+         inside_flag_list,
          target_means=target_means,
          target_stds=target_stds,
          cfg=cfg,
@@ -107,6 +123,7 @@ def anchor_target_rbbox_single(flat_anchors,
                          gt_bboxes_ignore,
                          gt_labels,
                          img_meta,
+                         inside_flags,
                          target_means,
                          target_stds,
                          cfg,
@@ -119,9 +136,10 @@ def anchor_target_rbbox_single(flat_anchors,
     gt_obbs = gt_mask_bp_obbs(gt_masks, with_module)
     gt_obbs_ts = torch.from_numpy(gt_obbs).to(gt_bboxes.device)
 
-    inside_flags = anchor_inside_flags(flat_anchors, valid_flags,
-                                       img_meta['img_shape'][:2],
-                                       cfg.allowed_border)
+    if inside_flags is None:
+        inside_flags = anchor_inside_flags(flat_anchors, valid_flags,
+                                           img_meta['img_shape'][:2],
+                                           cfg.allowed_border)
     if not inside_flags.any():
         return (None, ) * 6
     # assign gt and sample anchors
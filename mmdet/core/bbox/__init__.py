@@ -11,10 +11,12 @@ from .transforms import (bbox2delta, delta2bbox, bbox_flip, bbox_mapping,
                          distance2bbox)
 from .bbox_target import bbox_target
 from .transforms_rbbox import (dbbox2delta, delta2dbbox, mask2poly,
-                               get_best_begin_point, polygonToRotRectangle_batch,
+                               get_best_begin_point, get_best_begin_point_torch,
+                               polygonToRotRectangle_batch,
                                dbbox2roi, dbbox_flip, dbbox_mapping,
                                dbbox2result, Tuplelist2Polylist, roi2droi,
                                gt_mask_bp_obbs, gt_mask_bp_obbs_list,
+                               gt_poly_bp_obbs, gt_poly_bp_obbs_list,
                                choose_best_match_batch,
                                choose_best_Rroi_batch, delta2dbbox_v2,
                                delta2dbbox_v3, dbbox2delta_v3, hbb2obb_v2, RotBox2Polys, RotBox2Polys_torch,
@@ -43,10 +45,12 @@ __all__ = [
     'bbox2delta', 'delta2bbox', 'bbox_flip', 'bbox_mapping',
     'bbox_mapping_back', 'bbox2roi', 'roi2bbox', 'bbox2result',
     'distance2bbox', 'bbox_target', 'bbox_overlaps_cython',
-    'dbbox2delta', 'delta2dbbox', 'mask2poly', 'get_best_begin_point', 'polygonToRotRectangle_batch',
+    'dbbox2delta', 'delta2dbbox', 'mask2poly', 'get_best_begin_point', 'get_best_begin_point_torch',
+    'polygonToRotRectangle_batch',
     'bbox_target_rbbox', 'dbbox2roi', 'dbbox_flip', 'dbbox_mapping',
     'dbbox2result', 'Tuplelist2Polylist', 'roi2droi', 'rbbox_base_sampler',
     'rbbox_random_sampler', 'gt_mask_bp_obbs', 'gt_mask_bp_obbs_list',
+    'gt_poly_bp_obbs', 'gt_poly_bp_obbs_list',
     'rbbox_target_rbbox', 'choose_best_match_batch', 'choose_best_Rroi_batch',
     'delta2dbbox_v2', 'delta2dbbox_v3', 'dbbox2delta_v3',
     'hbb2obb_v2', 'RotBox2Polys', 'RotBox2Polys_torch', 'poly2bbox', 'dbbox_rotate_mapping',
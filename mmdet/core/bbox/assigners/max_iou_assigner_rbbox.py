@@ -3,6 +3,7 @@ import torch
 from .base_assigner import BaseAssigner
 from .assign_result import AssignResult
 from ..geometry import bbox_overlaps, rbbox_overlaps_cy_warp
+from ..geometry_rbbox import rbbox_overlaps_pruned, rbbox_overlaps_torch
 
 class MaxIoUAssignerRbbox(BaseAssigner):
     """Assign a corresponding gt bbox or background to each bbox.
@@ -27,6 +28,13 @@ class MaxIoUAssignerRbbox(BaseAssigner):
             ignoring any bboxes.
         ignore_wrt_candidates (bool): Whether to compute the iof between
             `bboxes` and `gt_bboxes_ignore`, or the contrary.
+        iou_calculator (str): How the rotated overlaps are computed.
+            'cython' copies the boxes to host for `rbbox_overlaps_cy_warp`,
+            'torch' computes the same overlaps on the device of the bboxes
+            (see `rbbox_overlaps_torch`) and 'torch_pruned' also prunes the
+            pairs by size range (see `rbbox_overlaps_pruned`), which is much
+            faster for the anchors. All give the same assigned gts and
+            labels, up to float ties.
     """
 
     def __init__(self,
@@ -35,13 +43,29 @@ class MaxIoUAssignerRbbox(BaseAssigner):
                  min_pos_iou=.0,
                  gt_max_assign_all=True,
                  ignore_iof_thr=-1,
-                 ignore_wrt_candidates=True):
+                 ignore_wrt_candidates=True,
+                 iou_calculator='cython'):
+        assert iou_calculator in ['cython', 'torch', 'torch_pruned']
         self.pos_iou_thr = pos_iou_thr
         self.neg_iou_thr = neg_iou_thr
         self.min_pos_iou = min_pos_iou
         self.gt_max_assign_all = gt_max_assign_all
         self.ignore_iof_thr = ignore_iof_thr
         self.ignore_wrt_candidates = ignore_wrt_candidates
+        self.iou_calculator = iou_calculator
+
+    @property
+    def prune_iou_thr(self):
+        """Overlaps below this value do not change the assignment as long as
+        the max overlap of every gt is exact: they are negatives (or ignored)
+        whatever their exact value."""
+        if isinstance(self.neg_iou_thr, tuple):
+            thrs = [self.neg_iou_thr[1]]
+            if self.neg_iou_thr[0] > 0:
+                thrs.append(self.neg_iou_thr[0])
+        else:
+            thrs = [self.neg_iou_thr]
+        return max(min(thrs + [self.pos_iou_thr]), 0)
 
     def assign(self, bboxes, gt_rbboxes, gt_bboxes_ignore=None, gt_labels=None):
         """Assign gt to bboxes.
@@ -72,7 +96,13 @@ class MaxIoUAssignerRbbox(BaseAssigner):
         if bboxes.shape[0] == 0 or gt_rbboxes.shape[0] == 0:
             raise ValueError('No gt or bboxes')
         bboxes = bboxes[:, :5]
-        overlaps = rbbox_overlaps_cy_warp(gt_rbboxes, bboxes)
+        if self.iou_calculator == 'torch_pruned':
+            overlaps = rbbox_overlaps_pruned(
+                gt_rbboxes, bboxes, min_iou=self.prune_iou_thr)
+        elif self.iou_calculator == 'torch':
+            overlaps = rbbox_overlaps_torch(gt_rbboxes, bboxes)
+        else:
+            overlaps = rbbox_overlaps_cy_warp(gt_rbboxes, bboxes)
 
         if (self.ignore_iof_thr > 0) and (gt_bboxes_ignore is not None) and (
                 gt_bboxes_ignore.numel() > 0):
@@ -130,20 +160,26 @@ class MaxIoUAssignerRbbox(BaseAssigner):
         assigned_gt_inds[pos_inds] = argmax_overlaps[pos_inds] + 1
 
         # 4. assign fg: for each gt, proposals with highest IoU
-        for i in range(num_gts):
-            if gt_max_overlaps[i] >= self.min_pos_iou:
-                if self.gt_max_assign_all:
-                    max_iou_inds = overlaps[i, :] == gt_max_overlaps[i]
-                    assigned_gt_inds[max_iou_inds] = i + 1
-                else:
-                    assigned_gt_inds[gt_argmax_overlaps[i]] = i + 1
+        # (done for all the gts at once, a proposal matched by several gts
+        # goes to the last one like in a loop over the gts)
+        if self.gt_max_assign_all:
+            max_iou_mask = overlaps == gt_max_overlaps[:, None]
+        else:
+            max_iou_mask = torch.zeros_like(overlaps, dtype=torch.uint8)
+            max_iou_mask.scatter_(1, gt_argmax_overlaps[:, None], 1)
+            max_iou_mask = max_iou_mask > 0
+        max_iou_mask &= (gt_max_overlaps >= self.min_pos_iou)[:, None]
+        gt_inds = torch.arange(
+            1, num_gts + 1, dtype=torch.long, device=overlaps.device)
+        last_gt_inds = (max_iou_mask.long() * gt_inds[:, None]).max(dim=0)[0]
+        assigned_gt_inds = torch.where(last_gt_inds > 0, last_gt_inds,
+                                       assigned_gt_inds)
 
         if gt_labels is not None:
-            assigned_labels = assigned_gt_inds.new_zeros((num_bboxes, ))
-            pos_inds = torch.nonzero(assigned_gt_inds > 0).squeeze()
-            if pos_inds.numel() > 0:
-                assigned_labels[pos_inds] = gt_labels[
-                    assigned_gt_inds[pos_inds] - 1]
+            assigned_labels = torch.where(
+                assigned_gt_inds > 0,
+                gt_labels[(assigned_gt_inds - 1).clamp(min=0)],
+                assigned_gt_inds.new_zeros((num_bboxes, )))
         else:
             assigned_labels = None
 
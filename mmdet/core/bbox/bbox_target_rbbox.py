@@ -1,3 +1,4 @@
+import numpy as np
 import torch
 
 from .transforms_rbbox import dbbox2delta, delta2dbbox, \
@@ -17,9 +18,14 @@ def bbox_target_rbbox(pos_bboxes_list,
                 target_stds=[1.0, 1.0, 1.0, 1.0, 1.0],
                 concat=True,
                 with_module=True,
-                hbb_trans='hbb2obb_v2'):
+                hbb_trans='hbb2obb_v2',
+                gt_obbs_list=None):
     # import pdb
     # pdb.set_trace()
+    if gt_obbs_list is None:
+        gt_obbs_list = [None for _ in range(len(pos_bboxes_list))]
+    if gt_masks_list is None:
+        gt_masks_list = [None for _ in range(len(pos_bboxes_list))]
     labels, label_weights, bbox_targets, bbox_weights = multi_apply(
         bbox_target_rbbox_single,
         pos_bboxes_list,
@@ -27,6 +33,7 @@ def bbox_target_rbbox(pos_bboxes_list,
         pos_assigned_gt_inds_list,
         gt_masks_list,
         pos_gt_labels_list,
+        gt_obbs_list,
         cfg=cfg,
         reg_classes=reg_classes,
         target_means=target_means,
@@ -47,6 +54,7 @@ def bbox_target_rbbox_single(pos_bboxes,
                        pos_assigned_gt_inds,
                        gt_masks,
                        pos_gt_labels,
+                       gt_obbs,
                        cfg,
                        reg_classes=1,
                        target_means=[.0, .0, .0, .0, .0],
@@ -60,6 +68,8 @@ def bbox_target_rbbox_single(pos_bboxes,
     :param pos_assigned_gt_inds: Tensor, shape (n)
     :param gt_masks: numpy.ndarray, shape (n, 1024, 1024)
     :param pos_gt_labels:   Tensor, shape (n)
+    :param gt_obbs: numpy.ndarray, shape (n, 5) from gt_poly_bp_obbs or
+        gt_mask_bp_obbs (with module), used instead of gt_masks if not None
     :param cfg: dict, cfg.pos_weight = -1
     :param reg_classes: 16
     :param target_means:
@@ -75,19 +85,26 @@ def bbox_target_rbbox_single(pos_bboxes,
     label_weights = pos_bboxes.new_zeros(num_samples)
     bbox_targets = pos_bboxes.new_zeros(num_samples, 5)
     bbox_weights = pos_bboxes.new_zeros(num_samples, 5)
-    pos_gt_masks = gt_masks[pos_assigned_gt_inds.cpu().numpy()]
-    # TODO: optimizer it
-    pos_gt_polys = mask2poly(pos_gt_masks)
-    # if len(pos_gt_polys) == 0:
-    #     import pdb
-    #     pdb.set_trace()
-    # print('pos_gt_polys: ', pos_gt_polys)
-    pos_gt_bp_polys = get_best_begin_point(pos_gt_polys)
-    # print('pos_gt_bp_polys: ', pos_gt_bp_polys)
-    # TODO optimizer it
-    # import pdb
-    # pdb.set_trace()
-    pos_gt_obbs = torch.from_numpy(polygonToRotRectangle_batch(pos_gt_bp_polys, with_module)).to(pos_bboxes.device)
+    pos_assigned_gt_inds = pos_assigned_gt_inds.cpu().numpy()
+    if gt_obbs is not None:
+        pos_gt_obbs = gt_obbs[pos_assigned_gt_inds].copy()
+        if not with_module:
+            # back from [0, 2pi) to the (-pi, pi] of arctan2
+            pos_gt_obbs[:, 4] = np.where(pos_gt_obbs[:, 4] > np.pi,
+                                         pos_gt_obbs[:, 4] - 2 * np.pi,
+                                         pos_gt_obbs[:, 4])
+        pos_gt_obbs = torch.from_numpy(pos_gt_obbs).to(pos_bboxes.device)
+    elif num_pos > 0:
+        # many rois match the same gt, contour each assigned gt mask once
+        # and gather the obbs by assigned index
+        assigned_gt_inds, pos_to_assigned = np.unique(
+            pos_assigned_gt_inds, return_inverse=True)
+        assigned_gt_polys = mask2poly(gt_masks[assigned_gt_inds])
+        assigned_gt_bp_polys = get_best_begin_point(assigned_gt_polys)
+        assigned_gt_obbs = polygonToRotRectangle_batch(assigned_gt_bp_polys,
+                                                       with_module)
+        pos_gt_obbs = torch.from_numpy(
+            assigned_gt_obbs[pos_to_assigned]).to(pos_bboxes.device)
     # print('pos_gt_obbs: ', pos_gt_obbs)
     if pos_bboxes.size(1) == 4:
         # if hbb_trans == 'hbb2obb':
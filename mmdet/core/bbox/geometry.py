@@ -2,8 +2,8 @@ import torch
 from bbox import bbox_overlaps_cython
 # from bbox_v2 import bbox_overlaps_cython_v2
 import numpy as np
-import DOTA_devkit.polyiou as polyiou
-from mmdet.core.bbox.transforms_rbbox import RotBox2Polys, poly2bbox, mask2poly, Tuplelist2Polylist
+from DOTA_devkit.polyiou_batch import iou_poly_matrix
+from mmdet.core.bbox.transforms_rbbox import RotBox2Polys, mask2poly, Tuplelist2Polylist
 
 def bbox_overlaps_cy(boxes, query_boxes):
     box_device = boxes.device
@@ -329,26 +329,8 @@ def rbbox_overlaps_cy_warp(rbboxes, query_boxes):
     polys_np = RotBox2Polys(rbboxes).astype(np.float)
     query_polys_np = RotBox2Polys(query_boxes_np)
 
-    h_bboxes_np = poly2bbox(polys_np)
-    h_query_bboxes_np = poly2bbox(query_polys_np)
-
-    # hious
-    ious = bbox_overlaps_cython(h_bboxes_np, h_query_bboxes_np)
-    import pdb
-    # pdb.set_trace()
-    inds = np.where(ious > 0)
-    for index in range(len(inds[0])):
-        box_index = inds[0][index]
-        query_box_index = inds[1][index]
-
-        box = polys_np[box_index]
-        query_box = query_polys_np[query_box_index]
-
-        # calculate obb iou
-        # import pdb
-        # pdb.set_trace()
-        overlap = polyiou.iou_poly(polyiou.VectorDouble(box), polyiou.VectorDouble(query_box))
-        ious[box_index][query_box_index] = overlap
+    # the hbb test and the obb iou are done together in one compiled call
+    ious = iou_poly_matrix(polys_np, query_polys_np)
 
     return torch.from_numpy(ious).to(box_device)
 
@@ -363,26 +345,7 @@ def rbbox_overlaps_cy(boxes_np, query_boxes_np):
     polys_np = RotBox2Polys(boxes_np).astype(np.float)
     query_polys_np = RotBox2Polys(query_boxes_np).astype(np.float)
 
-    h_bboxes_np = poly2bbox(polys_np).astype(np.float)
-    h_query_bboxes_np = poly2bbox(query_polys_np).astype(np.float)
-
-    # hious
-    ious = bbox_overlaps_cython(h_bboxes_np, h_query_bboxes_np)
-    import pdb
-    # pdb.set_trace()
-    inds = np.where(ious > 0)
-    for index in range(len(inds[0])):
-        box_index = inds[0][index]
-        query_box_index = inds[1][index]
-
-        box = polys_np[box_index]
-        query_box = query_polys_np[query_box_index]
-
-        # calculate obb iou
-        # import pdb
-        # pdb.set_trace()
-        overlap = polyiou.iou_poly(polyiou.VectorDouble(box), polyiou.VectorDouble(query_box))
-        ious[box_index][query_box_index] = overlap
+    # the hbb test and the obb iou are done together in one compiled call
+    ious = iou_poly_matrix(polys_np, query_polys_np)
 
     return ious
-
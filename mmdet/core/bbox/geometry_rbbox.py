@@ -0,0 +1,214 @@
+import torch
+
+from .transforms_rbbox import RotBox2Polys_torch
+
+
+def _cross(a, b):
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+
+def _polygon_areas(polys, counts=None):
+    """Signed areas of polygons (P, M, 2), only the first `counts` vertices
+    of each polygon are used if given."""
+    num_vertices = polys.size(1)
+    inds = torch.arange(num_vertices, device=polys.device)
+    if counts is None:
+        next_polys = polys[:, (inds + 1) % num_vertices]
+        return 0.5 * _cross(polys, next_polys).sum(dim=1)
+    next_inds = (inds[None, :] + 1) % counts.clamp(min=1)[:, None]
+    next_polys = polys.gather(1, next_inds[..., None].expand(-1, -1, 2))
+    terms = _cross(polys, next_polys)
+    terms = terms * (inds[None, :] < counts[:, None]).to(terms.dtype)
+    return 0.5 * terms.sum(dim=1)
+
+
+def _clip_polygons(polys, counts, clip_polys):
+    """Sutherland-Hodgman clipping of convex polygons by convex quadrangles.
+
+    Args:
+        polys (Tensor): subject polygons, shape (P, M, 2), the first `counts`
+            vertices of each polygon are valid.
+        counts (Tensor): number of vertices of the polygons, shape (P, ).
+        clip_polys (Tensor): counterclockwise clip quadrangles, shape
+            (P, 4, 2).
+
+    Returns:
+        tuple: clipped polygons (P, 8, 2) and their number of vertices.
+    """
+    num_points = polys.size(0)
+    for k in range(4):
+        a = clip_polys[:, k, None]
+        edge = clip_polys[:, (k + 1) % 4, None] - a
+        num_vertices = polys.size(1)
+        inds = torch.arange(num_vertices, device=polys.device)
+        next_inds = (inds[None, :] + 1) % counts.clamp(min=1)[:, None]
+        next_polys = polys.gather(1, next_inds[..., None].expand(-1, -1, 2))
+        valid = inds[None, :] < counts[:, None]
+
+        side = _cross(edge, polys - a)
+        next_side = _cross(edge, next_polys - a)
+        inside = side >= 0
+        next_inside = next_side >= 0
+        crossing = valid & (inside != next_inside)
+        denom = side - next_side
+        denom = torch.where(crossing, denom, torch.ones_like(denom))
+        t = (side / denom)[..., None]
+        inter_points = polys + t * (next_polys - polys)
+
+        # every edge emits its start point if it is inside and the
+        # intersection point if it crosses the clip line
+        out_points = torch.stack([polys, inter_points], dim=2).view(
+            num_points, 2 * num_vertices, 2)
+        keep = torch.stack([valid & inside, crossing], dim=2).view(
+            num_points, 2 * num_vertices)
+
+        # compact the kept points to the front, a convex polygon clipped by a
+        # half plane gains at most one vertex
+        max_vertices = min(num_vertices + 1, 8)
+        pos = keep.long().cumsum(dim=1) - 1
+        pos = torch.where(keep & (pos < max_vertices), pos,
+                          torch.full_like(pos, max_vertices))
+        clipped = polys.new_zeros(num_points, max_vertices + 1, 2)
+        clipped.scatter_(1, pos[..., None].expand(-1, -1, 2), out_points)
+        polys = clipped[:, :max_vertices]
+        counts = keep.long().sum(dim=1).clamp(max=max_vertices)
+    return polys, counts
+
+
+def rbbox_overlaps_aligned(rbboxes1, rbboxes2):
+    """IoUs of the aligned pairs of rotated boxes.
+
+    The boxes are turned into quadrangles with `RotBox2Polys_torch` and their
+    intersections are found by clipping one quadrangle by the other, all the
+    pairs are clipped together on the device of the boxes. The result is the
+    same as `iou_poly_matrix` of the polygons.
+
+    Args:
+        rbboxes1 (Tensor): shape (n, 5), (x_ctr, y_ctr, w, h, angle).
+        rbboxes2 (Tensor): shape (n, 5).
+
+    Returns:
+        Tensor: ious, shape (n, ), float64.
+    """
+    assert rbboxes1.size(0) == rbboxes2.size(0)
+    if rbboxes1.size(0) == 0:
+        return rbboxes1.new_zeros((0, ), dtype=torch.float64)
+    polys1 = RotBox2Polys_torch(rbboxes1[:, :5].double()).view(-1, 4, 2)
+    polys2 = RotBox2Polys_torch(rbboxes2[:, :5].double()).view(-1, 4, 2)
+    signed_areas2 = _polygon_areas(polys2)
+    clip_polys = torch.where((signed_areas2 < 0)[:, None, None],
+                             polys2.flip(1), polys2)
+    areas1 = _polygon_areas(polys1).abs()
+    areas2 = signed_areas2.abs()
+
+    counts = polys1.new_full((polys1.size(0), ), 4, dtype=torch.long)
+    inter_polys, inter_counts = _clip_polygons(polys1, counts, clip_polys)
+    inter = _polygon_areas(inter_polys, inter_counts).abs()
+    inter = torch.min(inter, torch.min(areas1, areas2))
+    union = areas1 + areas2 - inter
+    # degenerate pairs follow iou_poly: (inter + 1) / (union + 1)
+    degenerate = union == 0
+    ious = torch.where(degenerate, (inter + 1) / (union + 1),
+                       inter / torch.where(degenerate, union + 1, union))
+    # and the pairs whose hbbs do not intersect are 0, see iou_poly_batch
+    hbb_inter = torch.min(polys1.max(dim=1)[0], polys2.max(dim=1)[0]) - \
+        torch.max(polys1.min(dim=1)[0], polys2.min(dim=1)[0])
+    return ious * (hbb_inter >= 0).all(dim=1).to(ious.dtype)
+
+
+def _pair_ious(rbboxes, query_boxes, inds, query_inds, chunk_size):
+    ious = [
+        rbbox_overlaps_aligned(rbboxes[inds[i:i + chunk_size]],
+                               query_boxes[query_inds[i:i + chunk_size]])
+        for i in range(0, inds.numel(), chunk_size)
+    ]
+    if not ious:
+        return rbboxes.new_zeros((0, ), dtype=torch.float64)
+    return torch.cat(ious)
+
+
+def rbbox_overlaps_torch(rbboxes, query_boxes):
+    """Torch version of `rbbox_overlaps_cy_warp`.
+
+    The overlaps are computed on the device of `query_boxes` without copying
+    them to host. Only the pairs whose circumscribed circles intersect are
+    clipped, the others do not overlap.
+
+    Args:
+        rbboxes (Tensor or ndarray): shape (k, 5), (x_ctr, y_ctr, w, h,
+            angle).
+        query_boxes (Tensor): shape (n, 5).
+
+    Returns:
+        Tensor: overlaps, shape (k, n), float64.
+    """
+    return rbbox_overlaps_pruned(rbboxes, query_boxes, min_iou=0.)
+
+
+def rbbox_overlaps_pruned(rbboxes, query_boxes, min_iou=0.,
+                          chunk_size=65536):
+    """Overlaps of rotated boxes, only computed for the candidate pairs.
+
+    The overlaps are the ones of `rbbox_overlaps_cy_warp`, but nothing leaves
+    the device of `query_boxes`. Two rules prune the pairs before the
+    polygon clipping of `rbbox_overlaps_aligned`:
+
+    - center distance: boxes whose circumscribed circles do not intersect
+      do not overlap, their iou is 0.
+    - size range: the iou of two boxes is at most the ratio of their areas,
+      pairs whose ratio is below `min_iou` are set to 0. The pairs of the
+      rows whose max overlap is below `min_iou` are computed anyway, so the
+      max overlap of every row is exact.
+
+    So all the overlaps not smaller than `min_iou` and the max of every row
+    are exact, the other overlaps are lower bounds.
+
+    Args:
+        rbboxes (Tensor or ndarray): shape (k, 5), e.g. the gts.
+        query_boxes (Tensor): shape (n, 5), e.g. the anchors.
+        min_iou (float): overlaps below this value are not needed exactly,
+            0 disables the size range rule.
+        chunk_size (int): max number of pairs clipped at once.
+
+    Returns:
+        Tensor: overlaps, shape (k, n), float64.
+    """
+    query_boxes = query_boxes[:, :5]
+    rbboxes = torch.as_tensor(rbboxes, device=query_boxes.device)[:, :5]
+    overlaps = query_boxes.new_zeros((rbboxes.size(0), query_boxes.size(0)),
+                                     dtype=torch.float64)
+    if overlaps.numel() == 0:
+        return overlaps
+
+    # the pruning is done in the dtype of query_boxes with some slack, the
+    # ious of the kept pairs are computed in float64
+    # the polygons are (w - 1) x (h - 1), see RotBox2Polys
+    pruned_rbboxes = rbboxes.to(query_boxes.dtype)
+    sizes = (pruned_rbboxes[:, 2:4] - 1).abs()
+    query_sizes = (query_boxes[:, 2:4] - 1).abs()
+    radii = 0.5 * sizes.norm(dim=1) * (1 + 1e-4) + 1e-2
+    query_radii = 0.5 * query_sizes.norm(dim=1) * (1 + 1e-4) + 1e-2
+    dx = pruned_rbboxes[:, None, 0] - query_boxes[None, :, 0]
+    dy = pruned_rbboxes[:, None, 1] - query_boxes[None, :, 1]
+    candidates = dx * dx + dy * dy <= (radii[:, None] +
+                                       query_radii[None, :])**2
+
+    if min_iou > 0:
+        areas = sizes[:, 0] * sizes[:, 1]
+        query_areas = query_sizes[:, 0] * query_sizes[:, 1]
+        max_areas = torch.max(areas[:, None], query_areas[None, :])
+        min_areas = torch.min(areas[:, None], query_areas[None, :])
+        in_range = min_areas >= (min_iou * (1 - 1e-4)) * max_areas
+        inds, query_inds = (candidates & in_range).nonzero().t()
+        overlaps[inds, query_inds] = _pair_ious(rbboxes, query_boxes, inds,
+                                                query_inds, chunk_size)
+        # rows without an overlap of min_iou may have their max among the
+        # pruned pairs
+        low_rows = overlaps.max(dim=1)[0] < min_iou
+        inds, query_inds = (candidates & ~in_range
+                            & low_rows[:, None]).nonzero().t()
+    else:
+        inds, query_inds = candidates.nonzero().t()
+    overlaps[inds, query_inds] = _pair_ious(rbboxes, query_boxes, inds,
+                                            query_inds, chunk_size)
+    return overlaps
@@ -0,0 +1,114 @@
+import unittest
+import numpy as np
+import torch
+import DOTA_devkit.polyiou as polyiou
+from mmdet.core.bbox.geometry_rbbox import (rbbox_overlaps_aligned,
+                                            rbbox_overlaps_pruned,
+                                            rbbox_overlaps_torch)
+from mmdet.core.bbox.geometry import rbbox_overlaps_cy_warp
+from mmdet.core.bbox.transforms_rbbox import RotBox2Polys
+from mmdet.core.bbox.assigners import MaxIoUAssignerRbbox
+
+
+def rbbox_overlaps_ref(rbboxes, query_boxes):
+    """
+        per pair polyiou.iou_poly of the polygons whose hbbs intersect, the cpu reference
+    :param rbboxes: (k, 5) ndarray
+    :param query_boxes: (n, 5) ndarray
+    :return: (k, n) ndarray
+    """
+    polys = RotBox2Polys(rbboxes)
+    query_polys = RotBox2Polys(query_boxes)
+    overlaps = np.zeros((len(polys), len(query_polys)))
+    for i, p in enumerate(polys):
+        for j, q in enumerate(query_polys):
+            if min(p[0::2].max(), q[0::2].max()) < max(p[0::2].min(), q[0::2].min()) or \
+                    min(p[1::2].max(), q[1::2].max()) < max(p[1::2].min(), q[1::2].min()):
+                continue
+            overlaps[i, j] = polyiou.iou_poly(polyiou.VectorDouble(p), polyiou.VectorDouble(q))
+    return overlaps
+
+
+def random_rbboxes(num, rng, min_size=2, max_size=120, span=300):
+    rbboxes = np.zeros((num, 5))
+    rbboxes[:, :2] = rng.rand(num, 2) * span
+    rbboxes[:, 2:4] = min_size + rng.rand(num, 2) * (max_size - min_size)
+    rbboxes[:, 4] = (rng.rand(num) - 0.5) * 2 * np.pi
+    return rbboxes
+
+
+class Test_geometry_rbbox(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.gts = random_rbboxes(30, rng)
+        self.boxes = random_rbboxes(500, rng)
+        # duplicates, axis aligned and degenerate boxes
+        self.boxes[:30] = self.gts
+        self.boxes[30:60, 4] = 0
+        self.boxes[60:65, 2] = 1
+        self.gts[:5, 4] = 0
+        self.gts[5, 3] = 1
+
+    def test_rbbox_overlaps_aligned(self):
+        rbboxes1 = torch.DoubleTensor([[10, 10, 11, 11, 0],
+                                       [10, 10, 11, 11, 0],
+                                       [10, 10, 11, 11, 0],
+                                       [10, 10, 21, 11, 0],
+                                       [10, 10, 11, 11, 0]])
+        rbboxes2 = torch.DoubleTensor([[10, 10, 11, 11, np.pi / 2],
+                                       [15, 10, 11, 11, 0],
+                                       [40, 10, 11, 11, 0],
+                                       [10, 10, 11, 21, np.pi / 2],
+                                       [10, 10, 11, 11, np.pi / 4]])
+        # the polygons are (w - 1) x (h - 1): 10 x 10 squares and 20 x 10 boxes
+        diag_inter = 100 - 4 * (5 * np.sqrt(2) - 5) ** 2
+        expected = np.array([1., 50. / 150, 0., 1., diag_inter / (200 - diag_inter)])
+        ious = rbbox_overlaps_aligned(rbboxes1, rbboxes2)
+        self.assertEqual(ious.dtype, torch.float64)
+        np.testing.assert_almost_equal(ious.numpy(), expected)
+        np.testing.assert_almost_equal(
+            rbbox_overlaps_aligned(rbboxes2, rbboxes1).numpy(), expected)
+
+    def test_rbbox_overlaps_torch(self):
+        expected = rbbox_overlaps_ref(self.gts, self.boxes)
+        for dtype in [torch.float64, torch.float32]:
+            boxes = torch.from_numpy(self.boxes).to(dtype)
+            overlaps = rbbox_overlaps_torch(self.gts, boxes)
+            self.assertEqual(tuple(overlaps.shape), expected.shape)
+            self.assertEqual(overlaps.device, boxes.device)
+            expected_dtype = rbbox_overlaps_ref(self.gts, boxes.double().numpy())
+            np.testing.assert_almost_equal(overlaps.numpy(), expected_dtype, decimal=6)
+        np.testing.assert_almost_equal(
+            rbbox_overlaps_torch(torch.from_numpy(self.gts), torch.from_numpy(self.boxes)).numpy(),
+            expected, decimal=6)
+        self.assertEqual(tuple(rbbox_overlaps_torch(self.gts[:0], torch.from_numpy(self.boxes)).shape),
+                         (0, len(self.boxes)))
+
+    def test_rbbox_overlaps_pruned(self):
+        expected = rbbox_overlaps_ref(self.gts, self.boxes)
+        overlaps = rbbox_overlaps_pruned(self.gts, torch.from_numpy(self.boxes), min_iou=0.4).numpy()
+        # the overlaps above min_iou and the max of every row are exact, the others are lower bounds
+        exact = expected >= 0.4
+        np.testing.assert_almost_equal(overlaps[exact], expected[exact])
+        np.testing.assert_almost_equal(overlaps.max(axis=1), expected.max(axis=1))
+        self.assertTrue((overlaps <= expected + 1e-6).all())
+
+    def test_iou_calculator(self):
+        labels = torch.from_numpy(np.random.RandomState(1).randint(1, 16, len(self.gts)))
+        boxes = torch.from_numpy(self.boxes).float()
+        results = []
+        for iou_calculator in ['cython', 'torch', 'torch_pruned']:
+            assigner = MaxIoUAssignerRbbox(pos_iou_thr=0.5, neg_iou_thr=0.4, min_pos_iou=0.,
+                                           iou_calculator=iou_calculator)
+            results.append(assigner.assign(boxes, self.gts, None, labels))
+        for result in results[1:]:
+            np.testing.assert_array_equal(result.gt_inds.numpy(), results[0].gt_inds.numpy())
+            np.testing.assert_array_equal(result.labels.numpy(), results[0].labels.numpy())
+        np.testing.assert_almost_equal(results[1].max_overlaps.numpy(), results[0].max_overlaps.numpy())
+        np.testing.assert_almost_equal(rbbox_overlaps_torch(self.gts, boxes).numpy(),
+                                       rbbox_overlaps_cy_warp(self.gts, boxes).numpy())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -593,9 +593,32 @@ def gt_mask_bp_obbs_list(gt_masks_list):
 
     return list(gt_obbs_list)
 
+def gt_poly_bp_obbs(gt_polys, with_module=True):
+    """
+    same as gt_mask_bp_obbs, but from polygons instead of binary masks
+    :param gt_polys: numpy.ndarray, shape (n, 8)
+    :return: gt_obbs, shape (n, 5)
+    """
+    gt_polys = np.asarray(gt_polys, dtype=np.float32).reshape(-1, 4, 2)
+    # min area rectangle of the polygon, as mask2poly does for the mask
+    gt_rect_polys = [cv2.boxPoints(cv2.minAreaRect(poly)) for poly in gt_polys]
+    gt_bp_polys = get_best_begin_point(gt_rect_polys)
+    gt_obbs = polygonToRotRectangle_batch(gt_bp_polys, with_module)
+
+    return gt_obbs
+
+def gt_poly_bp_obbs_list(gt_polys_list):
+
+    gt_obbs_list = map(gt_poly_bp_obbs, gt_polys_list)
+
+    return list(gt_obbs_list)
+
 def cal_line_length(point1, point2):
     return math.sqrt( math.pow(point1[0] - point2[0], 2) + math.pow(point1[1] - point2[1], 2))
 
+# the 4 cyclic orders of the points, the i-th one starts from the i-th point
+_BEGIN_POINT_ORDERS = (np.arange(4)[:, np.newaxis] + np.arange(4)) % 4
+
 def get_best_begin_point_single(coordinate):
     x1 = coordinate[0][0]
     y1 = coordinate[0][1]
@@ -632,12 +655,48 @@ def get_best_begin_point_warp_single(coordinate):
     return TuplePoly2Poly(get_best_begin_point_single(coordinate))
 
 def get_best_begin_point(coordinate_list):
-    best_coordinate_list = map(get_best_begin_point_warp_single, coordinate_list)
-    # import pdb
-    # pdb.set_trace()
-    best_coordinate_list = np.stack(list(best_coordinate_list))
-
-    return best_coordinate_list
+    """
+    vectorized version of get_best_begin_point_single over all polygons
+    :param coordinate_list: list of (4, 2) points, or array of shape (n, 4, 2) or (n, 8)
+    :return: polygons starting from the point which best fits the hbb corners, shape (n, 8)
+    """
+    coordinates = np.asarray(coordinate_list).reshape(-1, 4, 2)
+    xymin = coordinates.min(axis=1)
+    xymax = coordinates.max(axis=1)
+    # (xmin, ymin), (xmax, ymin), (xmax, ymax), (xmin, ymax)
+    dst_coordinate = np.stack([xymin, np.stack([xymax[:, 0], xymin[:, 1]], axis=1),
+                               xymax, np.stack([xymin[:, 0], xymax[:, 1]], axis=1)], axis=1)
+    # combinate[:, i] starts from the i-th point
+    combinate = coordinates[:, _BEGIN_POINT_ORDERS]
+    # subtract in the input precision and accumulate in double, as the single version
+    diff = (combinate - dst_coordinate[:, np.newaxis]).astype(np.float64)
+    line_length = np.sqrt(np.power(diff[..., 0], 2) + np.power(diff[..., 1], 2))
+    force = line_length[..., 0] + line_length[..., 1] + line_length[..., 2] + line_length[..., 3]
+    force_flag = force.argmin(axis=1)
+    best_coordinate_list = combinate[np.arange(combinate.shape[0]), force_flag]
+
+    return best_coordinate_list.reshape(-1, 8)
+
+def get_best_begin_point_torch(polys):
+    """
+    torch version of get_best_begin_point
+    :param polys: Tensor, shape (n, 8)
+    :return: Tensor, shape (n, 8)
+    """
+    coordinates = polys.view(-1, 4, 2)
+    xymin = coordinates.min(dim=1)[0]
+    xymax = coordinates.max(dim=1)[0]
+    dst_coordinate = torch.stack([xymin, torch.stack([xymax[:, 0], xymin[:, 1]], dim=1),
+                                  xymax, torch.stack([xymin[:, 0], xymax[:, 1]], dim=1)], dim=1)
+    orders = torch.from_numpy(_BEGIN_POINT_ORDERS).to(polys.device)
+    combinate = coordinates[:, orders]
+    diff = (combinate - dst_coordinate[:, None]).double()
+    line_length = torch.sqrt(diff[..., 0] ** 2 + diff[..., 1] ** 2)
+    force = line_length[..., 0] + line_length[..., 1] + line_length[..., 2] + line_length[..., 3]
+    force_flag = force.argmin(dim=1)
+    best_polys = combinate[torch.arange(combinate.size(0), device=polys.device), force_flag]
+
+    return best_polys.view(-1, 8)
 
 # def polygonToRotRectangle(polys):
 #     """
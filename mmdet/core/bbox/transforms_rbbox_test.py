@@ -225,6 +225,17 @@ class Test_transforms_rbbox(unittest.TestCase):
 
         np.testing.assert_almost_equal(outs1, outs2, decimal=6)
 
+    def test_get_best_begin_point(self):
+        polys = np.array([[0, 0, 3, 0, 3, 3, 0, 3],
+                          [3, 3, 0, 3, 0, 0, 3, 0],
+                          [5, 0, 10, 5, 5, 10, 0, 5],
+                          [1.5, 7.2, 0.3, 2.4, 6.6, 0.1, 8.9, 4.4]], dtype=np.float32)
+        expected = np.stack([get_best_begin_point_warp_single(poly.reshape(4, 2)) for poly in polys])
+        outputs = get_best_begin_point(polys)
+        np.testing.assert_equal(outputs, expected)
+        outputs_torch = get_best_begin_point_torch(torch.from_numpy(polys)).numpy()
+        np.testing.assert_equal(outputs_torch, expected)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -3,10 +3,14 @@ from .class_names import (voc_classes, imagenet_det_classes,
                           get_classes)
 from .coco_utils import coco_eval, fast_eval_recall, results2json
 from .dota_utils import OBBDet2Comp4, HBBSeg2Comp4, HBBDet2Comp4, \
-    OBBDetComp4, HBBOBB2Comp4
+    OBBDetComp4, HBBOBB2Comp4, patch_offsets, results2scene_dets, \
+    merge_and_eval_task1
 from .eval_hooks import (DistEvalHook, DistEvalmAPHook, CocoDistEvalRecallHook,
                          CocoDistEvalmAPHook)
 from .mean_ap import average_precision, eval_map, print_map_summary
+from .result_table import (ResultTable, ResultTableWriter,
+                           ShardedResultTable, dump_results, is_det_result,
+                           load_results, merge_result_tables)
 from .recall import (eval_recalls, print_recall_summary, plot_num_recall,
                      plot_iou_recall)
 
@@ -17,5 +21,8 @@ __all__ = [
     'CocoDistEvalRecallHook', 'CocoDistEvalmAPHook', 'average_precision',
     'eval_map', 'print_map_summary', 'eval_recalls', 'print_recall_summary',
     'plot_num_recall', 'plot_iou_recall', 'OBBDet2Comp4', 'HBBSeg2Comp4',
-    'HBBDet2Comp4', 'OBBDetComp4', 'HBBOBB2Comp4'
+    'HBBDet2Comp4', 'OBBDetComp4', 'HBBOBB2Comp4', 'patch_offsets',
+    'results2scene_dets', 'merge_and_eval_task1', 'ResultTable',
+    'ResultTableWriter', 'ShardedResultTable', 'dump_results',
+    'is_det_result', 'load_results', 'merge_result_tables'
 ]
@@ -8,6 +8,12 @@ import cv2
 # get dataset
 
 import os
+import re
+from DOTA_devkit.ResultMerge_multi_process import (get_poly_nms, mergearrays,
+                                                   writearrays)
+from DOTA_devkit.poly_voc_eval import voc_eval_arrays
+from ..bbox.transforms_rbbox import RotBox2Polys
+from .result_table import ResultTable, ShardedResultTable
 # from xx import *
 def TuplePoly2Poly(poly):
     outpoly = [poly[0][0], poly[0][1],
@@ -304,13 +310,156 @@ def HBBOBB2Comp4(dataset, results):
     return hbb_results_dict, obb_results_dict
 
 
+def _img_infos(dataset):
+    """(dataset, img_info) of every image, concat datasets are flattened."""
+    datasets = dataset.datasets if hasattr(dataset, 'datasets') else [dataset]
+    for d in datasets:
+        for img_info in d.img_infos:
+            yield d, img_info
 
 
+def patch_offsets(dataset):
+    """Original image and offset of every patch of a split test dataset.
 
+    `DOTAPatchDataset` gives them in the img infos, for a dataset of split
+    images they are parsed once per image from the "P0000__1__0___824" file
+    names of the splitter. Images which are not patches get a zero offset.
+
+    Returns:
+        tuple: original image names (n, ), (left, up) offsets (n, 2) and
+            rates (n, ) of the patches.
+    """
+    pattern = re.compile(r'^(.*?)__([\d.]+)__(\d+)___(\d+)$')
+    names = []
+    offsets = []
+    for d, img_info in _img_infos(dataset):
+        if 'src' in img_info:
+            src_name = d.src_infos[img_info['src']]['filename']
+            names.append(os.path.splitext(src_name)[0])
+            offsets.append(
+                (img_info['left'], img_info['up'], img_info['rate']))
+            continue
+        name = os.path.splitext(os.path.basename(img_info['filename']))[0]
+        match = pattern.match(name)
+        if match is None:
+            names.append(name)
+            offsets.append((0, 0, 1))
+        else:
+            names.append(match.group(1))
+            offsets.append((int(match.group(3)), int(match.group(4)),
+                            float(match.group(2))))
+    offsets = np.array(offsets, dtype=np.float64).reshape(-1, 3)
+    return np.array(names, dtype=str), offsets[:, :2], offsets[:, 2]
+
+
+def _table_columns(results):
+    """(img_inds, labels, dets) of all the detections of a result table."""
+    if isinstance(results, ResultTable):
+        img_inds = np.asarray(results.img_inds)
+        labels = np.asarray(results.labels)
+        dets = np.hstack([results.bboxes, results.scores[:, None]])
+        return img_inds, labels, dets
+    rows = [results.rows(i) for i in range(len(results))]
+    img_inds = np.repeat(np.arange(len(rows)), [len(r[0]) for r in rows])
+    labels = np.concatenate([r[0] for r in rows])
+    dets = np.hstack([
+        np.concatenate([r[1] for r in rows]).reshape(-1, results.bbox_dim),
+        np.concatenate([r[2] for r in rows])[:, None]
+    ])
+    return img_inds, labels, dets
 
 
+def results2scene_dets(dataset, results):
+    """Move the Task1 results of the patches to the original images.
 
+    Args:
+        dataset: the test dataset, see `patch_offsets`.
+        results (list | ResultTable | ShardedResultTable): per image list of
+            per class arrays, (n, 9) polys or (n, 6) rboxes, with the scores
+            in the last column. The columns of a result table are used
+            directly instead of being split by image.
+
+    Returns:
+        dict: class name: (original image names (n, ), dets (n, 9)
+            x1, y1, ..., x4, y4, score in the original images).
+    """
+    names, offsets, rates = patch_offsets(dataset)
+    assert len(results) == len(names)
+    if isinstance(results, (ResultTable, ShardedResultTable)):
+        all_img_inds, all_labels, all_dets = _table_columns(results)
+    class_dets = {}
+    for label, cls_name in enumerate(dataset.CLASSES):
+        if isinstance(results, (ResultTable, ShardedResultTable)):
+            mask = all_labels == label
+            img_inds = all_img_inds[mask]
+            dets = all_dets[mask].astype(np.float64)
+        else:
+            dets = [result[label] for result in results]
+            img_inds = np.repeat(
+                np.arange(len(dets)), [len(d) for d in dets])
+            dets = np.concatenate(dets).astype(np.float64)
+        if dets.shape[1] == 6:
+            dets = np.hstack([RotBox2Polys(dets[:, :5]), dets[:, 5:]])
+        polys = dets[:, :8].reshape(-1, 4, 2) + offsets[img_inds, None]
+        dets[:, :8] = (polys / rates[img_inds, None, None]).reshape(-1, 8)
+        class_dets[cls_name] = (names[img_inds], dets)
+    return class_dets
 
 
+def merge_and_eval_task1(dataset,
+                         results,
+                         annopath=None,
+                         imagesetfile=None,
+                         nms_type='py_cpu_nms_poly_fast',
+                         nms_thr=0.1,
+                         out_dir=None,
+                         use_07_metric=True,
+                         with_difficult=True,
+                         num_process=16):
+    """Merge the Task1 results of the patches and evaluate them in memory.
 
+    The same steps as `OBBDetComp4`, `mergebypoly_multiprocess` and
+    `voc_eval` without writing and parsing the text files in between.
 
+    Args:
+        dataset: the test dataset, see `patch_offsets`.
+        results (list): outputs of the detector, see `results2scene_dets`.
+        annopath (str, optional): annopath.format(imagename) is the labelTxt
+            file of an original image, no evaluation if None.
+        imagesetfile (str, optional): text file of the original image names.
+        nms_type (str): see `get_poly_nms`.
+        nms_thr (float): iou threshold of the merge.
+        out_dir (str, optional): if given, the merged results are also
+            written to out_dir/Task1_{cls}.txt.
+        use_07_metric (bool): VOC07 11 point AP or the area under the PR
+            curve.
+        with_difficult (bool): whether to use the difficult flags of the
+            ground truths.
+        num_process (int): size of the process pools of the merge and the
+            evaluation.
+
+    Returns:
+        tuple: the merged dets, see `mergearrays`, and a dict of the AP of
+            each class (None if not evaluated).
+    """
+    nms, nms_thr = get_poly_nms(nms_type, nms_thr)
+    class_dets = results2scene_dets(dataset, results)
+    merged = mergearrays(class_dets, nms, nms_thr, num_process=num_process)
+    if out_dir is not None:
+        writearrays(merged, out_dir)
+    if annopath is None:
+        return merged, None
+    classnames = list(dataset.CLASSES)
+    eval_results = voc_eval_arrays(
+        merged,
+        annopath,
+        imagesetfile,
+        classnames,
+        use_07_metric=use_07_metric,
+        with_difficult=with_difficult,
+        num_process=num_process)
+    aps = {
+        cls_name: float(ap)
+        for cls_name, (_, _, ap) in zip(classnames, eval_results)
+    }
+    return merged, aps
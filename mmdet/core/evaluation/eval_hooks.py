@@ -12,6 +12,7 @@ from torch.utils.data import Dataset
 
 from .coco_utils import results2json, fast_eval_recall
 from .mean_ap import eval_map
+from .result_table import ResultTable, dump_results, is_det_result
 from mmdet import datasets
 
 
@@ -57,16 +58,25 @@ class DistEvalHook(Hook):
             print('\n')
             dist.barrier()
             for i in range(1, runner.world_size):
-                tmp_file = osp.join(runner.work_dir, 'temp_{}.pkl'.format(i))
-                tmp_results = mmcv.load(tmp_file)
-                for idx in range(i, len(results), runner.world_size):
-                    results[idx] = tmp_results[idx]
+                tmp_file = osp.join(runner.work_dir, 'temp_{}.npz'.format(i))
+                if osp.isfile(tmp_file):
+                    tmp_results = ResultTable(tmp_file)
+                else:
+                    tmp_file = osp.join(runner.work_dir,
+                                        'temp_{}.pkl'.format(i))
+                    tmp_results = mmcv.load(tmp_file)
+                results[i::runner.world_size] = tmp_results[:]
+                del tmp_results
                 os.remove(tmp_file)
             self.evaluate(runner, results)
         else:
+            # the detections of a rank are written as a result table, other
+            # outputs (proposals, masks) are pickled
+            rank_results = results[runner.rank::runner.world_size]
+            ext = 'npz' if all(map(is_det_result, rank_results)) else 'pkl'
             tmp_file = osp.join(runner.work_dir,
-                                'temp_{}.pkl'.format(runner.rank))
-            mmcv.dump(results, tmp_file)
+                                'temp_{}.{}'.format(runner.rank, ext))
+            dump_results(rank_results, tmp_file)
             dist.barrier()
         dist.barrier()
 
@@ -0,0 +1,316 @@
+import os.path as osp
+import shutil
+import struct
+import tempfile
+import zipfile
+from collections.abc import Sequence
+
+import mmcv
+import numpy as np
+
+# (name, dtype) of the per detection columns, bboxes is (n, bbox_dim)
+RESULT_TABLE_COLUMNS = (('img_inds', np.int32), ('labels', np.int32),
+                        ('bboxes', np.float32), ('scores', np.float32))
+
+
+def is_det_result(result):
+    """Whether `result` is a list of per class (n, bbox_dim + 1) arrays."""
+    return isinstance(result, list) and all(
+        isinstance(r, np.ndarray) and r.ndim == 2 for r in result)
+
+
+def _write_npy(zf, name, dtype, shape, src=None, array=None):
+    """Write a .npy member, the data is copied from the raw file `src` or
+    taken from `array`."""
+    with zf.open(name + '.npy', 'w', force_zip64=True) as f:
+        np.lib.format.write_array_header_1_0(
+            f, {
+                'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                'fortran_order': False,
+                'shape': shape
+            })
+        if array is not None:
+            f.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+        else:
+            with open(src, 'rb') as fsrc:
+                shutil.copyfileobj(fsrc, f, 1 << 20)
+
+
+def _load_npz(filename, mmap_min_size=1 << 16):
+    """Load the members of a .npz file, stored (uncompressed) members larger
+    than `mmap_min_size` bytes are memory mapped."""
+    arrays = {}
+    with zipfile.ZipFile(filename) as zf, open(filename, 'rb') as f:
+        for info in zf.infolist():
+            name = osp.splitext(info.filename)[0]
+            if (info.compress_type != zipfile.ZIP_STORED
+                    or info.file_size < mmap_min_size):
+                with zf.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+            # skip the local file header to the start of the .npy data
+            f.seek(info.header_offset)
+            header = f.read(30)
+            name_len, extra_len = struct.unpack('<HH', header[26:30])
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+            if np.lib.format.read_magic(f) == (1, 0):
+                header = np.lib.format.read_array_header_1_0(f)
+            else:
+                header = np.lib.format.read_array_header_2_0(f)
+            shape, fortran_order, dtype = header
+            arrays[name] = np.memmap(
+                filename,
+                dtype=dtype,
+                mode='r',
+                offset=f.tell(),
+                shape=shape,
+                order='F' if fortran_order else 'C')
+    return arrays
+
+
+class ResultTableWriter(object):
+    """Write detection results to a result table file image by image.
+
+    The columns are spooled to raw files in a temporary directory next to
+    `filename` and copied into the file by `close`, so the memory does not
+    grow with the number of images.
+
+    Args:
+        filename (str): output file, a .npz archive readable by `np.load`.
+        compress (bool): deflate the columns. The file is smaller but is
+            loaded into memory instead of being memory mapped.
+        num_classes (int, optional): number of classes, taken from the first
+            result if not given.
+        bbox_dim (int, optional): number of bbox columns (5 for rboxes, 8
+            for polys), taken from the first result if not given.
+    """
+
+    def __init__(self, filename, compress=False, num_classes=None,
+                 bbox_dim=None):
+        self.filename = filename
+        self.compress = compress
+        self.tmpdir = tempfile.mkdtemp(
+            dir=osp.dirname(osp.abspath(filename)))
+        self.files = {
+            name: open(osp.join(self.tmpdir, name), 'wb')
+            for name, _ in RESULT_TABLE_COLUMNS
+        }
+        self.img_offsets = [0]
+        self.num_classes = num_classes
+        self.bbox_dim = bbox_dim
+
+    def __len__(self):
+        return len(self.img_offsets) - 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._cleanup()
+
+    def _init_classes(self, num_classes, bbox_dim):
+        if self.num_classes is None:
+            self.num_classes = num_classes
+            self.bbox_dim = bbox_dim
+        assert num_classes == self.num_classes and bbox_dim == self.bbox_dim
+
+    def write(self, result):
+        """Append the result of the next image, a list of per class
+        (n, bbox_dim + 1) arrays with the scores in the last column."""
+        assert is_det_result(result), \
+            'only lists of per class arrays can be written to a result table'
+        self._init_classes(len(result), result[0].shape[1] - 1)
+        counts = [r.shape[0] for r in result]
+        dets = np.concatenate(result).astype(np.float32)
+        labels = np.repeat(np.arange(len(result), dtype=np.int32), counts)
+        self.write_rows(labels, dets[:, :-1], dets[:, -1])
+
+    def write_rows(self, labels, bboxes, scores):
+        """Append the result of the next image as table rows, sorted by
+        label."""
+        n = len(labels)
+        if n > 0:
+            self.files['img_inds'].write(
+                np.full(n, len(self), dtype=np.int32).tobytes())
+            self.files['labels'].write(
+                np.ascontiguousarray(labels, dtype=np.int32).tobytes())
+            self.files['bboxes'].write(
+                np.ascontiguousarray(bboxes, dtype=np.float32).tobytes())
+            self.files['scores'].write(
+                np.ascontiguousarray(scores, dtype=np.float32).tobytes())
+        self.img_offsets.append(self.img_offsets[-1] + n)
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        num_dets = self.img_offsets[-1]
+        shapes = dict(
+            img_inds=(num_dets, ),
+            labels=(num_dets, ),
+            bboxes=(num_dets, self.bbox_dim or 0),
+            scores=(num_dets, ))
+        compression = zipfile.ZIP_DEFLATED if self.compress else \
+            zipfile.ZIP_STORED
+        with zipfile.ZipFile(
+                self.filename, 'w', compression, allowZip64=True) as zf:
+            _write_npy(
+                zf,
+                'img_offsets',
+                np.int64, (len(self.img_offsets), ),
+                array=self.img_offsets)
+            _write_npy(
+                zf, 'num_classes', np.int64, (), array=self.num_classes or 0)
+            for name, dtype in RESULT_TABLE_COLUMNS:
+                _write_npy(
+                    zf,
+                    name,
+                    dtype,
+                    shapes[name],
+                    src=osp.join(self.tmpdir, name))
+        self._cleanup()
+
+    def _cleanup(self):
+        for f in self.files.values():
+            f.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+class ResultTable(Sequence):
+    """Detection results read from a result table file.
+
+    The table holds the detections of all the images as flat columns
+    `img_inds`, `labels`, `bboxes` (5 param rboxes, 8 point polys or hbbs)
+    and `scores`, sorted by image and label. The detections of image i are
+    the rows `img_offsets[i]:img_offsets[i + 1]`.
+
+    Indexing gives the result of an image as a list of per class arrays,
+    like the pickled results, so the table can be passed where a results
+    list is expected. The columns are memory mapped unless the file is
+    compressed.
+
+    Args:
+        filename (str): file written by `ResultTableWriter`.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        arrays = _load_npz(filename)
+        self.img_offsets = np.asarray(arrays['img_offsets'])
+        self.num_classes = int(arrays['num_classes'])
+        for name, _ in RESULT_TABLE_COLUMNS:
+            setattr(self, name, arrays[name])
+
+    def __len__(self):
+        return len(self.img_offsets) - 1
+
+    def __getstate__(self):
+        # reopen the memory maps instead of pickling the columns
+        return {'filename': self.filename}
+
+    def __setstate__(self, state):
+        self.__init__(state['filename'])
+
+    @property
+    def bbox_dim(self):
+        return self.bboxes.shape[1]
+
+    def rows(self, idx):
+        """(labels, bboxes, scores) of the detections of image idx."""
+        start, end = self.img_offsets[idx], self.img_offsets[idx + 1]
+        return (np.asarray(self.labels[start:end]),
+                np.asarray(self.bboxes[start:end]),
+                np.asarray(self.scores[start:end]))
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError('image index out of range')
+        labels, bboxes, scores = self.rows(idx)
+        dets = np.hstack([bboxes, scores[:, None]])
+        bounds = np.searchsorted(labels, np.arange(self.num_classes + 1))
+        return [dets[bounds[i]:bounds[i + 1]] for i in range(self.num_classes)]
+
+
+class ShardedResultTable(Sequence):
+    """Result tables written by the ranks of a distributed test, read as a
+    single table.
+
+    Rank r tested the images r, r + world_size, ... (see
+    `DistributedSampler`), so image i is image i // world_size of shard
+    i % world_size. The images padded by the sampler are dropped.
+
+    Args:
+        filenames (list[str]): result table of each rank, in rank order.
+        size (int, optional): number of images of the dataset.
+    """
+
+    def __init__(self, filenames, size=None):
+        self.shards = [ResultTable(filename) for filename in filenames]
+        total = sum(len(shard) for shard in self.shards)
+        self.size = total if size is None else min(size, total)
+        self.num_classes = max(shard.num_classes for shard in self.shards)
+        self.bbox_dim = max(shard.bbox_dim for shard in self.shards)
+
+    def __len__(self):
+        return self.size
+
+    def _locate(self, idx):
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError('image index out of range')
+        world_size = len(self.shards)
+        return self.shards[idx % world_size], idx // world_size
+
+    def rows(self, idx):
+        shard, local_idx = self._locate(idx)
+        return shard.rows(local_idx)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        shard, local_idx = self._locate(idx)
+        return shard[local_idx]
+
+
+def merge_result_tables(tables, filename, compress=False):
+    """Write a (sharded) result table to a single file, image by image."""
+    with ResultTableWriter(
+            filename,
+            compress=compress,
+            num_classes=tables.num_classes,
+            bbox_dim=tables.bbox_dim) as writer:
+        for i in range(len(tables)):
+            writer.write_rows(*tables.rows(i))
+
+
+def dump_results(results, filename, compress=False):
+    """Save detection results, as a result table if `filename` is a .npz
+    file and with `mmcv.dump` otherwise.
+
+    `results` is a list of results or a (sharded) result table, which is
+    copied image by image.
+    """
+    is_table = isinstance(results, (ResultTable, ShardedResultTable))
+    if not filename.endswith('.npz'):
+        mmcv.dump(results[:] if is_table else results, filename)
+        return
+    if is_table:
+        merge_result_tables(results, filename, compress=compress)
+        return
+    with ResultTableWriter(filename, compress=compress) as writer:
+        for result in results:
+            writer.write(result)
+
+
+def load_results(filename):
+    """Load detection results saved by `dump_results`."""
+    if filename.endswith('.npz'):
+        return ResultTable(filename)
+    return mmcv.load(filename)
@@ -30,6 +30,10 @@ def multiclass_nms_rbbox(multi_bboxes,
     # nms_op = py_cpu_nms_poly_fast
 
     nms_type = nms_cfg_.pop('type', 'nms')
+    if nms_type == 'batched_poly_nms':
+        return _batched_multiclass_nms_rbbox(multi_bboxes, multi_scores,
+                                             score_thr, nms_cfg_, max_num,
+                                             score_factors)
     # TODO: refactor it
     if nms_type == 'poly_nms':
         nms_op = getattr(poly_nms_wrapper, nms_type)
@@ -78,6 +82,46 @@ def multiclass_nms_rbbox(multi_bboxes,
 
     return bboxes, labels
 
+def _batched_multiclass_nms_rbbox(multi_bboxes,
+                                  multi_scores,
+                                  score_thr,
+                                  nms_cfg,
+                                  max_num=-1,
+                                  score_factors=None):
+    """
+    Same as multiclass_nms_rbbox, but the candidates of all classes are
+    converted to polys together and suppressed by one batched_poly_nms call.
+    """
+    num_classes = multi_scores.shape[1]
+    valid = multi_scores[:, 1:] > score_thr
+    nonzero_inds = valid.nonzero()
+    if nonzero_inds.numel() == 0:
+        bboxes = multi_bboxes.new_zeros((0, 9))
+        labels = multi_bboxes.new_zeros((0, ), dtype=torch.long)
+        return bboxes, labels
+    inds, cls_inds = nonzero_inds[:, 0], nonzero_inds[:, 1]
+    if multi_bboxes.shape[1] == 5:
+        _bboxes = multi_bboxes[inds, :]
+    else:
+        _bboxes = multi_bboxes.view(-1, num_classes, 5)[inds, cls_inds + 1]
+    _bboxes = torch.from_numpy(RotBox2Polys(_bboxes.cpu().numpy())).to(multi_scores.device)
+    _scores = multi_scores[inds, cls_inds + 1]
+    if score_factors is not None:
+        _scores = _scores * score_factors[inds]
+    dets = torch.cat([_bboxes, _scores[:, None]], dim=1)
+    if not DEBUG:
+        dets, keep = poly_nms_wrapper.batched_poly_nms(dets, cls_inds, **nms_cfg)
+        cls_inds = cls_inds[keep]
+    bboxes = dets
+    labels = cls_inds
+    if bboxes.shape[0] > max_num:
+        _, inds = bboxes[:, -1].sort(descending=True)
+        inds = inds[:max_num]
+        bboxes = bboxes[inds]
+        labels = labels[inds]
+
+    return bboxes, labels
+
 def Pesudomulticlass_nms_rbbox(multi_bboxes,
                          multi_scores,
                          score_thr,
@@ -1,5 +1,15 @@
-from .coco import CocoDataset
+import os
+import os.path as osp
+from collections import OrderedDict
+
+import cv2
+import mmcv
 import numpy as np
+import pycocotools.mask as maskUtils
+import shapely.geometry as shgeo
+from PIL import Image
+
+from .coco import CocoDataset
 
 class DOTADataset(CocoDataset):
 
@@ -24,16 +34,21 @@ class DOTADataset_v3(CocoDataset):
                 'harbor', 'swimming-pool',
                 'helicopter')
 
-    def _parse_ann_info(self, ann_info, with_mask=True):
+    def _ann_valid_mask(self, areas, widths, heights):
+        return (areas > 80) & (np.maximum(widths, heights) >= 12)
+
+    def _parse_ann_info(self, ann_info, with_mask=True, with_poly=False):
         """Parse bbox and mask annotation.
 
         Args:
             ann_info (list[dict]): Annotation info of an image.
             with_mask (bool): Whether to parse mask annotations.
+            with_poly (bool): Whether to parse (n, 8) polygons of the gt
+                bboxes instead of masks.
 
         Returns:
             dict: A dict containing the following keys: bboxes, bboxes_ignore,
-                labels, masks, mask_polys, poly_lens.
+                labels, masks, mask_polys, poly_lens, polys.
         """
         gt_bboxes = []
         gt_labels = []
@@ -42,6 +57,8 @@ class DOTADataset_v3(CocoDataset):
         # 1. mask: a binary map of the same size of the image.
         # 2. polys: each mask consists of one or several polys, each poly is a
         # list of float.
+        if with_poly:
+            gt_polys = []
         if with_mask:
             gt_masks = []
             gt_mask_polys = []
@@ -56,7 +73,7 @@ class DOTADataset_v3(CocoDataset):
             # if ann['area'] <= 50 or max(w, h) < 10:
             #     continue
             # TODO: make the threshold a paramater in config
-            if ann['area'] <= 80 or max(w, h) < 12:
+            if not self._ann_valid_mask(ann['area'], w, h):
                 continue
             bbox = [x1, y1, x1 + w - 1, y1 + h - 1]
             if ann['iscrowd']:
@@ -64,6 +81,8 @@ class DOTADataset_v3(CocoDataset):
             else:
                 gt_bboxes.append(bbox)
                 gt_labels.append(self.cat2label[ann['category_id']])
+                if with_poly:
+                    gt_polys.append(self._ann_to_poly(ann))
             if with_mask:
                 gt_masks.append(self.coco.annToMask(ann))
                 mask_polys = [
@@ -87,9 +106,316 @@ class DOTADataset_v3(CocoDataset):
         ann = dict(
             bboxes=gt_bboxes, labels=gt_labels, bboxes_ignore=gt_bboxes_ignore)
 
+        if with_poly:
+            ann['polys'] = np.array(
+                gt_polys, dtype=np.float32).reshape(-1, 8)
         if with_mask:
             ann['masks'] = gt_masks
             # poly format is not used in the current implementation
             ann['mask_polys'] = gt_mask_polys
             ann['poly_lens'] = gt_poly_lens
-        return ann
\ No newline at end of file
+        return ann
+
+
+def split_windows(width, height, subsize=1024, gap=200):
+    """(left, up) of the patches of an image, in the order of
+    DOTA_devkit/ImgSplit_multi_process."""
+    slide = subsize - gap
+    windows = []
+    left = 0
+    while left < width:
+        if left + subsize >= width:
+            left = max(width - subsize, 0)
+        up = 0
+        while up < height:
+            if up + subsize >= height:
+                up = max(height - subsize, 0)
+            windows.append((left, up))
+            if up + subsize >= height:
+                break
+            up = up + slide
+        if left + subsize >= width:
+            break
+        left = left + slide
+    return windows
+
+
+def _poly5_to_poly4(poly):
+    """Merge the shortest edge of a 5 point polygon into its middle."""
+    points = np.asarray(poly, dtype=np.float64).reshape(5, 2)
+    lengths = np.linalg.norm(points - np.roll(points, -1, axis=0), axis=1)
+    pos = lengths.argmin()
+    out = []
+    for i in range(5):
+        if i == pos:
+            out.append((points[i] + points[(i + 1) % 5]) / 2)
+        elif i != (pos + 1) % 5:
+            out.append(points[i])
+    return np.array(out).reshape(-1)
+
+
+def _fit_point_order(poly, ref):
+    """Cyclic point order of poly (8, ) which best fits ref (8, )."""
+    points = np.asarray(poly, dtype=np.float64).reshape(4, 2)
+    orders = (np.arange(4)[:, np.newaxis] + np.arange(4)) % 4
+    candidates = points[orders].reshape(4, 8)
+    distances = ((candidates - ref)**2).sum(axis=1)
+    return candidates[distances.argmin()]
+
+
+class DOTAPatchDataset(DOTADataset):
+    """DOTA split into patches on the fly.
+
+    The dataset reads the original images and labelTxt files instead of the
+    output of DOTA_devkit/ImgSplit_multi_process and DOTA2COCO, the patches
+    are cropped in `__getitem__` so the split images are never written and
+    the patch size or overlap can be changed in the config. The windows, the
+    clipping of the objects cut by a window and the patch names (e.g.
+    `P0003__1__0___824.png`, which the result merging relies on) follow the
+    splitter, and objects keeping less than `thresh` of their area are marked
+    difficult '2' as in the split labelTxt.
+
+    The decoded (and resized) source images are kept in a LRU cache of
+    `cache_size` images per worker, the windows of an image are consecutive so
+    testing decodes each image once per rate.
+
+    Args:
+        ann_file (str): labelTxt directory of the original images, None to
+            load no annotation (test).
+        img_prefix (str): directory of the original images.
+        subsize (int): Patch size.
+        gap (int): Overlap between neighbouring patches.
+        rates (tuple[float]): Rates the images are resized with before the
+            split, each rate gives a set of patches.
+        thresh (float): Objects cut by a patch keeping less than `thresh` of
+            their area are marked difficult '2'.
+        ext (str): Extension of the original images.
+        padding (bool): Pad the edge patches to `subsize` with zeros.
+        difficult (str): Objects of this difficulty are dropped, like in
+            DOTA2COCOTrain. None to keep all.
+        cache_size (int): Number of decoded images kept in memory.
+    """
+
+    def __init__(self,
+                 ann_file,
+                 img_prefix,
+                 subsize=1024,
+                 gap=200,
+                 rates=(1, ),
+                 thresh=0.7,
+                 ext='.png',
+                 padding=True,
+                 difficult='2',
+                 cache_size=4,
+                 **kwargs):
+        self.subsize = subsize
+        self.gap = gap
+        self.rates = rates
+        self.thresh = thresh
+        self.ext = ext
+        self.padding = padding
+        self.difficult = difficult
+        self.cache_size = cache_size
+        self.img_cache = OrderedDict()
+        super(DOTAPatchDataset, self).__init__(ann_file, img_prefix, **kwargs)
+
+    def load_annotations(self, ann_file):
+        self.cat2label = {i + 1: i + 1 for i in range(len(self.CLASSES))}
+        names = sorted(
+            osp.splitext(f)[0] for f in os.listdir(self.img_prefix)
+            if f.endswith(self.ext) and osp.splitext(f)[0] != 'Thumbs')
+        self.src_infos = []
+        img_infos = []
+        for name in names:
+            with Image.open(osp.join(self.img_prefix, name + self.ext)) as img:
+                width, height = img.size
+            src_info = dict(filename=name + self.ext, width=width, height=height)
+            if ann_file is not None:
+                src_info.update(
+                    self._load_objects(osp.join(ann_file, name + '.txt')))
+            for rate in self.rates:
+                # the image size of cv2.resize
+                rate_width = int(round(width * rate))
+                rate_height = int(round(height * rate))
+                for left, up in split_windows(rate_width, rate_height,
+                                              self.subsize, self.gap):
+                    img_info = dict(
+                        filename='{}__{}__{}___{}{}'.format(
+                            name, rate, left, up, self.ext),
+                        src=len(self.src_infos),
+                        rate=rate,
+                        left=left,
+                        up=up,
+                        right=min(left + self.subsize, rate_width - 1),
+                        down=min(up + self.subsize, rate_height - 1))
+                    if self.padding:
+                        img_info['width'] = img_info['height'] = self.subsize
+                    else:
+                        img_info['width'] = min(self.subsize,
+                                                rate_width - left)
+                        img_info['height'] = min(self.subsize,
+                                                 rate_height - up)
+                    img_infos.append(img_info)
+            self.src_infos.append(src_info)
+        return img_infos
+
+    def _load_objects(self, label_file):
+        """Polygons, labels and difficulties of a labelTxt file, the
+        polygons without area are dropped."""
+        polys = []
+        labels = []
+        difficults = []
+        if osp.isfile(label_file):
+            with open(label_file, 'r') as f:
+                for line in f:
+                    splitline = line.strip().split(' ')
+                    if len(splitline) < 9:
+                        continue
+                    polys.append([int(float(x)) for x in splitline[:8]])
+                    labels.append(self.CLASSES.index(splitline[8]) + 1)
+                    difficults.append(
+                        splitline[9] if len(splitline) >= 10 else '0')
+        polys = np.array(polys, dtype=np.float64).reshape(-1, 8)
+        xs, ys = polys[:, 0::2], polys[:, 1::2]
+        areas = np.abs((xs * np.roll(ys, -1, axis=1) -
+                        np.roll(xs, -1, axis=1) * ys).sum(axis=1)) / 2
+        keep = areas > 0
+        return dict(
+            polys=polys[keep],
+            labels=np.array(labels, dtype=np.int64)[keep],
+            difficults=np.array(difficults, dtype=object)[keep])
+
+    def _window_overlap(self, polys, img_info):
+        """Whether the bounds of polys overlap the window, and are inside
+        it."""
+        left, up = img_info['left'], img_info['up']
+        right, down = img_info['right'], img_info['down']
+        xmin, xmax = polys[:, 0::2].min(axis=1), polys[:, 0::2].max(axis=1)
+        ymin, ymax = polys[:, 1::2].min(axis=1), polys[:, 1::2].max(axis=1)
+        overlap = (xmax > left) & (xmin < right) & (ymax > up) & (ymin < down)
+        inside = (xmin >= left) & (xmax <= right) & (ymin >= up) & (
+            ymax <= down)
+        return overlap, inside
+
+    def _filter_imgs(self, min_size=32):
+        """Filter patches too small or without any object."""
+        valid_inds = []
+        for i, img_info in enumerate(self.img_infos):
+            if min(img_info['width'], img_info['height']) < min_size:
+                continue
+            src_info = self.src_infos[img_info['src']]
+            polys = src_info['polys'] * img_info['rate']
+            if self.difficult is not None:
+                polys = polys[src_info['difficults'] != self.difficult]
+            overlap, _ = self._window_overlap(polys, img_info)
+            if overlap.any():
+                valid_inds.append(i)
+        return valid_inds
+
+    def _patch_objects(self, img_info):
+        """Objects of a patch, in the format of the split labelTxt.
+
+        Returns:
+            tuple: (n, 8) polygons in the patch, (n, ) labels and (n, )
+                difficulties.
+        """
+        src_info = self.src_infos[img_info['src']]
+        polys = src_info['polys'] * img_info['rate']
+        left, up = img_info['left'], img_info['up']
+        right, down = img_info['right'], img_info['down']
+        offset = np.tile([left, up], 4)
+        imgpoly = shgeo.Polygon([(left, up), (right, up), (right, down),
+                                 (left, down)])
+        overlap, inside = self._window_overlap(polys, img_info)
+        out_polys = []
+        out_inds = []
+        difficults = []
+        for i in np.nonzero(overlap)[0]:
+            difficult = src_info['difficults'][i]
+            if inside[i]:
+                half_iou = 1
+            else:
+                gtpoly = shgeo.Polygon(polys[i].reshape(4, 2))
+                inter_poly = gtpoly.intersection(imgpoly)
+                half_iou = inter_poly.area / gtpoly.area
+            if half_iou == 1:
+                out_poly = np.trunc(polys[i] - offset)
+            elif half_iou > 0:
+                if inter_poly.geom_type != 'Polygon':
+                    continue
+                inter_poly = shgeo.polygon.orient(inter_poly, sign=1)
+                out_poly = np.array(
+                    inter_poly.exterior.coords[:-1]).reshape(-1)
+                if len(out_poly) == 10:
+                    out_poly = _poly5_to_poly4(out_poly)
+                elif len(out_poly) != 8:
+                    # cut polygons with more than 5 points are not handled
+                    continue
+                out_poly = _fit_point_order(out_poly, polys[i])
+                out_poly = np.clip(
+                    np.trunc(out_poly - offset), 1, self.subsize)
+                if half_iou <= self.thresh:
+                    # the left part is too small
+                    difficult = '2'
+            else:
+                continue
+            if difficult == self.difficult:
+                continue
+            out_polys.append(out_poly)
+            out_inds.append(i)
+            difficults.append(difficult)
+        out_polys = np.array(out_polys, dtype=np.float64).reshape(-1, 8)
+        return out_polys, src_info['labels'][out_inds], difficults
+
+    def get_ann_info(self, idx):
+        polys, labels, _ = self._patch_objects(self.img_infos[idx])
+        ann_info = []
+        for poly, label in zip(polys, labels):
+            xmin, ymin = poly[0::2].min(), poly[1::2].min()
+            w, h = poly[0::2].max() - xmin, poly[1::2].max() - ymin
+            ann_info.append(
+                dict(
+                    image_id=idx,
+                    category_id=int(label),
+                    segmentation=[poly.tolist()],
+                    bbox=[xmin, ymin, w, h],
+                    area=w * h,
+                    iscrowd=0))
+        return self._parse_ann_info(ann_info, self.with_mask, self.with_poly)
+
+    def _ann_to_mask(self, ann):
+        img_info = self.img_infos[ann['image_id']]
+        rles = maskUtils.frPyObjects(ann['segmentation'], img_info['height'],
+                                     img_info['width'])
+        return maskUtils.decode(maskUtils.merge(rles))
+
+    def load_src_image(self, src, rate):
+        """Decoded source image resized by rate, through the LRU cache."""
+        key = (src, rate)
+        img = self.img_cache.pop(key, None)
+        if img is None:
+            img = mmcv.imread(
+                osp.join(self.img_prefix, self.src_infos[src]['filename']))
+            if rate != 1:
+                img = cv2.resize(
+                    img, None, fx=rate, fy=rate,
+                    interpolation=cv2.INTER_CUBIC)
+            while self.img_cache and len(self.img_cache) >= self.cache_size:
+                self.img_cache.popitem(last=False)
+        if self.cache_size > 0:
+            self.img_cache[key] = img
+        return img
+
+    def load_image(self, idx):
+        img_info = self.img_infos[idx]
+        img = self.load_src_image(img_info['src'], img_info['rate'])
+        left, up = img_info['left'], img_info['up']
+        patch = img[up:up + self.subsize, left:left + self.subsize]
+        h, w = patch.shape[:2]
+        if self.padding and (h != self.subsize or w != self.subsize):
+            out = np.zeros((self.subsize, self.subsize) + patch.shape[2:],
+                           dtype=patch.dtype)
+            out[:h, :w] = patch
+            return out
+        # the augmentations may work in place, do not give the cached image
+        return patch.copy()
@@ -1,4 +1,5 @@
 from .coco import CocoDataset
+from .DOTA import DOTAPatchDataset
 import numpy as np
 
 class DOTA1_5Dataset(CocoDataset):
@@ -23,16 +24,21 @@ class DOTA1_5Dataset_v2(CocoDataset):
                 'harbor', 'swimming-pool',
                 'helicopter', 'container-crane')
 
-    def _parse_ann_info(self, ann_info, with_mask=True):
+    def _ann_valid_mask(self, areas, widths, heights):
+        return (areas > 80) & (np.maximum(widths, heights) >= 12)
+
+    def _parse_ann_info(self, ann_info, with_mask=True, with_poly=False):
         """Parse bbox and mask annotation.
 
         Args:
             ann_info (list[dict]): Annotation info of an image.
             with_mask (bool): Whether to parse mask annotations.
+            with_poly (bool): Whether to parse (n, 8) polygons of the gt
+                bboxes instead of masks.
 
         Returns:
             dict: A dict containing the following keys: bboxes, bboxes_ignore,
-                labels, masks, mask_polys, poly_lens.
+                labels, masks, mask_polys, poly_lens, polys.
         """
         gt_bboxes = []
         gt_labels = []
@@ -41,6 +47,8 @@ class DOTA1_5Dataset_v2(CocoDataset):
         # 1. mask: a binary map of the same size of the image.
         # 2. polys: each mask consists of one or several polys, each poly is a
         # list of float.
+        if with_poly:
+            gt_polys = []
         if with_mask:
             gt_masks = []
             gt_mask_polys = []
@@ -49,7 +57,7 @@ class DOTA1_5Dataset_v2(CocoDataset):
             if ann.get('ignore', False):
                 continue
             x1, y1, w, h = ann['bbox']
-            if ann['area'] <= 80 or max(w, h) < 12:
+            if not self._ann_valid_mask(ann['area'], w, h):
                 continue
             bbox = [x1, y1, x1 + w - 1, y1 + h - 1]
             if ann['iscrowd']:
@@ -57,6 +65,8 @@ class DOTA1_5Dataset_v2(CocoDataset):
             else:
                 gt_bboxes.append(bbox)
                 gt_labels.append(self.cat2label[ann['category_id']])
+                if with_poly:
+                    gt_polys.append(self._ann_to_poly(ann))
             if with_mask:
                 gt_masks.append(self.coco.annToMask(ann))
                 mask_polys = [
@@ -80,6 +90,9 @@ class DOTA1_5Dataset_v2(CocoDataset):
         ann = dict(
             bboxes=gt_bboxes, labels=gt_labels, bboxes_ignore=gt_bboxes_ignore)
 
+        if with_poly:
+            ann['polys'] = np.array(
+                gt_polys, dtype=np.float32).reshape(-1, 8)
         if with_mask:
             ann['masks'] = gt_masks
             # poly format is not used in the current implementation
@@ -98,16 +111,21 @@ class DOTA1_5Dataset_v3(CocoDataset):
                 'harbor', 'swimming-pool',
                 'helicopter', 'container-crane')
 
-    def _parse_ann_info(self, ann_info, with_mask=True):
+    def _ann_valid_mask(self, areas, widths, heights):
+        return (areas > 140) & (np.maximum(widths, heights) >= 12)
+
+    def _parse_ann_info(self, ann_info, with_mask=True, with_poly=False):
         """Parse bbox and mask annotation.
 
         Args:
             ann_info (list[dict]): Annotation info of an image.
             with_mask (bool): Whether to parse mask annotations.
+            with_poly (bool): Whether to parse (n, 8) polygons of the gt
+                bboxes instead of masks.
 
         Returns:
             dict: A dict containing the following keys: bboxes, bboxes_ignore,
-                labels, masks, mask_polys, poly_lens.
+                labels, masks, mask_polys, poly_lens, polys.
         """
         gt_bboxes = []
         gt_labels = []
@@ -116,6 +134,8 @@ class DOTA1_5Dataset_v3(CocoDataset):
         # 1. mask: a binary map of the same size of the image.
         # 2. polys: each mask consists of one or several polys, each poly is a
         # list of float.
+        if with_poly:
+            gt_polys = []
         if with_mask:
             gt_masks = []
             gt_mask_polys = []
@@ -126,7 +146,7 @@ class DOTA1_5Dataset_v3(CocoDataset):
             x1, y1, w, h = ann['bbox']
 
             # TODO: make can be set by a more flexible way
-            if ann['area'] <= 140 or max(w, h) < 12:
+            if not self._ann_valid_mask(ann['area'], w, h):
                 continue
             bbox = [x1, y1, x1 + w - 1, y1 + h - 1]
             if ann['iscrowd']:
@@ -134,6 +154,8 @@ class DOTA1_5Dataset_v3(CocoDataset):
             else:
                 gt_bboxes.append(bbox)
                 gt_labels.append(self.cat2label[ann['category_id']])
+                if with_poly:
+                    gt_polys.append(self._ann_to_poly(ann))
             if with_mask:
                 gt_masks.append(self.coco.annToMask(ann))
                 mask_polys = [
@@ -157,9 +179,17 @@ class DOTA1_5Dataset_v3(CocoDataset):
         ann = dict(
             bboxes=gt_bboxes, labels=gt_labels, bboxes_ignore=gt_bboxes_ignore)
 
+        if with_poly:
+            ann['polys'] = np.array(
+                gt_polys, dtype=np.float32).reshape(-1, 8)
         if with_mask:
             ann['masks'] = gt_masks
             # poly format is not used in the current implementation
             ann['mask_polys'] = gt_mask_polys
             ann['poly_lens'] = gt_poly_lens
-        return ann
\ No newline at end of file
+        return ann
+
+
+class DOTA1_5PatchDataset(DOTAPatchDataset):
+
+    CLASSES = DOTA1_5Dataset.CLASSES
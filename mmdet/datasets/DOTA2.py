@@ -15,16 +15,21 @@ class DOTA2Dataset(CocoDataset):
                 'helicopter', 'container-crane',
                'airport', 'helipad')
 
-    def _parse_ann_info(self, ann_info, with_mask=True):
+    def _ann_valid_mask(self, areas, widths, heights):
+        return (areas > 50) & (np.maximum(widths, heights) >= 10)
+
+    def _parse_ann_info(self, ann_info, with_mask=True, with_poly=False):
         """Parse bbox and mask annotation.
 
         Args:
             ann_info (list[dict]): Annotation info of an image.
             with_mask (bool): Whether to parse mask annotations.
+            with_poly (bool): Whether to parse (n, 8) polygons of the gt
+                bboxes instead of masks.
 
         Returns:
             dict: A dict containing the following keys: bboxes, bboxes_ignore,
-                labels, masks, mask_polys, poly_lens.
+                labels, masks, mask_polys, poly_lens, polys.
         """
         gt_bboxes = []
         gt_labels = []
@@ -33,6 +38,8 @@ class DOTA2Dataset(CocoDataset):
         # 1. mask: a binary map of the same size of the image.
         # 2. polys: each mask consists of one or several polys, each poly is a
         # list of float.
+        if with_poly:
+            gt_polys = []
         if with_mask:
             gt_masks = []
             gt_mask_polys = []
@@ -44,7 +51,7 @@ class DOTA2Dataset(CocoDataset):
             # This config verified
             # if ann['area'] <= 0 or w < 10 or h < 10:
             #     continue
-            if ann['area'] <= 50 or max(w, h) < 10:
+            if not self._ann_valid_mask(ann['area'], w, h):
                 continue
             # if ann['area'] <= 64 or max(w, h) < 12:
             #     continue
@@ -54,6 +61,8 @@ class DOTA2Dataset(CocoDataset):
             else:
                 gt_bboxes.append(bbox)
                 gt_labels.append(self.cat2label[ann['category_id']])
+                if with_poly:
+                    gt_polys.append(self._ann_to_poly(ann))
             if with_mask:
                 gt_masks.append(self.coco.annToMask(ann))
                 mask_polys = [
@@ -77,6 +86,9 @@ class DOTA2Dataset(CocoDataset):
         ann = dict(
             bboxes=gt_bboxes, labels=gt_labels, bboxes_ignore=gt_bboxes_ignore)
 
+        if with_poly:
+            ann['polys'] = np.array(
+                gt_polys, dtype=np.float32).reshape(-1, 8)
         if with_mask:
             ann['masks'] = gt_masks
             # poly format is not used in the current implementation
@@ -96,16 +108,21 @@ class DOTA2Dataset_v2(CocoDataset):
                 'helicopter', 'container-crane',
                'airport', 'helipad')
 
-    def _parse_ann_info(self, ann_info, with_mask=True):
+    def _ann_valid_mask(self, areas, widths, heights):
+        return (areas > 80) & (np.maximum(widths, heights) >= 10)
+
+    def _parse_ann_info(self, ann_info, with_mask=True, with_poly=False):
         """Parse bbox and mask annotation.
 
         Args:
             ann_info (list[dict]): Annotation info of an image.
             with_mask (bool): Whether to parse mask annotations.
+            with_poly (bool): Whether to parse (n, 8) polygons of the gt
+                bboxes instead of masks.
 
         Returns:
             dict: A dict containing the following keys: bboxes, bboxes_ignore,
-                labels, masks, mask_polys, poly_lens.
+                labels, masks, mask_polys, poly_lens, polys.
         """
         gt_bboxes = []
         gt_labels = []
@@ -114,6 +131,8 @@ class DOTA2Dataset_v2(CocoDataset):
         # 1. mask: a binary map of the same size of the image.
         # 2. polys: each mask consists of one or several polys, each poly is a
         # list of float.
+        if with_poly:
+            gt_polys = []
         if with_mask:
             gt_masks = []
             gt_mask_polys = []
@@ -127,7 +146,7 @@ class DOTA2Dataset_v2(CocoDataset):
             #     continue
             # if ann['area'] <= 50 or max(w, h) < 10:
             #     continue
-            if ann['area'] <= 80 or max(w, h) < 10:
+            if not self._ann_valid_mask(ann['area'], w, h):
                 continue
             bbox = [x1, y1, x1 + w - 1, y1 + h - 1]
             if ann['iscrowd']:
@@ -135,6 +154,8 @@ class DOTA2Dataset_v2(CocoDataset):
             else:
                 gt_bboxes.append(bbox)
                 gt_labels.append(self.cat2label[ann['category_id']])
+                if with_poly:
+                    gt_polys.append(self._ann_to_poly(ann))
             if with_mask:
                 gt_masks.append(self.coco.annToMask(ann))
                 mask_polys = [
@@ -158,6 +179,9 @@ class DOTA2Dataset_v2(CocoDataset):
         ann = dict(
             bboxes=gt_bboxes, labels=gt_labels, bboxes_ignore=gt_bboxes_ignore)
 
+        if with_poly:
+            ann['polys'] = np.array(
+                gt_polys, dtype=np.float32).reshape(-1, 8)
         if with_mask:
             ann['masks'] = gt_masks
             # poly format is not used in the current implementation
@@ -177,16 +201,21 @@ class DOTA2Dataset_v3(CocoDataset):
                 'helicopter', 'container-crane',
                'airport', 'helipad')
 
-    def _parse_ann_info(self, ann_info, with_mask=True):
+    def _ann_valid_mask(self, areas, widths, heights):
+        return (areas > 80) & (np.maximum(widths, heights) >= 12)
+
+    def _parse_ann_info(self, ann_info, with_mask=True, with_poly=False):
         """Parse bbox and mask annotation.
 
         Args:
             ann_info (list[dict]): Annotation info of an image.
             with_mask (bool): Whether to parse mask annotations.
+            with_poly (bool): Whether to parse (n, 8) polygons of the gt
+                bboxes instead of masks.
 
         Returns:
             dict: A dict containing the following keys: bboxes, bboxes_ignore,
-                labels, masks, mask_polys, poly_lens.
+                labels, masks, mask_polys, poly_lens, polys.
         """
         gt_bboxes = []
         gt_labels = []
@@ -195,6 +224,8 @@ class DOTA2Dataset_v3(CocoDataset):
         # 1. mask: a binary map of the same size of the image.
         # 2. polys: each mask consists of one or several polys, each poly is a
         # list of float.
+        if with_poly:
+            gt_polys = []
         if with_mask:
             gt_masks = []
             gt_mask_polys = []
@@ -208,7 +239,7 @@ class DOTA2Dataset_v3(CocoDataset):
             #     continue
             # if ann['area'] <= 50 or max(w, h) < 10:
             #     continue
-            if ann['area'] <= 80 or max(w, h) < 12:
+            if not self._ann_valid_mask(ann['area'], w, h):
                 continue
             bbox = [x1, y1, x1 + w - 1, y1 + h - 1]
             if ann['iscrowd']:
@@ -216,6 +247,8 @@ class DOTA2Dataset_v3(CocoDataset):
             else:
                 gt_bboxes.append(bbox)
                 gt_labels.append(self.cat2label[ann['category_id']])
+                if with_poly:
+                    gt_polys.append(self._ann_to_poly(ann))
             if with_mask:
                 gt_masks.append(self.coco.annToMask(ann))
                 mask_polys = [
@@ -239,6 +272,9 @@ class DOTA2Dataset_v3(CocoDataset):
         ann = dict(
             bboxes=gt_bboxes, labels=gt_labels, bboxes_ignore=gt_bboxes_ignore)
 
+        if with_poly:
+            ann['polys'] = np.array(
+                gt_polys, dtype=np.float32).reshape(-1, 8)
         if with_mask:
             ann['masks'] = gt_masks
             # poly format is not used in the current implementation
@@ -258,16 +294,21 @@ class DOTA2Dataset_v4(CocoDataset):
                 'helicopter', 'container-crane',
                'airport', 'helipad')
 
-    def _parse_ann_info(self, ann_info, with_mask=True):
+    def _ann_valid_mask(self, areas, widths, heights):
+        return (areas > 140) & (np.maximum(widths, heights) >= 12)
+
+    def _parse_ann_info(self, ann_info, with_mask=True, with_poly=False):
         """Parse bbox and mask annotation.
 
         Args:
             ann_info (list[dict]): Annotation info of an image.
             with_mask (bool): Whether to parse mask annotations.
+            with_poly (bool): Whether to parse (n, 8) polygons of the gt
+                bboxes instead of masks.
 
         Returns:
             dict: A dict containing the following keys: bboxes, bboxes_ignore,
-                labels, masks, mask_polys, poly_lens.
+                labels, masks, mask_polys, poly_lens, polys.
         """
         gt_bboxes = []
         gt_labels = []
@@ -276,6 +317,8 @@ class DOTA2Dataset_v4(CocoDataset):
         # 1. mask: a binary map of the same size of the image.
         # 2. polys: each mask consists of one or several polys, each poly is a
         # list of float.
+        if with_poly:
+            gt_polys = []
         if with_mask:
             gt_masks = []
             gt_mask_polys = []
@@ -289,7 +332,7 @@ class DOTA2Dataset_v4(CocoDataset):
             #     continue
             # if ann['area'] <= 50 or max(w, h) < 10:
             #     continue
-            if ann['area'] <= 140 or max(w, h) < 12:
+            if not self._ann_valid_mask(ann['area'], w, h):
                 continue
             bbox = [x1, y1, x1 + w - 1, y1 + h - 1]
             if ann['iscrowd']:
@@ -297,6 +340,8 @@ class DOTA2Dataset_v4(CocoDataset):
             else:
                 gt_bboxes.append(bbox)
                 gt_labels.append(self.cat2label[ann['category_id']])
+                if with_poly:
+                    gt_polys.append(self._ann_to_poly(ann))
             if with_mask:
                 gt_masks.append(self.coco.annToMask(ann))
                 mask_polys = [
@@ -320,6 +365,9 @@ class DOTA2Dataset_v4(CocoDataset):
         ann = dict(
             bboxes=gt_bboxes, labels=gt_labels, bboxes_ignore=gt_bboxes_ignore)
 
+        if with_poly:
+            ann['polys'] = np.array(
+                gt_polys, dtype=np.float32).reshape(-1, 8)
         if with_mask:
             ann['masks'] = gt_masks
             # poly format is not used in the current implementation
@@ -1,9 +1,11 @@
-from .DOTA import DOTADataset, DOTADataset_v3
-from .DOTA1_5 import DOTA1_5Dataset, DOTA1_5Dataset_v3, DOTA1_5Dataset_v2
+from .DOTA import DOTADataset, DOTADataset_v3, DOTAPatchDataset
+from .DOTA1_5 import (DOTA1_5Dataset, DOTA1_5Dataset_v3, DOTA1_5Dataset_v2,
+                      DOTA1_5PatchDataset)
 from .DOTA2 import DOTA2Dataset
 from .DOTA2 import DOTA2Dataset_v2
 from .DOTA2 import DOTA2Dataset_v3, DOTA2Dataset_v4
 from .HRSC import HRSCL1Dataset
+from .ann_cache import AnnCache, build_ann_cache
 from .coco import CocoDataset
 from .concat_dataset import ConcatDataset
 from .custom import CustomDataset
@@ -22,7 +24,8 @@ __all__ = [
     'DistributedGroupSampler', 'build_dataloader', 'to_tensor', 'random_scale',
     'show_ann', 'get_dataset', 'ConcatDataset', 'RepeatDataset',
     'ExtraAugmentation', 'HRSCL1Dataset', 'DOTADataset_v3',
-    'DOTA1_5Dataset', 'DOTA1_5Dataset_v3', 'DOTA1_5Dataset_v2', 'DOTA2Dataset_v4'
+    'DOTA1_5Dataset', 'DOTA1_5Dataset_v3', 'DOTA1_5Dataset_v2', 'DOTA2Dataset_v4',
+    'DOTAPatchDataset', 'DOTA1_5PatchDataset', 'AnnCache', 'build_ann_cache'
     ###############3
     ,'UCASAOD'
 ]
@@ -0,0 +1,170 @@
+import os
+import os.path as osp
+from collections.abc import Sequence
+
+import cv2
+import numpy as np
+from pycocotools.coco import COCO
+
+ANN_CACHE_FIELDS = ('img_ids', 'img_widths', 'img_heights', 'img_names',
+                    'img_name_offsets', 'cat_ids', 'ann_offsets',
+                    'ann_bboxes', 'ann_areas', 'ann_labels', 'ann_iscrowd',
+                    'ann_ignore', 'ann_quads', 'ann_seg_offsets',
+                    'seg_offsets', 'seg_coords')
+
+
+def ann_to_quad(ann):
+    """Quadrilateral (x1, y1, ..., x4, y4) of an annotation.
+
+    Polygons with more than 4 points are replaced by their min area
+    rectangle.
+    """
+    poly = max(ann['segmentation'], key=len)
+    if len(poly) != 8:
+        points = np.array(poly, dtype=np.float32).reshape(-1, 2)
+        poly = cv2.boxPoints(cv2.minAreaRect(points)).reshape(-1)
+    return poly
+
+
+def build_ann_cache(ann_file, cache_dir):
+    """Convert a COCO style annotation file to an annotation cache.
+
+    The cache is a directory of .npy columns, see `AnnCache`. Images and
+    annotations keep the order of pycocotools, so a dataset reads the same
+    annotations from the cache as from the json.
+
+    Args:
+        ann_file (str): COCO style json file.
+        cache_dir (str): Output directory.
+    """
+    coco = COCO(ann_file)
+    cat_ids = coco.getCatIds()
+    cat2label = {cat_id: i + 1 for i, cat_id in enumerate(cat_ids)}
+    img_ids = coco.getImgIds()
+
+    columns = {name: [] for name in ANN_CACHE_FIELDS}
+    names = []
+    ann_offsets = [0]
+    ann_seg_offsets = [0]
+    seg_offsets = [0]
+    for img_id in img_ids:
+        info = coco.loadImgs([img_id])[0]
+        columns['img_widths'].append(info['width'])
+        columns['img_heights'].append(info['height'])
+        names.append(info['file_name'].encode('utf-8'))
+        anns = coco.loadAnns(coco.getAnnIds(imgIds=[img_id]))
+        for ann in anns:
+            assert isinstance(ann['segmentation'], list), \
+                'only polygon segmentations can be cached'
+            columns['ann_bboxes'].append(ann['bbox'])
+            columns['ann_areas'].append(ann['area'])
+            columns['ann_labels'].append(cat2label[ann['category_id']])
+            columns['ann_iscrowd'].append(ann['iscrowd'])
+            columns['ann_ignore'].append(ann.get('ignore', False))
+            columns['ann_quads'].append(ann_to_quad(ann))
+            for poly in ann['segmentation']:
+                columns['seg_coords'].extend(poly)
+                seg_offsets.append(seg_offsets[-1] + len(poly))
+            ann_seg_offsets.append(len(seg_offsets) - 1)
+        ann_offsets.append(ann_offsets[-1] + len(anns))
+
+    arrays = dict(
+        img_ids=np.array(img_ids, dtype=np.int64),
+        img_widths=np.array(columns['img_widths'], dtype=np.int64),
+        img_heights=np.array(columns['img_heights'], dtype=np.int64),
+        img_names=np.frombuffer(b''.join(names), dtype=np.uint8),
+        img_name_offsets=np.cumsum([0] + [len(n) for n in names],
+                                   dtype=np.int64),
+        cat_ids=np.array(cat_ids, dtype=np.int64),
+        ann_offsets=np.array(ann_offsets, dtype=np.int64),
+        ann_bboxes=np.array(columns['ann_bboxes'],
+                            dtype=np.float64).reshape(-1, 4),
+        ann_areas=np.array(columns['ann_areas'], dtype=np.float64),
+        ann_labels=np.array(columns['ann_labels'], dtype=np.int64),
+        ann_iscrowd=np.array(columns['ann_iscrowd'], dtype=np.bool_),
+        ann_ignore=np.array(columns['ann_ignore'], dtype=np.bool_),
+        ann_quads=np.array(columns['ann_quads'],
+                           dtype=np.float32).reshape(-1, 8),
+        ann_seg_offsets=np.array(ann_seg_offsets, dtype=np.int64),
+        seg_offsets=np.array(seg_offsets, dtype=np.int64),
+        seg_coords=np.array(columns['seg_coords'], dtype=np.float32))
+    if not osp.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    for name in ANN_CACHE_FIELDS:
+        np.save(osp.join(cache_dir, name + '.npy'), arrays[name])
+
+
+class AnnCache(object):
+    """Columnar annotations memory mapped from a directory written by
+    `build_ann_cache`.
+
+    Image i has the annotations `ann_offsets[i]:ann_offsets[i + 1]`,
+    annotation j has the polygons `ann_seg_offsets[j]:ann_seg_offsets[j + 1]`
+    and polygon k the coordinates `seg_coords[seg_offsets[k]:
+    seg_offsets[k + 1]]`. The bboxes are (x, y, w, h) as in the json, the
+    quads are the (n, 8) polygons given by `ann_to_quad`.
+
+    The columns are opened with `mmap_mode='r'`, so the dataloader workers
+    share the pages instead of each holding a copy of the annotations.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        for name in ANN_CACHE_FIELDS:
+            setattr(self, name,
+                    np.load(osp.join(cache_dir, name + '.npy'),
+                            mmap_mode='r'))
+
+    def __len__(self):
+        return len(self.img_ids)
+
+    def __getstate__(self):
+        # reopen the memory maps instead of pickling the arrays
+        return {'cache_dir': self.cache_dir}
+
+    def __setstate__(self, state):
+        self.__init__(state['cache_dir'])
+
+    def filename(self, i):
+        start, end = self.img_name_offsets[i], self.img_name_offsets[i + 1]
+        return self.img_names[start:end].tobytes().decode('utf-8')
+
+    def img_info(self, i):
+        filename = self.filename(i)
+        return dict(
+            id=int(self.img_ids[i]),
+            file_name=filename,
+            filename=filename,
+            width=int(self.img_widths[i]),
+            height=int(self.img_heights[i]))
+
+    def segmentation(self, j):
+        """Polygons of annotation j, as lists like in the json."""
+        start, end = self.ann_seg_offsets[j], self.ann_seg_offsets[j + 1]
+        return [
+            self.seg_coords[self.seg_offsets[k]:self.seg_offsets[k + 1]]
+            .tolist() for k in range(start, end)
+        ]
+
+
+class ImageInfoTable(Sequence):
+    """Lazy list of the image infos of an `AnnCache`.
+
+    The info dicts are built when indexed instead of being held for every
+    image. `rows` are the indices of the images in the cache, indexing with
+    a list of indices gives the table of these images.
+    """
+
+    def __init__(self, ann_cache, rows=None):
+        self.ann_cache = ann_cache
+        if rows is None:
+            rows = np.arange(len(ann_cache))
+        self.rows = np.asarray(rows, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (list, tuple, np.ndarray)):
+            return ImageInfoTable(self.ann_cache, self.rows[idx])
+        return self.ann_cache.img_info(self.rows[idx])
@@ -1,6 +1,10 @@
+import os.path as osp
+
 import numpy as np
+import pycocotools.mask as maskUtils
 from pycocotools.coco import COCO
 
+from .ann_cache import AnnCache, ImageInfoTable, ann_to_quad
 from .custom import CustomDataset
 
 
@@ -22,6 +26,9 @@ class CocoDataset(CustomDataset):
                'vase', 'scissors', 'teddy_bear', 'hair_drier', 'toothbrush')
 
     def load_annotations(self, ann_file):
+        if osp.isdir(ann_file):
+            return self.load_ann_cache(ann_file)
+        self.ann_cache = None
         self.coco = COCO(ann_file)
         self.cat_ids = self.coco.getCatIds()
         self.cat2label = {
@@ -36,14 +43,53 @@ class CocoDataset(CustomDataset):
             img_infos.append(info)
         return img_infos
 
+    def load_ann_cache(self, cache_dir):
+        """Load the annotations from a cache written by `build_ann_cache`.
+
+        The images and annotations are memory mapped columns instead of the
+        pycocotools index, `self.coco` is None.
+        """
+        self.ann_cache = AnnCache(cache_dir)
+        self.coco = None
+        self.cat_ids = self.ann_cache.cat_ids.tolist()
+        self.cat2label = {
+            cat_id: i + 1
+            for i, cat_id in enumerate(self.cat_ids)
+        }
+        self.img_ids = self.ann_cache.img_ids
+        return ImageInfoTable(self.ann_cache)
+
     def get_ann_info(self, idx):
+        if self.ann_cache is not None:
+            return self._parse_cached_ann_info(self.img_infos.rows[idx],
+                                               self.with_mask, self.with_poly)
         img_id = self.img_infos[idx]['id']
         ann_ids = self.coco.getAnnIds(imgIds=[img_id])
         ann_info = self.coco.loadAnns(ann_ids)
-        return self._parse_ann_info(ann_info, self.with_mask)
+        return self._parse_ann_info(ann_info, self.with_mask, self.with_poly)
+
+    def _ann_to_poly(self, ann):
+        """Quadrilateral (x1, y1, ..., x4, y4) of an annotation, see
+        `ann_to_quad`."""
+        return ann_to_quad(ann)
+
+    def _ann_to_mask(self, ann):
+        return self.coco.annToMask(ann)
+
+    def _ann_valid_mask(self, areas, widths, heights):
+        """Whether the annotations of these areas and bbox sizes are kept,
+        on scalars in `_parse_ann_info` and on the cache columns in
+        `_parse_cached_ann_info`. Subclasses change the filter here."""
+        return (areas > 0) & (widths >= 1) & (heights >= 1)
 
     def _filter_imgs(self, min_size=32):
         """Filter images too small or without ground truths."""
+        if self.ann_cache is not None:
+            cache = self.ann_cache
+            rows = self.img_infos.rows
+            num_anns = cache.ann_offsets[rows + 1] - cache.ann_offsets[rows]
+            sizes = np.minimum(cache.img_widths[rows], cache.img_heights[rows])
+            return np.nonzero((num_anns > 0) & (sizes >= min_size))[0]
         valid_inds = []
         ids_with_ann = set(_['image_id'] for _ in self.coco.anns.values())
         for i, img_info in enumerate(self.img_infos):
@@ -53,16 +99,18 @@ class CocoDataset(CustomDataset):
                 valid_inds.append(i)
         return valid_inds
 
-    def _parse_ann_info(self, ann_info, with_mask=True):
+    def _parse_ann_info(self, ann_info, with_mask=True, with_poly=False):
         """Parse bbox and mask annotation.
 
         Args:
             ann_info (list[dict]): Annotation info of an image.
             with_mask (bool): Whether to parse mask annotations.
+            with_poly (bool): Whether to parse (n, 8) polygons of the gt
+                bboxes instead of masks.
 
         Returns:
             dict: A dict containing the following keys: bboxes, bboxes_ignore,
-                labels, masks, mask_polys, poly_lens.
+                labels, masks, mask_polys, poly_lens, polys.
         """
         gt_bboxes = []
         gt_labels = []
@@ -71,6 +119,8 @@ class CocoDataset(CustomDataset):
         # 1. mask: a binary map of the same size of the image.
         # 2. polys: each mask consists of one or several polys, each poly is a
         # list of float.
+        if with_poly:
+            gt_polys = []
         if with_mask:
             gt_masks = []
             gt_mask_polys = []
@@ -79,7 +129,7 @@ class CocoDataset(CustomDataset):
             if ann.get('ignore', False):
                 continue
             x1, y1, w, h = ann['bbox']
-            if ann['area'] <= 0 or w < 1 or h < 1:
+            if not self._ann_valid_mask(ann['area'], w, h):
                 continue
             bbox = [x1, y1, x1 + w - 1, y1 + h - 1]
             if ann['iscrowd']:
@@ -87,8 +137,10 @@ class CocoDataset(CustomDataset):
             else:
                 gt_bboxes.append(bbox)
                 gt_labels.append(self.cat2label[ann['category_id']])
+                if with_poly:
+                    gt_polys.append(self._ann_to_poly(ann))
             if with_mask:
-                gt_masks.append(self.coco.annToMask(ann))
+                gt_masks.append(self._ann_to_mask(ann))
                 mask_polys = [
                     p for p in ann['segmentation'] if len(p) >= 6
                 ]  # valid polygons have >= 3 points (6 coordinates)
@@ -110,9 +162,48 @@ class CocoDataset(CustomDataset):
         ann = dict(
             bboxes=gt_bboxes, labels=gt_labels, bboxes_ignore=gt_bboxes_ignore)
 
+        if with_poly:
+            ann['polys'] = np.array(
+                gt_polys, dtype=np.float32).reshape(-1, 8)
         if with_mask:
             ann['masks'] = gt_masks
             # poly format is not used in the current implementation
             ann['mask_polys'] = gt_mask_polys
             ann['poly_lens'] = gt_poly_lens
         return ann
+
+    def _parse_cached_ann_info(self, row, with_mask=True, with_poly=False):
+        """Vectorized `_parse_ann_info` of the image `row` of the cache."""
+        cache = self.ann_cache
+        start, end = cache.ann_offsets[row], cache.ann_offsets[row + 1]
+        x1, y1, w, h = np.array(cache.ann_bboxes[start:end]).T
+        keep = ~cache.ann_ignore[start:end] & self._ann_valid_mask(
+            cache.ann_areas[start:end], w, h)
+        bboxes = np.stack([x1, y1, x1 + w - 1, y1 + h - 1], axis=1)
+        crowd = cache.ann_iscrowd[start:end]
+        gt = keep & ~crowd
+
+        ann = dict(
+            bboxes=bboxes[gt].astype(np.float32),
+            labels=np.array(cache.ann_labels[start:end][gt]),
+            bboxes_ignore=bboxes[keep & crowd].astype(np.float32))
+        if with_poly:
+            ann['polys'] = np.array(cache.ann_quads[start:end][gt])
+        if with_mask:
+            height = int(cache.img_heights[row])
+            width = int(cache.img_widths[row])
+            gt_masks = []
+            gt_mask_polys = []
+            gt_poly_lens = []
+            for j in start + np.nonzero(keep)[0]:
+                segm = cache.segmentation(j)
+                rles = maskUtils.frPyObjects(segm, height, width)
+                gt_masks.append(maskUtils.decode(maskUtils.merge(rles)))
+                # valid polygons have >= 3 points (6 coordinates)
+                mask_polys = [p for p in segm if len(p) >= 6]
+                gt_mask_polys.append(mask_polys)
+                gt_poly_lens.extend(len(p) for p in mask_polys)
+            ann['masks'] = gt_masks
+            ann['mask_polys'] = gt_mask_polys
+            ann['poly_lens'] = gt_poly_lens
+        return ann
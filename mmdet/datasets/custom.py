@@ -6,8 +6,9 @@ from mmcv.parallel import DataContainer as DC
 from torch.utils.data import Dataset
 import cv2
 
+from mmdet.core import gt_poly_bp_obbs
 from .transforms import (ImageTransform, BboxTransform, MaskTransform,
-                         SegMapTransform, Numpy2Tensor)
+                         PolyTransform, SegMapTransform, Numpy2Tensor)
 from .utils import to_tensor, random_scale
 from .extra_aug import ExtraAugmentation
 from .rotate_aug import RotateAugmentation
@@ -27,13 +28,18 @@ class CustomDataset(Dataset):
                 'bboxes': <np.ndarray> (n, 4),
                 'labels': <np.ndarray> (n, ),
                 'bboxes_ignore': <np.ndarray> (k, 4),
-                'labels_ignore': <np.ndarray> (k, 4) (optional field)
+                'labels_ignore': <np.ndarray> (k, 4) (optional field),
+                'polys': <np.ndarray> (n, 8) (only with `with_poly`)
             }
         },
         ...
     ]
 
     The `ann` field is optional for testing.
+
+    With `with_poly=True` the gt are kept as (n, 8) polygons through the
+    augmentations instead of full image binary masks, and `gt_obbs` (n, 5)
+    are fed to the detector in place of `gt_masks`.
     """
 
     CLASSES = None
@@ -51,6 +57,7 @@ class CustomDataset(Dataset):
                  with_mask=True,
                  with_crowd=True,
                  with_label=True,
+                 with_poly=False,
                  with_semantic_seg=False,
                  seg_prefix=None,
                  seg_scale_factor=1,
@@ -73,7 +80,11 @@ class CustomDataset(Dataset):
         # filter images with no annotation during training
         if not test_mode:
             valid_inds = self._filter_imgs()
-            self.img_infos = [self.img_infos[i] for i in valid_inds]
+            if isinstance(self.img_infos, list):
+                self.img_infos = [self.img_infos[i] for i in valid_inds]
+            else:
+                # lazy tables, e.g. ImageInfoTable
+                self.img_infos = self.img_infos[valid_inds]
             if self.proposals is not None:
                 self.proposals = [self.proposals[i] for i in valid_inds]
 
@@ -104,6 +115,10 @@ class CustomDataset(Dataset):
         self.with_crowd = with_crowd
         # with label is False for RPN
         self.with_label = with_label
+        # keep gt as polygons instead of masks
+        self.with_poly = with_poly
+        assert not (with_poly and with_mask), \
+            'with_poly replaces the masks, set with_mask=False'
         # with semantic segmentation (stuff) annotation or not
         self.with_seg = with_semantic_seg
         # prefix of semantic segmentation map path
@@ -124,6 +139,7 @@ class CustomDataset(Dataset):
             size_divisor=self.size_divisor, **self.img_norm_cfg)
         self.bbox_transform = BboxTransform()
         self.mask_transform = MaskTransform()
+        self.poly_transform = PolyTransform()
         self.seg_transform = SegMapTransform(self.size_divisor)
         self.numpy2tensor = Numpy2Tensor()
 
@@ -160,6 +176,10 @@ class CustomDataset(Dataset):
     def get_ann_info(self, idx):
         return self.img_infos[idx]['ann']
 
+    def load_image(self, idx):
+        return mmcv.imread(
+            osp.join(self.img_prefix, self.img_infos[idx]['filename']))
+
     def _filter_imgs(self, min_size=32):
         """Filter images too small."""
         valid_inds = []
@@ -207,7 +227,7 @@ class CustomDataset(Dataset):
     def prepare_train_img(self, idx):
         img_info = self.img_infos[idx]
         # load image
-        img = mmcv.imread(osp.join(self.img_prefix, img_info['filename']))
+        img = self.load_image(idx)
         # load proposals if necessary
         if self.proposals is not None:
             proposals = self.proposals[idx][:self.num_max_proposals]
@@ -232,6 +252,8 @@ class CustomDataset(Dataset):
 
         if self.with_mask:
             gt_masks = ann['masks']
+        if self.with_poly:
+            gt_polys = ann['polys']
         if self.with_crowd:
             gt_bboxes_ignore = ann['bboxes_ignore']
 
@@ -246,9 +268,13 @@ class CustomDataset(Dataset):
 
         # rotate augmentation
         if self.rotate_aug is not None:
-            # only support mask now, TODO: support none mask version
-            img, gt_bboxes, gt_masks, gt_labels = self.rotate_aug(img, gt_bboxes,
-                                                                  gt_masks, gt_labels, img_info['filename'])
+            if self.with_poly:
+                # the polygons are rotated directly, no masks involved
+                img, gt_bboxes, gt_polys, gt_labels = self.rotate_aug(img, gt_bboxes,
+                                                                      gt_polys, gt_labels, img_info['filename'])
+            else:
+                img, gt_bboxes, gt_masks, gt_labels = self.rotate_aug(img, gt_bboxes,
+                                                                      gt_masks, gt_labels, img_info['filename'])
 
             gt_bboxes = np.array(gt_bboxes).astype(np.float32)
             # skip the image if there is no valid gt bbox
@@ -285,6 +311,9 @@ class CustomDataset(Dataset):
             #                                scale_factor, flip)
             gt_masks = self.mask_transform(gt_masks, pad_shape,
                                            scale_factor, flip)
+        if self.with_poly:
+            gt_polys = self.poly_transform(gt_polys, img_shape, scale_factor,
+                                           flip)
 
         ori_shape = (img_info['height'], img_info['width'], 3)
         img_meta = dict(
@@ -319,6 +348,8 @@ class CustomDataset(Dataset):
             data['gt_bboxes_ignore'] = DC(to_tensor(gt_bboxes_ignore))
         if self.with_mask:
             data['gt_masks'] = DC(gt_masks, cpu_only=True)
+        if self.with_poly:
+            data['gt_obbs'] = DC(gt_poly_bp_obbs(gt_polys), cpu_only=True)
         if self.with_seg:
             data['gt_semantic_seg'] = DC(to_tensor(gt_seg), stack=True)
         return data
@@ -326,7 +357,7 @@ class CustomDataset(Dataset):
     def prepare_test_img(self, idx):
         """Prepare an image for testing (multi-scale and flipping)"""
         img_info = self.img_infos[idx]
-        img = mmcv.imread(osp.join(self.img_prefix, img_info['filename']))
+        img = self.load_image(idx)
         if self.proposals is not None:
             proposal = self.proposals[idx][:self.num_max_proposals]
             if not (proposal.shape[1] == 4 or proposal.shape[1] == 5):
@@ -399,13 +430,13 @@ class CustomDataset(Dataset):
                 with open(img_info['filename'] + '.txt', 'w') as f:
                     f.write(img_path)
 
-            imgs.append(_img)
+            imgs.append(DC(_img, stack=True))
             img_metas.append(DC(_img_meta, cpu_only=True))
             proposals.append(_proposal)
             if self.flip_ratio > 0:
                 _img, _img_meta, _proposal = prepare_single(
                     img, scale, True, proposal)
-                imgs.append(_img)
+                imgs.append(DC(_img, stack=True))
                 img_metas.append(DC(_img_meta, cpu_only=True))
                 proposals.append(_proposal)
         if self.rotate_test_aug is not None:
@@ -418,13 +449,13 @@ class CustomDataset(Dataset):
                 for scale in self.img_scales:
                     _img, _img_meta, = prepare_rotation_single(
                         img, scale, False, angle)
-                    imgs.append(_img)
+                    imgs.append(DC(_img, stack=True))
                     img_metas.append(DC(_img_meta, cpu_only=True))
                     # proposals.append(_proposal)
                     if self.flip_ratio > 0:
                         _img, _img_meta = prepare_rotation_single(
                             img, scale, True, proposal, angle)
-                        imgs.append(_img)
+                        imgs.append(DC(_img, stack=True))
                         img_metas.append(DC(_img_meta, cpu_only=True))
                     # # # # TODO: rm if after debug
                     # if angle == 180:
@@ -0,0 +1,71 @@
+import os.path as osp
+import shutil
+import tempfile
+import unittest
+
+import mmcv
+import numpy as np
+
+from mmdet.datasets import CustomDataset, build_dataloader
+
+
+class TestCustomDatasetBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.tmp_dir = tempfile.mkdtemp()
+        # a landscape and a portrait image, resized and padded to different
+        # shapes
+        img_infos = []
+        for i, (h, w) in enumerate([(200, 300), (300, 160)]):
+            filename = '{}.png'.format(i)
+            img = rng.randint(0, 256, (h, w, 3)).astype(np.uint8)
+            mmcv.imwrite(img, osp.join(self.tmp_dir, filename))
+            img_infos.append(dict(filename=filename, width=w, height=h))
+        ann_file = osp.join(self.tmp_dir, 'ann.pkl')
+        mmcv.dump(img_infos, ann_file)
+        self.dataset = CustomDataset(
+            ann_file=ann_file,
+            img_prefix=self.tmp_dir,
+            img_scale=(400, 200),
+            img_norm_cfg=dict(
+                mean=[123.675, 116.28, 103.53],
+                std=[58.395, 57.12, 57.375],
+                to_rgb=True),
+            size_divisor=32,
+            with_mask=False,
+            test_mode=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_batch_of_different_sizes(self):
+        data_loader = build_dataloader(
+            self.dataset,
+            imgs_per_gpu=2,
+            workers_per_gpu=0,
+            dist=False,
+            shuffle=False)
+        data = next(iter(data_loader))
+        img = data['img'][0].data[0]
+        img_metas = data['img_meta'][0].data[0]
+        self.assertEqual(len(img_metas), 2)
+
+        imgs = [self.dataset[i]['img'][0].data for i in range(2)]
+        self.assertNotEqual(imgs[0].shape, imgs[1].shape)
+        h = max(single.size(1) for single in imgs)
+        w = max(single.size(2) for single in imgs)
+        self.assertEqual(tuple(img.shape), (2, 3, h, w))
+        # each image is zero padded at the bottom and the right
+        for i, single in enumerate(imgs):
+            self.assertEqual(img_metas[i]['pad_shape'][:2],
+                             tuple(single.shape[1:]))
+            np.testing.assert_array_equal(
+                img[i, :, :single.size(1), :single.size(2)].numpy(),
+                single.numpy())
+            self.assertEqual(img[i, :, single.size(1):].abs().sum(), 0)
+            self.assertEqual(img[i, :, :, single.size(2):].abs().sum(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
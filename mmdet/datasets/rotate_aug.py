@@ -78,6 +78,9 @@ class RotateAugmentation(object):
     """
     1. rotate image and polygons, transfer polygons to masks
     2. polygon 2 mask
+
+    `masks` can also be an (n, 8) array of polygons, they are then rotated
+    directly and returned as polygons, without any mask
     """
 
     def __init__(self,
@@ -139,13 +142,20 @@ class RotateAugmentation(object):
             h = int(np.round(new_h))
         rotated_img = cv2.warpAffine(img, matrix, (w, h), borderValue=self.border_value)
 
-        polys = mask2poly(masks)
+        with_poly = isinstance(masks, np.ndarray) and masks.ndim == 2
+        if with_poly:
+            polys = masks.astype(np.float64)
+        else:
+            polys = mask2poly(masks)
 
         rotated_polys = rotate_poly(img.shape[0], img.shape[1], h, w, matrix_T, np.array(polys))
 
-        rotated_polys_np = np.array(rotated_polys)
-        # add dimension in poly2mask
-        rotated_masks = poly2mask(rotated_polys_np[:, np.newaxis, :].tolist(), h, w)
+        rotated_polys_np = np.array(rotated_polys).reshape(-1, 8)
+        if with_poly:
+            rotated_masks = rotated_polys_np.astype(np.float32)
+        else:
+            # add dimension in poly2mask
+            rotated_masks = poly2mask(rotated_polys_np[:, np.newaxis, :].tolist(), h, w)
         rotated_boxes = poly2bbox(rotated_polys_np).astype(np.float32)
 
         # True rotated h, sqrt((x1-x2)^2 + (y1-y2)^2)
@@ -162,7 +172,7 @@ class RotateAugmentation(object):
             labels = labels[keep_inds]
         else:
             rotated_boxes = np.zeros((0, 4), dtype=np.float32).tolist()
-            rotated_masks = []
+            rotated_masks = np.zeros((0, 8), dtype=np.float32) if with_poly else []
             labels = np.array([], dtype=np.int64)
 
         return rotated_img, rotated_boxes, rotated_masks, labels
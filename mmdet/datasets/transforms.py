@@ -3,8 +3,8 @@ import numpy as np
 import torch
 
 __all__ = [
-    'ImageTransform', 'BboxTransform', 'MaskTransform', 'SegMapTransform',
-    'Numpy2Tensor'
+    'ImageTransform', 'BboxTransform', 'MaskTransform', 'PolyTransform',
+    'SegMapTransform', 'Numpy2Tensor'
 ]
 
 
@@ -112,6 +112,25 @@ class MaskTransform(object):
         return padded_masks
 
 
+class PolyTransform(object):
+    """Preprocess gt polygons, the counterpart of `MaskTransform` when the
+    annotations are kept as (n, 8) polygons.
+
+    1. rescale polygons according to image size
+    2. flip polygons (if needed)
+    """
+
+    def __call__(self, polys, img_shape, scale_factor, flip=False):
+        if isinstance(scale_factor, np.ndarray):
+            # (w_scale, h_scale, w_scale, h_scale) to the 4 points
+            scale_factor = np.tile(scale_factor, 2)
+        gt_polys = polys * scale_factor
+        if flip:
+            # same convention as bbox_flip and the flipped masks
+            gt_polys[:, 0::2] = img_shape[1] - gt_polys[:, 0::2] - 1
+        return gt_polys.astype(np.float32)
+
+
 class SegMapTransform(object):
     """Preprocess semantic segmentation maps.
 
@@ -5,7 +5,7 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 from mmcv.cnn import normal_init
-from mmdet.core import (AnchorGeneratorRbbox, anchor_target_rbbox, dbbox2delta, RotBox2Polys_torch,
+from mmdet.core import (AnchorCache, AnchorGeneratorRbbox, anchor_target_rbbox, dbbox2delta, RotBox2Polys_torch,
                         multi_apply, multiclass_nms)
 from mmdet.ops.nms.rnms_wrapper import py_cpu_nms_poly_fast
 
@@ -27,6 +27,7 @@ class RPNHeadRbbox(nn.Module):
                  anchor_base_sizes=None,
                  target_means=(.0, .0, .0, .0),
                  target_stds=(1.0, 1.0, 1.0, 1.0),
+                 anchor_cache_size=64,
                  loss_cls=dict(
                      type='CrossEntropyLoss',
                      use_sigmoid=True,
@@ -60,6 +61,10 @@ class RPNHeadRbbox(nn.Module):
         for anchor_base in self.anchor_base_sizes:
             self.anchor_generators.append(
                 AnchorGeneratorRbbox(anchor_base, anchor_scales, anchor_ratios, anchor_angles))
+        # anchors, valid flags and inside flags reused across iterations
+        self.anchor_cache = AnchorCache(self.anchor_generators,
+                                        self.anchor_strides,
+                                        max_size=anchor_cache_size)
 
         self.num_anchors = len(self.anchor_ratios) * len(self.anchor_scales) * len(self.anchor_angles)
         self._init_layers()
@@ -86,12 +91,16 @@ class RPNHeadRbbox(nn.Module):
     def forward(self, feats):
         return multi_apply(self.forward_single, feats)
 
-    def get_anchors(self, featmap_sizes, img_metas):
+    def get_anchors(self, featmap_sizes, img_metas, device='cuda'):
         """Get anchors according to feature map sizes.
 
+        The anchors and valid flags are looked up in `self.anchor_cache`, so
+        images of the same size share them.
+
         Args:
             featmap_sizes (list[tuple]): Multi-level feature map sizes.
             img_metas (list[dict]): Image meta info.
+            device (torch.device | str): Device of the anchors.
 
         Returns:
             tuple: anchors of each image, valid flags of each image
@@ -101,30 +110,32 @@ class RPNHeadRbbox(nn.Module):
 
         # since feature map sizes of all images are the same, we only compute
         # anchors for one time
-        multi_level_anchors = []
-        for i in range(num_levels):
-            anchors = self.anchor_generators[i].grid_anchors(
-                featmap_sizes[i], self.anchor_strides[i])
-            multi_level_anchors.append(anchors)
+        multi_level_anchors = [
+            self.anchor_cache.grid_anchors(i, featmap_sizes[i], device)
+            for i in range(num_levels)
+        ]
         anchor_list = [multi_level_anchors for _ in range(num_imgs)]
 
         # for each image, we compute valid flags of multi level anchors
-        valid_flag_list = []
-        for img_id, img_meta in enumerate(img_metas):
-            multi_level_flags = []
-            for i in range(num_levels):
-                anchor_stride = self.anchor_strides[i]
-                feat_h, feat_w = featmap_sizes[i]
-                h, w, _ = img_meta['pad_shape']
-                valid_feat_h = min(int(np.ceil(h / anchor_stride)), feat_h)
-                valid_feat_w = min(int(np.ceil(w / anchor_stride)), feat_w)
-                flags = self.anchor_generators[i].valid_flags(
-                    (feat_h, feat_w), (valid_feat_h, valid_feat_w))
-                multi_level_flags.append(flags)
-            valid_flag_list.append(multi_level_flags)
+        valid_flag_list = [[
+            self.anchor_cache.valid_flags(i, featmap_sizes[i],
+                                          img_meta['pad_shape'], device)
+            for i in range(num_levels)
+        ] for img_meta in img_metas]
 
         return anchor_list, valid_flag_list
 
+    def get_inside_flags(self, featmap_sizes, img_metas, cfg, device='cuda'):
+        """Flags of the valid anchors inside each image, see
+        `AnchorCache.inside_flags`."""
+        return [
+            self.anchor_cache.inside_flags(featmap_sizes,
+                                           img_meta['pad_shape'],
+                                           img_meta['img_shape'],
+                                           cfg.allowed_border, device)
+            for img_meta in img_metas
+        ]
+
     def loss_single(self, cls_score, bbox_pred, labels, label_weights,
                     bbox_targets, bbox_weights, num_total_samples, cfg):
         # classification loss
@@ -156,8 +167,11 @@ class RPNHeadRbbox(nn.Module):
         featmap_sizes = [featmap.size()[-2:] for featmap in cls_scores]
         assert len(featmap_sizes) == len(self.anchor_generators)
 
+        device = cls_scores[0].device
         anchor_list, valid_flag_list = self.get_anchors(
-            featmap_sizes, img_metas)
+            featmap_sizes, img_metas, device=device)
+        inside_flag_list = self.get_inside_flags(
+            featmap_sizes, img_metas, cfg, device=device)
         label_channels = self.cls_out_channels if self.use_sigmoid_cls else 1
         cls_reg_targets = anchor_target_rbbox(
             anchor_list,
@@ -172,7 +186,8 @@ class RPNHeadRbbox(nn.Module):
             gt_labels_list=None,
             label_channels=label_channels,
             sampling=self.sampling,
-            hbb_trans='obb2obb')
+            hbb_trans='obb2obb',
+            inside_flag_list=inside_flag_list)
         if cls_reg_targets is None:
             return None
         (labels_list, label_weights_list, bbox_targets_list, bbox_weights_list,
@@ -197,8 +212,8 @@ class RPNHeadRbbox(nn.Module):
         num_levels = len(cls_scores)
 
         mlvl_anchors = [
-            self.anchor_generators[i].grid_anchors(cls_scores[i].size()[-2:],
-                                                   self.anchor_strides[i])
+            self.anchor_cache.grid_anchors(i, cls_scores[i].size()[-2:],
+                                           cls_scores[i].device)
             for i in range(num_levels)
         ]
         result_list = []
@@ -1,7 +1,15 @@
 from .hrnet import HRNet
-from .re_resnet import ReResNet
+from .re_resnet_plain import ReResNetPlain
 from .resnet import ResNet, make_res_layer
 from .resnext import ResNeXt
 from .ssd_vgg import SSDVGG
 
-__all__ = ['ResNet', 'make_res_layer', 'ResNeXt', 'SSDVGG', 'HRNet', 'ReResNet']
+__all__ = ['ResNet', 'make_res_layer', 'ResNeXt', 'SSDVGG', 'HRNet',
+           'ReResNetPlain']
+
+try:
+    from .re_resnet import ReResNet
+    __all__.append('ReResNet')
+except ImportError:
+    # e2cnn is only needed to train ReDet, exported models use ReResNetPlain
+    pass
@@ -12,7 +12,9 @@ from mmcv.cnn import (constant_init, kaiming_init)
 from torch.nn.modules.batchnorm import _BatchNorm
 
 from .base_backbone import BaseBackbone
+from .re_resnet_plain import ReResNetPlain
 from ..builder import BACKBONES
+from ..utils import fuse_conv_bn
 
 # Set default Orientation=8, .i.e, the group C8
 # One can change it by passing the env Orientation=xx
@@ -132,6 +134,12 @@ def build_norm_layer(cfg, num_features, postfix=''):
     return 'bn' + str(postfix), enn.InnerBatchNorm(in_type)
 
 
+def export_conv_norm(conv, norm, plain_conv):
+    """Load an R2Conv followed by an InnerBatchNorm into a plain Conv2d."""
+    fused = fuse_conv_bn(conv.export(), norm.export())
+    plain_conv.load_state_dict(fused.state_dict())
+
+
 class BasicBlock(enn.EquivariantModule):
     """BasicBlock for ReResNet.
 
@@ -722,6 +730,45 @@ class ReResNet(BaseBackbone):
         else:
             return tuple(outs)
 
+    def export(self):
+        """Export to an equivalent ReResNetPlain of torch.nn layers.
+
+        The equivariant filters are expanded and the batch norms are folded
+        into them, so the result is only meant for inference.
+        """
+        self.eval()
+        plain = ReResNetPlain(
+            self.depth,
+            in_channels=self.in_type.size,
+            stem_channels=self.stem_channels,
+            base_channels=self.base_channels,
+            expansion=self.expansion,
+            num_stages=self.num_stages,
+            strides=self.strides,
+            dilations=self.dilations,
+            out_indices=self.out_indices,
+            style=self.style,
+            deep_stem=self.deep_stem,
+            avg_down=self.avg_down,
+            orientation=Orientation,
+            fixparams=fixparams)
+        export_conv_norm(self.conv1, self.norm1, plain.conv1)
+        for layer_name in self.res_layers:
+            for block, plain_block in zip(
+                    getattr(self, layer_name), getattr(plain, layer_name)):
+                num_convs = 3 if isinstance(block, Bottleneck) else 2
+                for i in range(1, num_convs + 1):
+                    export_conv_norm(
+                        getattr(block, 'conv{}'.format(i)),
+                        getattr(block, 'norm{}'.format(i)),
+                        getattr(plain_block, 'conv{}'.format(i)))
+                if block.downsample is not None:
+                    # ([avg pool], conv, norm)
+                    conv, norm = list(block.downsample.children())[-2:]
+                    export_conv_norm(conv, norm, plain_block.downsample[-1])
+        plain.eval()
+        return plain
+
     def train(self, mode=True):
         super(ReResNet, self).train(mode)
         self._freeze_stages()
@@ -0,0 +1,229 @@
+import math
+
+import torch.nn as nn
+
+from .base_backbone import BaseBackbone
+from ..registry import BACKBONES
+
+
+def regular_channels(planes, orientation=8, fixparams=False):
+    """Number of channels of the regular feature type of ReResNet/ReFPN."""
+    if fixparams:
+        planes *= math.sqrt(orientation)
+    return int(planes / orientation) * orientation
+
+
+class BasicBlockPlain(nn.Module):
+    """BasicBlock of ReResNetPlain, the norm layers are folded into the
+    convs."""
+
+    def __init__(self,
+                 in_channels,
+                 mid_channels,
+                 out_channels,
+                 stride=1,
+                 dilation=1,
+                 downsample=None,
+                 style='pytorch'):
+        super(BasicBlockPlain, self).__init__()
+        self.out_channels = out_channels
+        self.conv1 = nn.Conv2d(
+            in_channels,
+            mid_channels,
+            3,
+            stride=stride,
+            padding=dilation,
+            dilation=dilation)
+        self.conv2 = nn.Conv2d(mid_channels, out_channels, 3, padding=1)
+        self.relu = nn.ReLU(inplace=True)
+        self.downsample = downsample
+
+    def forward(self, x):
+        identity = x
+
+        out = self.conv1(x)
+        out = self.relu(out)
+        out = self.conv2(out)
+
+        if self.downsample is not None:
+            identity = self.downsample(x)
+
+        out += identity
+        out = self.relu(out)
+
+        return out
+
+
+class BottleneckPlain(nn.Module):
+    """Bottleneck of ReResNetPlain, the norm layers are folded into the
+    convs."""
+
+    def __init__(self,
+                 in_channels,
+                 mid_channels,
+                 out_channels,
+                 stride=1,
+                 dilation=1,
+                 downsample=None,
+                 style='pytorch'):
+        super(BottleneckPlain, self).__init__()
+        assert style in ['pytorch', 'caffe']
+        self.out_channels = out_channels
+        if style == 'pytorch':
+            conv1_stride = 1
+            conv2_stride = stride
+        else:
+            conv1_stride = stride
+            conv2_stride = 1
+        self.conv1 = nn.Conv2d(
+            in_channels, mid_channels, 1, stride=conv1_stride)
+        self.conv2 = nn.Conv2d(
+            mid_channels,
+            mid_channels,
+            3,
+            stride=conv2_stride,
+            padding=dilation,
+            dilation=dilation)
+        self.conv3 = nn.Conv2d(mid_channels, out_channels, 1)
+        self.relu = nn.ReLU(inplace=True)
+        self.downsample = downsample
+
+    def forward(self, x):
+        identity = x
+
+        out = self.conv1(x)
+        out = self.relu(out)
+        out = self.conv2(out)
+        out = self.relu(out)
+        out = self.conv3(out)
+
+        if self.downsample is not None:
+            identity = self.downsample(x)
+
+        out += identity
+        out = self.relu(out)
+
+        return out
+
+
+@BACKBONES.register_module
+class ReResNetPlain(BaseBackbone):
+    """ReResNet exported to plain torch.nn layers.
+
+    The equivariant convs of ReResNet are expanded to ordinary filters and the
+    batch norms are folded into them, so this backbone gives the same features
+    without e2cnn and is only meant for inference. It is produced by
+    `ReResNet.export()`, see `tools/export_redet.py`.
+
+    Args:
+        depth (int): Network depth, from {18, 34, 50, 101, 152}.
+        orientation (int): Orientation (order of the rotation group) of the
+            exported ReResNet. Default: 8.
+        fixparams (bool): Whether the exported ReResNet used fixparams.
+            Default: False.
+        Other arguments are the same as ReResNet, the training only ones
+        (frozen_stages, norm_cfg, norm_eval, with_cp, ...) are ignored.
+    """
+
+    arch_settings = {
+        18: (BasicBlockPlain, 1, (2, 2, 2, 2)),
+        34: (BasicBlockPlain, 1, (3, 4, 6, 3)),
+        50: (BottleneckPlain, 4, (3, 4, 6, 3)),
+        101: (BottleneckPlain, 4, (3, 4, 23, 3)),
+        152: (BottleneckPlain, 4, (3, 8, 36, 3))
+    }
+
+    def __init__(self,
+                 depth,
+                 in_channels=3,
+                 stem_channels=64,
+                 base_channels=64,
+                 expansion=None,
+                 num_stages=4,
+                 strides=(1, 2, 2, 2),
+                 dilations=(1, 1, 1, 1),
+                 out_indices=(3,),
+                 style='pytorch',
+                 deep_stem=False,
+                 avg_down=False,
+                 orientation=8,
+                 fixparams=False,
+                 **kwargs):
+        super(ReResNetPlain, self).__init__()
+        if depth not in self.arch_settings:
+            raise KeyError('invalid depth {} for resnet'.format(depth))
+        assert not deep_stem, 'ReResNet has no deep stem'
+        assert len(strides) == len(dilations) == num_stages
+        assert max(out_indices) < num_stages
+        self.depth = depth
+        self.out_indices = out_indices
+        self.orientation = orientation
+        self.fixparams = fixparams
+
+        block, default_expansion, stage_blocks = self.arch_settings[depth]
+        expansion = expansion or default_expansion
+
+        def channels(planes):
+            return regular_channels(planes, orientation, fixparams)
+
+        self.conv1 = nn.Conv2d(
+            in_channels, channels(stem_channels), 7, stride=2, padding=3)
+        self.relu = nn.ReLU(inplace=True)
+        self.maxpool = nn.MaxPool2d(kernel_size=3, stride=2, padding=1)
+
+        self.res_layers = []
+        _in_channels = stem_channels
+        _out_channels = base_channels * expansion
+        for i, num_blocks in enumerate(stage_blocks[:num_stages]):
+            stride = strides[i]
+            downsample = None
+            if stride != 1 or _in_channels != _out_channels:
+                downsample = []
+                conv_stride = stride
+                if avg_down and stride != 1:
+                    conv_stride = 1
+                    downsample.append(
+                        nn.AvgPool2d(
+                            kernel_size=stride, stride=stride,
+                            ceil_mode=True))
+                downsample.append(
+                    nn.Conv2d(
+                        channels(_in_channels),
+                        channels(_out_channels),
+                        1,
+                        stride=conv_stride))
+                downsample = nn.Sequential(*downsample)
+            layers = []
+            for j in range(num_blocks):
+                layers.append(
+                    block(
+                        channels(_in_channels if j == 0 else _out_channels),
+                        channels(_out_channels // expansion),
+                        channels(_out_channels),
+                        stride=stride if j == 0 else 1,
+                        dilation=dilations[i],
+                        downsample=downsample if j == 0 else None,
+                        style=style))
+            _in_channels = _out_channels
+            _out_channels *= 2
+            layer_name = 'layer{}'.format(i + 1)
+            self.add_module(layer_name, nn.Sequential(*layers))
+            self.res_layers.append(layer_name)
+
+        self.feat_dim = layers[-1].out_channels
+
+    def forward(self, x):
+        x = self.conv1(x)
+        x = self.relu(x)
+        x = self.maxpool(x)
+        outs = []
+        for i, layer_name in enumerate(self.res_layers):
+            res_layer = getattr(self, layer_name)
+            x = res_layer(x)
+            if i in self.out_indices:
+                outs.append(x)
+
+        if len(outs) == 1:
+            return outs[0]
+        else:
+            return tuple(outs)
@@ -22,6 +22,9 @@ from ..registry import DETECTORS
 @DETECTORS.register_module
 class ReDet(BaseDetectorNew, RPNTestMixin):
 
+    # simple_test takes a batch of images
+    supports_batch_test = True
+
     def __init__(self,
                  backbone,
                  neck=None,
@@ -37,8 +40,11 @@ class ReDet(BaseDetectorNew, RPNTestMixin):
                  train_cfg=None,
                  test_cfg=None,
                  pretrained=None):
-        assert backbone['type'] == 'ReResNet', 'ReDet only supports ReResNet backbone'
-        assert neck['type'] == 'ReFPN', 'ReDet only supports ReFPN neck'
+        # the Plain variants are ReResNet/ReFPN exported to torch.nn layers
+        assert backbone['type'] in ('ReResNet', 'ReResNetPlain'), \
+            'ReDet only supports ReResNet backbone'
+        assert neck['type'] in ('ReFPN', 'ReFPNPlain'), \
+            'ReDet only supports ReFPN neck'
         assert bbox_roi_extractor is not None
         assert bbox_head is not None
         assert rbbox_roi_extractor is not None
@@ -128,12 +134,14 @@ class ReDet(BaseDetectorNew, RPNTestMixin):
                       gt_labels,
                       gt_bboxes_ignore=None,
                       gt_masks=None,
-                      proposals=None):
+                      proposals=None,
+                      gt_obbs=None):
         x = self.extract_feat(img)
 
         losses = dict()
-        # trans gt_masks to gt_obbs
-        gt_obbs = gt_mask_bp_obbs_list(gt_masks)
+        # trans gt_masks to gt_obbs, unless the dataset gives them directly
+        if gt_obbs is None:
+            gt_obbs = gt_mask_bp_obbs_list(gt_masks)
         # RPN forward and loss
         if self.with_rpn:
             rpn_outs = self.rpn_head(x)
@@ -182,7 +190,8 @@ class ReDet(BaseDetectorNew, RPNTestMixin):
                 bbox_feats = self.shared_head(bbox_feats)
             cls_score, bbox_pred = self.bbox_head(bbox_feats)
             rbbox_targets = self.bbox_head.get_target(
-                sampling_results, gt_masks, gt_labels, self.train_cfg.rcnn[0])
+                sampling_results, gt_masks, gt_labels, self.train_cfg.rcnn[0],
+                gt_obbs=gt_obbs)
 
             loss_bbox = self.bbox_head.loss(cls_score, bbox_pred, *rbbox_targets)
             for name, value in loss_bbox.items():
@@ -235,6 +244,15 @@ class ReDet(BaseDetectorNew, RPNTestMixin):
         return losses
 
     def simple_test(self, img, img_meta, proposals=None, rescale=False):
+        """Test a batch of images without augmentation.
+
+        The images of the batch share the backbone, rpn and roi head
+        forwards, the rbboxes are decoded and merged image by image.
+
+        Returns:
+            list[np.ndarray] or list[list[np.ndarray]]: per class results of
+                the image, or a list of them if the batch has several images.
+        """
         x = self.extract_feat(img)
         proposal_list = self.simple_test_rpn(
             x, img_meta, self.test_cfg.rpn) if proposals is None else proposals
@@ -259,26 +277,60 @@ class ReDet(BaseDetectorNew, RPNTestMixin):
             rbbox_feats = self.shared_head_rbbox(rbbox_feats)
 
         rcls_score, rbbox_pred = self.rbbox_head(rbbox_feats)
-        det_rbboxes, det_labels = self.rbbox_head.get_det_rbboxes(
-            rrois,
-            rcls_score,
-            rbbox_pred,
-            img_meta[0]['img_shape'],
-            img_meta[0]['scale_factor'],
-            rescale=rescale,
-            cfg=self.test_cfg.rcnn)
-        rbbox_results = dbbox2result(det_rbboxes, det_labels,
-                                     self.rbbox_head.num_classes)
-
-        return rbbox_results
+        # the rois are ordered by image, see bbox2roi
+        num_rois = [len(proposals) for proposals in proposal_list]
+        rbbox_results = []
+        for i, (rrois_, rcls_score_, rbbox_pred_) in enumerate(
+                zip(rrois.split(num_rois), rcls_score.split(num_rois),
+                    rbbox_pred.split(num_rois))):
+            det_rbboxes, det_labels = self.rbbox_head.get_det_rbboxes(
+                rrois_,
+                rcls_score_,
+                rbbox_pred_,
+                img_meta[i]['img_shape'],
+                img_meta[i]['scale_factor'],
+                rescale=rescale,
+                cfg=self.test_cfg.rcnn)
+            rbbox_results.append(
+                dbbox2result(det_rbboxes, det_labels,
+                             self.rbbox_head.num_classes))
+
+        return rbbox_results[0] if len(img_meta) == 1 else rbbox_results
+
+    def extract_feats_cached(self, imgs, feat_cache, max_bytes=None):
+        """Like `extract_feats`, but also keeps the features of each view in
+        `feat_cache` (view index -> feats) while they fit in `max_bytes`.
+        """
+        cached_bytes = 0
+        for i, x in enumerate(self.extract_feats(imgs)):
+            feat_bytes = sum(feat.numel() * feat.element_size() for feat in x)
+            if max_bytes is None or cached_bytes + feat_bytes <= max_bytes:
+                feat_cache[i] = x
+                cached_bytes += feat_bytes
+            yield x
 
     def aug_test(self, imgs, img_metas, rescale=None):
+        # test_cfg.feat_cache shares the features of each view between the
+        # rpn and the roi heads instead of running the backbone twice,
+        # test_cfg.feat_cache_max_mb bounds the memory held by the cache,
+        # views that do not fit are recomputed
+        feat_cache = {}
+        if self.test_cfg.get('feat_cache', False):
+            max_mb = self.test_cfg.get('feat_cache_max_mb', None)
+            max_bytes = None if max_mb is None else max_mb * 1024 * 1024
+            feats = self.extract_feats_cached(imgs, feat_cache, max_bytes)
+        else:
+            feats = self.extract_feats(imgs)
         proposal_list = self.aug_test_rpn_rotate(
-            self.extract_feats(imgs), img_metas, self.test_cfg.rpn)
+            feats, img_metas, self.test_cfg.rpn)
 
         aug_rbboxes = []
         aug_rscores = []
-        for x, img_meta in zip(self.extract_feats(imgs), img_metas):
+        for i, (img, img_meta) in enumerate(zip(imgs, img_metas)):
+            if i in feat_cache:
+                x = feat_cache.pop(i)
+            else:
+                x = self.extract_feat(img)
             # only one image in the batch
             img_shape = img_meta[0]['img_shape']
             scale_factor = img_meta[0]['scale_factor']
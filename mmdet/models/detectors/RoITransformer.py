@@ -22,6 +22,9 @@ from mmdet.core import RotBox2Polys, polygonToRotRectangle_batch
 @DETECTORS.register_module
 class RoITransformer(BaseDetectorNew, RPNTestMixin):
 
+    # simple_test takes a batch of images
+    supports_batch_test = True
+
     def __init__(self,
                  backbone,
                  neck=None,
@@ -126,12 +129,14 @@ class RoITransformer(BaseDetectorNew, RPNTestMixin):
                       gt_labels,
                       gt_bboxes_ignore=None,
                       gt_masks=None,
-                      proposals=None):
+                      proposals=None,
+                      gt_obbs=None):
         x = self.extract_feat(img)
 
         losses = dict()
-        # trans gt_masks to gt_obbs
-        gt_obbs = gt_mask_bp_obbs_list(gt_masks)
+        # trans gt_masks to gt_obbs, unless the dataset gives them directly
+        if gt_obbs is None:
+            gt_obbs = gt_mask_bp_obbs_list(gt_masks)
         # RPN forward and loss
         if self.with_rpn:
             rpn_outs = self.rpn_head(x)
@@ -183,7 +188,8 @@ class RoITransformer(BaseDetectorNew, RPNTestMixin):
             cls_score, bbox_pred = self.bbox_head(bbox_feats)
             ## rbbox
             rbbox_targets = self.bbox_head.get_target(
-                sampling_results, gt_masks, gt_labels, self.train_cfg.rcnn[0])
+                sampling_results, gt_masks, gt_labels, self.train_cfg.rcnn[0],
+                gt_obbs=gt_obbs)
 
             loss_bbox = self.bbox_head.loss(cls_score, bbox_pred,
                                             *rbbox_targets)
@@ -245,13 +251,19 @@ class RoITransformer(BaseDetectorNew, RPNTestMixin):
         return losses
 
     def simple_test(self, img, img_meta, proposals=None, rescale=False):
+        """Test a batch of images without augmentation.
+
+        The images of the batch share the backbone, rpn and roi head
+        forwards, the rbboxes are decoded and merged image by image.
+
+        Returns:
+            list[np.ndarray] or list[list[np.ndarray]]: per class results of
+                the image, or a list of them if the batch has several images.
+        """
         x = self.extract_feat(img)
         proposal_list = self.simple_test_rpn(
             x, img_meta, self.test_cfg.rpn) if proposals is None else proposals
 
-        img_shape = img_meta[0]['img_shape']
-        scale_factor = img_meta[0]['scale_factor']
-
         rcnn_test_cfg = self.test_cfg.rcnn
 
         rois = bbox2roi(proposal_list)
@@ -275,18 +287,25 @@ class RoITransformer(BaseDetectorNew, RPNTestMixin):
             rbbox_feats = self.shared_head_rbbox(rbbox_feats)
 
         rcls_score, rbbox_pred = self.rbbox_head(rbbox_feats)
-        det_rbboxes, det_labels = self.rbbox_head.get_det_rbboxes(
-            rrois,
-            rcls_score,
-            rbbox_pred,
-            img_shape,
-            scale_factor,
-            rescale=rescale,
-            cfg=rcnn_test_cfg)
-        rbbox_results = dbbox2result(det_rbboxes, det_labels,
-                                     self.rbbox_head.num_classes)
+        # the rois are ordered by image, see bbox2roi
+        num_rois = [len(proposals) for proposals in proposal_list]
+        rbbox_results = []
+        for i, (rrois_, rcls_score_, rbbox_pred_) in enumerate(
+                zip(rrois.split(num_rois), rcls_score.split(num_rois),
+                    rbbox_pred.split(num_rois))):
+            det_rbboxes, det_labels = self.rbbox_head.get_det_rbboxes(
+                rrois_,
+                rcls_score_,
+                rbbox_pred_,
+                img_meta[i]['img_shape'],
+                img_meta[i]['scale_factor'],
+                rescale=rescale,
+                cfg=rcnn_test_cfg)
+            rbbox_results.append(
+                dbbox2result(det_rbboxes, det_labels,
+                             self.rbbox_head.num_classes))
 
-        return rbbox_results
+        return rbbox_results[0] if len(img_meta) == 1 else rbbox_results
 
     def aug_test(self, imgs, img_metas, proposals=None, rescale=None):
         # raise NotImplementedError
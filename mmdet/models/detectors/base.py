@@ -13,6 +13,9 @@ class BaseDetector(nn.Module):
 
     __metaclass__ = ABCMeta
 
+    # whether simple_test takes a batch of several images
+    supports_batch_test = False
+
     def __init__(self):
         super(BaseDetector, self).__init__()
 
@@ -69,9 +72,14 @@ class BaseDetector(nn.Module):
             raise ValueError(
                 'num of augmentations ({}) != num of image meta ({})'.format(
                     len(imgs), len(img_metas)))
-        # TODO: remove the restriction of imgs_per_gpu == 1 when prepared
+        # detectors with supports_batch_test return a list of per image
+        # results for a batch of several images
         imgs_per_gpu = imgs[0].size(0)
-        assert imgs_per_gpu == 1
+        assert imgs_per_gpu == 1 or (num_augs == 1
+                                     and self.supports_batch_test), \
+            '{} only tests one image at a time{}'.format(
+                self.__class__.__name__,
+                ' with augmentations' if num_augs > 1 else '')
 
         if num_augs == 1:
             return self.simple_test(imgs[0], img_metas[0], **kwargs)
@@ -98,7 +106,7 @@ class BaseDetector(nn.Module):
         else:
             bbox_result, segm_result = result, None
 
-        img_tensor = data['img'][0]
+        img_tensor = data['img'][0].data[0]
         img_metas = data['img_meta'][0].data[0]
         imgs = tensor2imgs(img_tensor, **img_norm_cfg)
         assert len(imgs) == len(img_metas)
@@ -90,7 +90,8 @@ class FasterRCNNHBBOBB(BaseDetectorNew, RPNTestMixin, BBoxTestMixin,
                       gt_labels,
                       gt_bboxes_ignore=None,
                       gt_masks=None,
-                      proposals=None):
+                      proposals=None,
+                      gt_obbs=None):
         x = self.extract_feat(img)
 
         losses = dict()
@@ -160,7 +161,8 @@ class FasterRCNNHBBOBB(BaseDetectorNew, RPNTestMixin, BBoxTestMixin,
             rcls_score, rbbox_pred = self.rbbox_head(rbbox_feats)
 
             rbbox_targets = self.rbbox_head.get_target(
-                sampling_results, gt_masks, gt_labels, self.train_cfg.rcnn)
+                sampling_results, gt_masks, gt_labels, self.train_cfg.rcnn,
+                gt_obbs=gt_obbs)
 
             loss_rbbox = self.rbbox_head.loss(rcls_score, rbbox_pred,
                                             *rbbox_targets)
@@ -82,7 +82,7 @@ class RPN(BaseDetector, RPNTestMixin):
         Although we assume batch size is 1, this method supports arbitrary
         batch size.
         """
-        img_tensor = data['img'][0]
+        img_tensor = data['img'][0].data[0]
         img_metas = data['img_meta'][0].data[0]
         imgs = tensor2imgs(img_tensor, **img_norm_cfg)
         assert len(imgs) == len(img_metas)
@@ -69,6 +69,47 @@ class BBoxTestMixin(object):
             cfg=rcnn_test_cfg)
         return det_bboxes, det_labels
 
+    def simple_test_bboxes_batch(self,
+                                 x,
+                                 img_meta,
+                                 proposals,
+                                 rcnn_test_cfg,
+                                 rescale=False):
+        """Test det bboxes of a batch of images without augmentation.
+
+        The rois of all the images go through the roi head together and are
+        decoded image by image with the meta of each image.
+
+        Returns:
+            tuple: lists of the det bboxes and det labels of each image.
+        """
+        rois = bbox2roi(proposals)
+        roi_feats = self.bbox_roi_extractor(
+            x[:len(self.bbox_roi_extractor.featmap_strides)], rois)
+        if self.with_shared_head:
+            roi_feats = self.shared_head(roi_feats)
+        cls_score, bbox_pred = self.bbox_head(roi_feats)
+        # the rois are ordered by image, see bbox2roi
+        num_rois = [len(p) for p in proposals]
+        bbox_preds = bbox_pred.split(
+            num_rois) if bbox_pred is not None else [None] * len(num_rois)
+        det_bboxes = []
+        det_labels = []
+        for i, (rois_, cls_score_, bbox_pred_) in enumerate(
+                zip(rois.split(num_rois), cls_score.split(num_rois),
+                    bbox_preds)):
+            det_bboxes_, det_labels_ = self.bbox_head.get_det_bboxes(
+                rois_,
+                cls_score_,
+                bbox_pred_,
+                img_meta[i]['img_shape'],
+                img_meta[i]['scale_factor'],
+                rescale=rescale,
+                cfg=rcnn_test_cfg)
+            det_bboxes.append(det_bboxes_)
+            det_labels.append(det_labels_)
+        return det_bboxes, det_labels
+
     def aug_test_bboxes(self, feats, img_metas, proposal_list, rcnn_test_cfg):
         aug_bboxes = []
         aug_scores = []
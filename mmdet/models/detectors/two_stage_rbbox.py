@@ -13,6 +13,9 @@ from mmdet.core import bbox2roi, bbox2result, build_assigner, build_sampler, dbb
 class TwoStageDetectorRbbox(BaseDetector, RPNTestMixin, BBoxTestMixin,
                        MaskTestMixin):
 
+    # simple_test takes a batch of images (without masks)
+    supports_batch_test = True
+
     def __init__(self,
                  backbone,
                  neck=None,
@@ -95,7 +98,8 @@ class TwoStageDetectorRbbox(BaseDetector, RPNTestMixin, BBoxTestMixin,
                       gt_labels,
                       gt_bboxes_ignore=None,
                       gt_masks=None,
-                      proposals=None):
+                      proposals=None,
+                      gt_obbs=None):
         x = self.extract_feat(img)
 
         losses = dict()
@@ -154,7 +158,8 @@ class TwoStageDetectorRbbox(BaseDetector, RPNTestMixin, BBoxTestMixin,
 
             ## rbbox
             rbbox_targets = self.bbox_head.get_target(
-                sampling_results, gt_masks, gt_labels, self.train_cfg.rcnn)
+                sampling_results, gt_masks, gt_labels, self.train_cfg.rcnn,
+                gt_obbs=gt_obbs)
 
             loss_bbox = self.bbox_head.loss(cls_score, bbox_pred,
                                             *rbbox_targets)
@@ -198,7 +203,10 @@ class TwoStageDetectorRbbox(BaseDetector, RPNTestMixin, BBoxTestMixin,
         return losses
 
     def simple_test(self, img, img_meta, proposals=None, rescale=False):
-        """Test without augmentation."""
+        """Test without augmentation.
+
+        A batch of several images gives a list of per image results.
+        """
         assert self.with_bbox, "Bbox head must be implemented."
 
         x = self.extract_feat(img)
@@ -206,6 +214,18 @@ class TwoStageDetectorRbbox(BaseDetector, RPNTestMixin, BBoxTestMixin,
         proposal_list = self.simple_test_rpn(
             x, img_meta, self.test_cfg.rpn) if proposals is None else proposals
 
+        if len(img_meta) > 1:
+            assert not self.with_mask, \
+                'masks can only be tested one image at a time'
+            det_bboxes, det_labels = self.simple_test_bboxes_batch(
+                x, img_meta, proposal_list, self.test_cfg.rcnn,
+                rescale=rescale)
+            return [
+                dbbox2result(det_bboxes_, det_labels_,
+                             self.bbox_head.num_classes)
+                for det_bboxes_, det_labels_ in zip(det_bboxes, det_labels)
+            ]
+
         det_bboxes, det_labels = self.simple_test_bboxes(
             x, img_meta, proposal_list, self.test_cfg.rcnn, rescale=rescale)
         # import pdb
@@ -1,6 +1,13 @@
 from .bfp import BFP
 from .fpn import FPN
 from .hrfpn import HRFPN
-from .re_fpn import ReFPN
+from .re_fpn_plain import ReFPNPlain
 
-__all__ = ['FPN', 'BFP', 'HRFPN', 'ReFPN']
+__all__ = ['FPN', 'BFP', 'HRFPN', 'ReFPNPlain']
+
+try:
+    from .re_fpn import ReFPN
+    __all__.append('ReFPN')
+except ImportError:
+    # e2cnn is only needed to train ReDet, exported models use ReFPNPlain
+    pass
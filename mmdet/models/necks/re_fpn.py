@@ -8,7 +8,9 @@ import warnings
 from e2cnn import gspaces
 from mmcv.cnn import constant_init, kaiming_init, xavier_init
 
+from .re_fpn_plain import ReFPNPlain
 from ..registry import NECKS
+from ..utils import fuse_conv_bn
 
 # Set default Orientation=8, .i.e, the group C8
 # One can change it by passing the env Orientation=xx
@@ -196,6 +198,14 @@ class ConvModule(enn.EquivariantModule):
     def evaluate_output_shape(self, input_shape):
         return input_shape
 
+    def export(self):
+        """The conv exported to a Conv2d, with the norm folded into it."""
+        conv = self.conv.export()
+        if self.with_norm:
+            assert self.order.index('norm') > self.order.index('conv')
+            conv = fuse_conv_bn(conv, self.norm.export())
+        return conv
+
 
 @NECKS.register_module
 class ReFPN(nn.Module):
@@ -299,6 +309,32 @@ class ReFPN(nn.Module):
                 for i in range(used_backbone_levels + 1, self.num_outs):
                     self.relus.append(ennReLU(out_channels))
 
+    def export(self):
+        """Export to an equivalent ReFPNPlain of torch.nn layers.
+
+        The equivariant filters are expanded and the batch norms are folded
+        into them, so the result is only meant for inference.
+        """
+        self.eval()
+        plain = ReFPNPlain(
+            self.in_channels,
+            self.out_channels,
+            self.num_outs,
+            start_level=self.start_level,
+            end_level=self.end_level,
+            add_extra_convs=self.add_extra_convs,
+            extra_convs_on_inputs=self.extra_convs_on_inputs,
+            relu_before_extra_convs=self.relu_before_extra_convs,
+            activation=self.activation,
+            orientation=Orientation,
+            fixparams=fixparams)
+        for conv_module, plain_module in zip(
+                list(self.lateral_convs) + list(self.fpn_convs),
+                list(plain.lateral_convs) + list(plain.fpn_convs)):
+            plain_module.conv.load_state_dict(conv_module.export().state_dict())
+        plain.eval()
+        return plain
+
     # default init_weights for conv(msra) and norm in ConvModule
     def init_weights(self):
         for m in self.modules():
@@ -86,13 +86,14 @@ class BBoxHeadRbbox(nn.Module):
         return cls_score, bbox_pred
 
     def get_target(self, sampling_results, gt_masks, gt_labels,
-                   rcnn_train_cfg):
+                   rcnn_train_cfg, gt_obbs=None):
         """
         obb target hbb
         :param sampling_results:
         :param gt_masks:
         :param gt_labels:
         :param rcnn_train_cfg:
+        :param gt_obbs: list of (n, 5) gt obbs, used instead of gt_masks if given
         :param mod: 'normal' or 'best_match', 'best_match' is used for RoI Transformer
         :return:
         """
@@ -117,7 +118,8 @@ class BBoxHeadRbbox(nn.Module):
             target_means=self.target_means,
             target_stds=self.target_stds,
             with_module=self.with_module,
-            hbb_trans=self.hbb_trans)
+            hbb_trans=self.hbb_trans,
+            gt_obbs_list=gt_obbs)
         return cls_reg_targets
 
     def get_target_rbbox(self, sampling_results, gt_bboxes, gt_labels,
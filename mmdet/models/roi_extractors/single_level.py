@@ -77,8 +77,8 @@ class SingleRoIExtractor(nn.Module):
         out_size = self.roi_layers[0].out_size
         num_levels = len(feats)
         target_lvls = self.map_roi_levels(rois, num_levels)
-        roi_feats = torch.cuda.FloatTensor(rois.size()[0], self.out_channels,
-                                           out_size, out_size).fill_(0)
+        roi_feats = feats[0].new_zeros(rois.size()[0], self.out_channels,
+                                       out_size, out_size)
         for i in range(num_levels):
             inds = target_lvls == i
             if inds.any():
@@ -82,14 +82,14 @@ class RboxSingleRoIExtractor(nn.Module):
         num_levels = len(feats)
         target_lvls = self.map_roi_levels(rois, num_levels)
         if isinstance(out_size, int):
-            roi_feats = torch.cuda.FloatTensor(rois.size()[0], self.out_channels,
-                                               out_size, out_size).fill_(0)
+            roi_feats = feats[0].new_zeros(rois.size()[0], self.out_channels,
+                                           out_size, out_size)
         elif isinstance(out_size, tuple):
             assert len(out_size) == 2
             assert isinstance(out_size[0], int)
             assert isinstance(out_size[1], int)
-            roi_feats = torch.cuda.FloatTensor(rois.size()[0], self.out_channels,
-                                               out_size[0], out_size[1]).fill_(0)
+            roi_feats = feats[0].new_zeros(rois.size()[0], self.out_channels,
+                                           out_size[0], out_size[1])
         for i in range(num_levels):
             inds = target_lvls == i
             if inds.any():
@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+import torch
+
+from mmdet.models.rroi_extractors import RboxSingleRoIExtractor
+
+
+class TestRboxSingleRoIExtractor(unittest.TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.extractor = RboxSingleRoIExtractor(
+            roi_layer=dict(type='RoIAlignRotated', out_size=7, sample_num=2),
+            out_channels=4,
+            featmap_strides=[4, 8, 16, 32])
+        self.feats = [
+            torch.rand(2, 4, 512 // s, 512 // s) for s in [4, 8, 16, 32]
+        ]
+        # (index, x, y, w, h, angle), sizes around 40, 160, 320 and 640 are
+        # mapped to the levels 0, 1, 2 and 3
+        rois = []
+        for i, size in enumerate([40, 160, 320, 640] * 3):
+            rois.append([i % 2, 80 + 30 * i, 400 - 20 * i, size * 1.2,
+                         size / 1.2, (i - 6) * 0.5])
+        self.rois = torch.tensor(rois)
+
+    def test_multi_level_cpu(self):
+        roi_feats = self.extractor(self.feats, self.rois)
+        self.assertEqual(roi_feats.shape, (12, 4, 7, 7))
+        self.assertEqual(roi_feats.dtype, self.feats[0].dtype)
+        self.assertEqual(roi_feats.device, self.feats[0].device)
+
+        target_lvls = self.extractor.map_roi_levels(self.rois, 4)
+        self.assertEqual(target_lvls.tolist(), [0, 1, 2, 3] * 3)
+        for roi, lvl, roi_feat in zip(self.rois, target_lvls, roi_feats):
+            expected = self.extractor.roi_layers[lvl](self.feats[lvl],
+                                                      roi[None])[0]
+            np.testing.assert_allclose(roi_feat.numpy(), expected.numpy(),
+                                       atol=1e-6)
+
+    def test_multi_level_double(self):
+        feats = [feat.double() for feat in self.feats]
+        roi_feats = self.extractor(feats, self.rois.double())
+        self.assertEqual(roi_feats.dtype, torch.float64)
+        np.testing.assert_allclose(
+            roi_feats.numpy(),
+            self.extractor(self.feats, self.rois).numpy(),
+            atol=1e-5)
+
+
+if __name__ == '__main__':
+    unittest.main()
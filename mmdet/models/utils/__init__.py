@@ -1,5 +1,6 @@
 from .conv_ws import conv_ws_2d, ConvWS2d
 from .conv_module import build_conv_layer, ConvModule
+from .fuse_conv_bn import fuse_conv_bn
 from .norm import build_norm_layer
 from .scale import Scale
 from .weight_init import (xavier_init, normal_init, uniform_init, kaiming_init,
@@ -8,5 +9,5 @@ from .weight_init import (xavier_init, normal_init, uniform_init, kaiming_init,
 __all__ = [
     'conv_ws_2d', 'ConvWS2d', 'build_conv_layer', 'ConvModule',
     'build_norm_layer', 'xavier_init', 'normal_init', 'uniform_init',
-    'kaiming_init', 'bias_init_with_prob', 'Scale'
+    'kaiming_init', 'bias_init_with_prob', 'Scale', 'fuse_conv_bn'
 ]
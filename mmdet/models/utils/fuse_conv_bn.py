@@ -0,0 +1,28 @@
+import torch
+import torch.nn as nn
+
+
+def fuse_conv_bn(conv, bn):
+    """Fold an eval mode BatchNorm2d into the Conv2d before it.
+
+    Args:
+        conv (nn.Conv2d): conv layer, modified in place.
+        bn (nn.BatchNorm2d): norm layer following `conv`.
+
+    Returns:
+        nn.Conv2d: `conv`, with a bias, computing bn(conv(x)).
+    """
+    with torch.no_grad():
+        # fold in double, the running var can be tiny
+        weight = conv.weight.double()
+        bias = (conv.bias.double() if conv.bias is not None else
+                weight.new_zeros(weight.size(0)))
+        scale = (bn.running_var.double() + bn.eps).rsqrt()
+        shift = -bn.running_mean.double() * scale
+        if bn.affine:
+            scale = scale * bn.weight.double()
+            shift = shift * bn.weight.double() + bn.bias.double()
+        conv.weight = nn.Parameter(
+            (weight * scale.view(-1, 1, 1, 1)).to(conv.weight))
+        conv.bias = nn.Parameter((bias * scale + shift).to(conv.weight))
+    return conv
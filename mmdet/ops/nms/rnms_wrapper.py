@@ -1,7 +1,7 @@
 import numpy as np
 import torch
 import math
-import DOTA_devkit.polyiou as polyiou
+from DOTA_devkit.polyiou_batch import iou_poly_matrix
 import pdb
 
 def pesudo_nms_poly(dets, iou_thr):
@@ -33,18 +33,11 @@ def py_cpu_nms_poly_fast(dets, iou_thr):
         scores = dets[:, 8]
         areas = (x2 - x1 + 1) * (y2 - y1 + 1)
 
-        polys = []
-        for i in range(len(dets)):
-            tm_polygon = polyiou.VectorDouble([dets[i][0], dets[i][1],
-                                                dets[i][2], dets[i][3],
-                                                dets[i][4], dets[i][5],
-                                                dets[i][6], dets[i][7]])
-            polys.append(tm_polygon)
+        polys = np.ascontiguousarray(obbs[:, :8])
         order = scores.argsort()[::-1]
 
         keep = []
         while order.size > 0:
-            ovr = []
             i = order[0]
             keep.append(i)
             # if order.size == 0:
@@ -62,9 +55,8 @@ def py_cpu_nms_poly_fast(dets, iou_thr):
             # h_keep_inds = np.where(hbb_ovr == 0)[0]
             h_inds = np.where(hbb_ovr > 0)[0]
             tmp_order = order[h_inds + 1]
-            for j in range(tmp_order.size):
-                iou = polyiou.iou_poly(polys[i], polys[tmp_order[j]])
-                hbb_ovr[h_inds[j]] = iou
+            if tmp_order.size > 0:
+                hbb_ovr[h_inds] = iou_poly_matrix(polys[i:i + 1], polys[tmp_order])[0]
                 # ovr.append(iou)
                 # ovr_index.append(tmp_order[j])
 
@@ -101,13 +93,7 @@ def py_cpu_nms_poly_fast_np(dets, thresh):
     scores = dets[:, 8]
     areas = (x2 - x1 + 1) * (y2 - y1 + 1)
 
-    polys = []
-    for i in range(len(dets)):
-        tm_polygon = polyiou.VectorDouble([dets[i][0], dets[i][1],
-                                            dets[i][2], dets[i][3],
-                                            dets[i][4], dets[i][5],
-                                            dets[i][6], dets[i][7]])
-        polys.append(tm_polygon)
+    polys = np.ascontiguousarray(obbs[:, :8])
     order = scores.argsort()[::-1]
 
     keep = []
@@ -130,9 +116,8 @@ def py_cpu_nms_poly_fast_np(dets, thresh):
         # h_keep_inds = np.where(hbb_ovr == 0)[0]
         h_inds = np.where(hbb_ovr > 0)[0]
         tmp_order = order[h_inds + 1]
-        for j in range(tmp_order.size):
-            iou = polyiou.iou_poly(polys[i], polys[tmp_order[j]])
-            hbb_ovr[h_inds[j]] = iou
+        if tmp_order.size > 0:
+            hbb_ovr[h_inds] = iou_poly_matrix(polys[i:i + 1], polys[tmp_order])[0]
             # ovr.append(iou)
             # ovr_index.append(tmp_order[j])
 
@@ -1,3 +1,3 @@
-from .poly_nms_wrapper import poly_nms
+from .poly_nms_wrapper import poly_nms, batched_poly_nms
 
-__all__ = ['poly_nms']
\ No newline at end of file
+__all__ = ['poly_nms', 'batched_poly_nms']
@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+import torch
+
+import os.path as osp
+import sys
+sys.path.append(osp.abspath(osp.join(__file__, '../../../../')))
+from DOTA_devkit.polyiou_batch import iou_poly_matrix  # noqa: E402
+sys.path.append(osp.abspath(osp.join(__file__, '../../')))
+from poly_nms import poly_nms  # noqa: E402
+
+
+def poly_nms_ref(dets, iou_thr):
+    """Greedy nms over the dets sorted by descending score."""
+    order = dets[:, 8].argsort()[::-1]
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        ious = iou_poly_matrix(dets[i:i + 1, :8], dets[order[1:], :8])[0]
+        order = order[1:][ious <= iou_thr]
+    return np.array(keep, dtype=np.int64)
+
+
+def random_dets(rng, n, span=200):
+    ctr = rng.rand(n, 2) * span
+    wh = rng.rand(n, 2) * 40 + 2
+    theta = rng.rand(n) * np.pi
+    corners = np.array([[-0.5, -0.5], [0.5, -0.5], [0.5, 0.5], [-0.5, 0.5]])
+    cos, sin = np.cos(theta)[:, None], np.sin(theta)[:, None]
+    xs = (ctr[:, :1] + corners[:, 0] * wh[:, :1] * cos -
+          corners[:, 1] * wh[:, 1:] * sin)
+    ys = (ctr[:, 1:] + corners[:, 0] * wh[:, :1] * sin +
+          corners[:, 1] * wh[:, 1:] * cos)
+    polys = np.stack([xs, ys], axis=2).reshape(-1, 8)
+    return np.concatenate([polys, rng.rand(n, 1)], axis=1)
+
+
+class TestPolyNMSCPU(unittest.TestCase):
+
+    def test_score_order(self):
+        rng = np.random.RandomState(0)
+        for n in [1, 50, 500]:
+            dets = random_dets(rng, n)
+            _, keep = poly_nms(torch.from_numpy(dets), 0.1)
+            keep = keep.numpy()
+            # same kept dets and order as the cuda kernel
+            np.testing.assert_array_equal(keep, poly_nms_ref(dets, 0.1))
+            self.assertTrue((np.diff(dets[keep, 8]) <= 0).all())
+
+    def test_empty(self):
+        dets, keep = poly_nms(np.zeros((0, 9)), 0.1)
+        self.assertEqual(dets.shape, (0, 9))
+        self.assertEqual(len(keep), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
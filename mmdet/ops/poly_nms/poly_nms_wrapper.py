@@ -1,6 +1,11 @@
 import numpy as np
 import torch
-from .import poly_nms_cuda
+from . import poly_nms_cpu
+try:
+    from . import poly_nms_cuda
+except ImportError:
+    # built without a cuda toolkit, only the cpu kernel is available
+    poly_nms_cuda = None
 
 def poly_nms(dets, iou_thr, device_id=None):
     """Dispatch to either CPU or GPU NMS implementations.
@@ -10,14 +15,14 @@ def poly_nms(dets, iou_thr, device_id=None):
     will be used. The returned type will always be the same as inputs.
 
     Arguments:
-        dets (torch.Tensor or np.ndarray): bboxes with scores.
+        dets (torch.Tensor or np.ndarray): polys with scores, shape (n, 9).
         iou_thr (float): IoU threshold for NMS.
         device_id (int, optional): when `dets` is a numpy array, if `device_id`
             is None, then cpu nms is used, otherwise gpu_nms will be used.
 
     Returns:
         tuple: kept bboxes and indice, which is always the same data type as
-            the input.
+            the input. Both kernels keep them by descending score.
     """
     # convert dets (tensor or numpy array) to tensor
     # import pdb
@@ -42,8 +47,59 @@ def poly_nms(dets, iou_thr, device_id=None):
         if dets_th.is_cuda:
             inds = poly_nms_cuda.poly_nms(dets_th, iou_thr)
         else:
-            raise NotImplementedError
+            # same precision as py_cpu_nms_poly_fast
+            inds = poly_nms_cpu.poly_nms(dets_th.double(), iou_thr)
+        inds = inds.to(dets_th.device)
+
+    if is_numpy:
+        inds = inds.cpu().numpy()
+    return dets[inds, :], inds
+
+
+def batched_poly_nms(dets, labels, iou_thr, device_id=None):
+    """Polygon NMS over several classes in one call.
+
+    Each class is moved to its own region of the plane by a coordinate offset,
+    so polys of different classes never overlap and a single `poly_nms` call
+    gives the same result as running it class by class.
+
+    Arguments:
+        dets (torch.Tensor or np.ndarray): polys with scores, shape (n, 9).
+        labels (torch.Tensor or np.ndarray): class index of each poly, (n, ).
+        iou_thr (float): IoU threshold for NMS.
+        device_id (int, optional): same as `poly_nms`.
+
+    Returns:
+        tuple: kept bboxes and indice, which is always the same data type as
+            the input.
+    """
+    if isinstance(dets, torch.Tensor):
+        is_numpy = False
+        dets_th = dets
+        labels_th = labels.to(dets.device)
+    elif isinstance(dets, np.ndarray):
+        is_numpy = True
+        device = 'cpu' if device_id is None else 'cuda:{}'.format(device_id)
+        dets_th = torch.from_numpy(dets).to(device)
+        labels_th = torch.from_numpy(np.asarray(labels)).to(device)
+    else:
+        raise TypeError(
+            'dets must be either a Tensor or numpy array, but got {}'.format(
+                type(dets)))
+
+    if dets_th.shape[0] == 0:
+        inds = dets_th.new_zeros(0, dtype=torch.long)
+    else:
+        if not dets_th.is_cuda:
+            dets_th = dets_th.double()
+        polys = dets_th[:, :8]
+        # shift to the origin first, keeps the offset coordinates small
+        min_coord = polys.min()
+        offsets = labels_th.to(polys) * (polys.max() - min_coord + 1)
+        shifted = torch.cat(
+            [polys - min_coord + offsets[:, None], dets_th[:, 8:9]], dim=1)
+        _, inds = poly_nms(shifted, iou_thr)
 
     if is_numpy:
-        raise NotImplementedError
-    return dets[inds, :], inds
\ No newline at end of file
+        inds = inds.cpu().numpy()
+    return dets[inds, :], inds
@@ -4,7 +4,8 @@ from setuptools import setup, Extension
 import numpy as np
 from Cython.Build import cythonize
 from Cython.Distutils import build_ext
-from torch.utils.cpp_extension import BuildExtension, CUDAExtension
+from torch.utils.cpp_extension import (BuildExtension, CppExtension,
+                                       CUDAExtension, CUDA_HOME)
 
 ext_args = dict(
     include_dirs=[np.get_include()],
@@ -60,15 +61,20 @@ class custom_build_ext(build_ext):
         build_ext.build_extensions(self)
 
 
-setup(
-    name='poly_nms_cuda',
-    ext_modules=[
+ext_modules = [
+    CppExtension('poly_nms_cpu', [
+        'src/poly_nms_cpu.cpp',
+    ]),
+]
+# machines without a cuda toolkit only get the cpu kernel
+if CUDA_HOME is not None:
+    ext_modules.append(
         CUDAExtension('poly_nms_cuda', [
             'src/poly_nms_cuda.cpp',
             'src/poly_nms_kernel.cu',
-        ]),
-        # CUDAExtension('nms_cpu', [
-        #     'src/nms_cpu.cpp',
-        # ]),
-    ],
+        ]))
+
+setup(
+    name='poly_nms_cuda',
+    ext_modules=ext_modules,
     cmdclass={'build_ext': BuildExtension})
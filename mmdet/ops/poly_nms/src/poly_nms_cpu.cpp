@@ -0,0 +1,213 @@
+// CPU version of poly_nms, the polygon iou follows poly_nms_kernel.cu and
+// DOTA_devkit/polyiou.cpp
+#include <torch/extension.h>
+
+#include <algorithm>
+#include <cmath>
+#include <vector>
+
+// ######################################################
+#ifndef AT_CHECK
+#define AT_CHECK TORCH_CHECK
+#endif
+// #######################################################################################
+
+#define maxn 10
+const double eps = 1E-8;
+
+template <typename scalar_t>
+struct Point {
+  scalar_t x, y;
+  Point() {}
+  Point(scalar_t x, scalar_t y) : x(x), y(y) {}
+};
+
+template <typename scalar_t>
+inline int sig(scalar_t d) {
+  return (d > eps) - (d < -eps);
+}
+
+template <typename scalar_t>
+inline bool point_eq(const Point<scalar_t>& a, const Point<scalar_t>& b) {
+  return sig(a.x - b.x) == 0 && sig(a.y - b.y) == 0;
+}
+
+template <typename scalar_t>
+inline scalar_t cross(const Point<scalar_t>& o, const Point<scalar_t>& a,
+                      const Point<scalar_t>& b) {
+  return (a.x - o.x) * (b.y - o.y) - (b.x - o.x) * (a.y - o.y);
+}
+
+template <typename scalar_t>
+inline scalar_t area(Point<scalar_t>* ps, int n) {
+  ps[n] = ps[0];
+  scalar_t res = 0;
+  for (int i = 0; i < n; i++) {
+    res += ps[i].x * ps[i + 1].y - ps[i].y * ps[i + 1].x;
+  }
+  return res / 2.0;
+}
+
+template <typename scalar_t>
+inline int lineCross(const Point<scalar_t>& a, const Point<scalar_t>& b,
+                     const Point<scalar_t>& c, const Point<scalar_t>& d,
+                     Point<scalar_t>& p) {
+  scalar_t s1, s2;
+  s1 = cross(a, b, c);
+  s2 = cross(a, b, d);
+  if (sig(s1) == 0 && sig(s2) == 0) return 2;
+  if (sig(s2 - s1) == 0) return 0;
+  p.x = (c.x * s2 - d.x * s1) / (s2 - s1);
+  p.y = (c.y * s2 - d.y * s1) / (s2 - s1);
+  return 1;
+}
+
+template <typename scalar_t>
+inline void polygon_cut(Point<scalar_t>* p, int& n, const Point<scalar_t>& a,
+                        const Point<scalar_t>& b, Point<scalar_t>* pp) {
+  int m = 0;
+  p[n] = p[0];
+  for (int i = 0; i < n; i++) {
+    if (sig(cross(a, b, p[i])) > 0) pp[m++] = p[i];
+    if (sig(cross(a, b, p[i])) != sig(cross(a, b, p[i + 1])))
+      lineCross(a, b, p[i], p[i + 1], pp[m++]);
+  }
+  n = 0;
+  for (int i = 0; i < m; i++)
+    if (!i || !(point_eq(pp[i], pp[i - 1]))) p[n++] = pp[i];
+  while (n > 1 && point_eq(p[n - 1], p[0])) n--;
+}
+
+// signed intersection area of triangle oab and triangle ocd, o is the origin
+template <typename scalar_t>
+inline scalar_t intersectArea(Point<scalar_t> a, Point<scalar_t> b,
+                              Point<scalar_t> c, Point<scalar_t> d) {
+  Point<scalar_t> o(0, 0);
+  int s1 = sig(cross(o, a, b));
+  int s2 = sig(cross(o, c, d));
+  if (s1 == 0 || s2 == 0) return 0.0;
+  if (s1 == -1) std::swap(a, b);
+  if (s2 == -1) std::swap(c, d);
+  Point<scalar_t> p[10] = {o, a, b};
+  int n = 3;
+  Point<scalar_t> pp[maxn];
+  polygon_cut(p, n, o, c, pp);
+  polygon_cut(p, n, c, d, pp);
+  polygon_cut(p, n, d, o, pp);
+  scalar_t res = std::fabs(area(p, n));
+  if (s1 * s2 == -1) res = -res;
+  return res;
+}
+
+// intersection area of two polygons
+template <typename scalar_t>
+inline scalar_t intersectArea(Point<scalar_t>* ps1, int n1,
+                              Point<scalar_t>* ps2, int n2) {
+  if (area(ps1, n1) < 0) std::reverse(ps1, ps1 + n1);
+  if (area(ps2, n2) < 0) std::reverse(ps2, ps2 + n2);
+  ps1[n1] = ps1[0];
+  ps2[n2] = ps2[0];
+  scalar_t res = 0;
+  for (int i = 0; i < n1; i++) {
+    for (int j = 0; j < n2; j++) {
+      res += intersectArea(ps1[i], ps1[i + 1], ps2[j], ps2[j + 1]);
+    }
+  }
+  return res;
+}
+
+template <typename scalar_t>
+inline scalar_t polyIoU(const scalar_t* p, const scalar_t* q) {
+  Point<scalar_t> ps1[maxn], ps2[maxn];
+  int n1 = 4;
+  int n2 = 4;
+  for (int i = 0; i < 4; i++) {
+    ps1[i].x = p[i * 2];
+    ps1[i].y = p[i * 2 + 1];
+
+    ps2[i].x = q[i * 2];
+    ps2[i].y = q[i * 2 + 1];
+  }
+  scalar_t inter_area = intersectArea(ps1, n1, ps2, n2);
+  scalar_t union_area =
+      std::fabs(area(ps1, n1)) + std::fabs(area(ps2, n2)) - inter_area;
+  scalar_t iou = 0;
+  if (union_area == 0) {
+    iou = (inter_area + 1) / (union_area + 1);
+  } else {
+    iou = inter_area / union_area;
+  }
+  return iou;
+}
+
+// dets is a N x 9 tensor, (x1, y1, ..., x4, y4, score)
+template <typename scalar_t>
+at::Tensor poly_nms_cpu_kernel(const at::Tensor& dets, const float threshold) {
+  AT_ASSERTM(!dets.type().is_cuda(), "dets must be a CPU tensor");
+
+  if (dets.numel() == 0) {
+    return at::empty({0}, dets.options().dtype(at::kLong).device(at::kCPU));
+  }
+
+  auto polys_t = dets.narrow(1, 0, 8).contiguous();
+  auto scores = dets.select(1, 8).contiguous();
+  auto xs_t = polys_t.view({-1, 4, 2}).select(2, 0);
+  auto ys_t = polys_t.view({-1, 4, 2}).select(2, 1);
+  auto x1_t = std::get<0>(xs_t.min(1)).contiguous();
+  auto y1_t = std::get<0>(ys_t.min(1)).contiguous();
+  auto x2_t = std::get<0>(xs_t.max(1)).contiguous();
+  auto y2_t = std::get<0>(ys_t.max(1)).contiguous();
+
+  auto order_t = std::get<1>(scores.sort(0, /* descending=*/true));
+
+  auto ndets = dets.size(0);
+  at::Tensor suppressed_t =
+      at::zeros({ndets}, dets.options().dtype(at::kByte).device(at::kCPU));
+  at::Tensor keep_t =
+      at::empty({ndets}, dets.options().dtype(at::kLong).device(at::kCPU));
+
+  auto suppressed = suppressed_t.data<uint8_t>();
+  auto keep = keep_t.data<int64_t>();
+  int64_t num_to_keep = 0;
+  auto order = order_t.data<int64_t>();
+  auto polys = polys_t.data<scalar_t>();
+  auto x1 = x1_t.data<scalar_t>();
+  auto y1 = y1_t.data<scalar_t>();
+  auto x2 = x2_t.data<scalar_t>();
+  auto y2 = y2_t.data<scalar_t>();
+
+  for (int64_t _i = 0; _i < ndets; _i++) {
+    auto i = order[_i];
+    if (suppressed[i] == 1) continue;
+    // kept by descending score, the same order as the cuda kernel
+    keep[num_to_keep++] = i;
+    auto ix1 = x1[i];
+    auto iy1 = y1[i];
+    auto ix2 = x2[i];
+    auto iy2 = y2[i];
+
+    for (int64_t _j = _i + 1; _j < ndets; _j++) {
+      auto j = order[_j];
+      if (suppressed[j] == 1) continue;
+      // the polygons can not overlap if their hbbs do not
+      if (std::min(ix2, x2[j]) <= std::max(ix1, x1[j]) ||
+          std::min(iy2, y2[j]) <= std::max(iy1, y1[j]))
+        continue;
+      auto ovr = polyIoU(polys + i * 8, polys + j * 8);
+      if (ovr > threshold) suppressed[j] = 1;
+    }
+  }
+  return keep_t.narrow(0, 0, num_to_keep);
+}
+
+at::Tensor poly_nms(const at::Tensor& dets, const float threshold) {
+  at::Tensor result;
+  AT_DISPATCH_FLOATING_TYPES(dets.type(), "poly_nms", [&] {
+    result = poly_nms_cpu_kernel<scalar_t>(dets, threshold);
+  });
+  return result;
+}
+
+PYBIND11_MODULE(TORCH_EXTENSION_NAME, m) {
+  m.def("poly_nms", &poly_nms, "polygon non-maximum suppression (cpu)");
+}
@@ -250,9 +250,10 @@ at::Tensor poly_nms_cuda(const at::Tensor boxes, float nms_overlap_thresh) {
 
     THCudaFree(state, mask_dev);
 
-    return std::get<0>(order_t.index({
+    // kept by descending score, the same order as the cpu kernel
+    return order_t.index({
         keep.narrow(/*dim=*/0, /*start=*/0, /*length=*/num_to_keep).to(
           order_t.device(), keep.scalar_type())
-      }).sort(0, false));
+      });
 }
 
@@ -0,0 +1,79 @@
+import math
+import unittest
+
+import numpy as np
+import torch
+from torch.autograd import gradcheck
+
+import os.path as osp
+import sys
+sys.path.append(osp.abspath(osp.join(__file__, '../../')))
+from riroi_align import RiRoIAlign  # noqa: E402
+from roi_align_rotated.cpu_test import (bilinear_interpolate_torch,  # noqa: E402
+                                        roi_sampling_points, random_rois)
+
+PI = 3.141592653
+
+
+def riroi_align_torch(features, rois, out_size, spatial_scale, sample_num=0,
+                      nOrientation=8):
+    """Pure PyTorch reference of riroi_align."""
+    num_channels = features.size(1) // nOrientation
+    height, width = features.shape[2:]
+    outputs = []
+    for roi in rois:
+        y, x = roi_sampling_points(roi, out_size, out_size, spatial_scale,
+                                   sample_num)
+        val = bilinear_interpolate_torch(features[int(roi[0])], y.to(features),
+                                         x.to(features))
+        val = val.mean(dim=(-1, -2)).view(num_channels, nOrientation,
+                                          out_size, out_size)
+        # interpolate between the two orientation channels around theta
+        ind_float = float(roi[5]) * nOrientation / (2 * PI)
+        ind = int(math.floor(ind_float))
+        l_var = ind_float - ind
+        ind_rot = (torch.arange(nOrientation) - ind) % nOrientation
+        ind_rot_plus = (ind_rot + 1) % nOrientation
+        out = (1 - l_var) * val[:, ind_rot] + l_var * val[:, ind_rot_plus]
+        outputs.append(out.reshape(-1, out_size, out_size))
+    return torch.stack(outputs)
+
+
+class test_op_riroi_align_cpu(unittest.TestCase):
+
+    def test_riroi_align_reference(self):
+        features = torch.rand(2, 3 * 8, 15, 17, dtype=torch.float64)
+        rois = random_rois(20, 2, 15, 17)
+        for spatial_scale, sample_num in ((1, 0), (0.5, 2)):
+            riroi_align = RiRoIAlign(3, spatial_scale, sample_num, 8)
+            features.grad = None
+            features.requires_grad_()
+            out = riroi_align(features, rois)
+            grad_out = torch.rand_like(out)
+            out.backward(grad_out)
+            grad = features.grad.clone()
+
+            features.grad = None
+            expected = riroi_align_torch(features, rois, 3, spatial_scale,
+                                         sample_num, 8)
+            expected.backward(grad_out)
+            np.testing.assert_allclose(out.detach().numpy(),
+                                       expected.detach().numpy(), atol=1e-10)
+            np.testing.assert_allclose(grad.numpy(), features.grad.numpy(),
+                                       atol=1e-10)
+
+            # float kernels agree up to float precision
+            out_float = riroi_align(features.detach().float(), rois.float())
+            np.testing.assert_allclose(out_float.numpy(),
+                                       expected.detach().numpy(), atol=1e-4)
+
+    def test_riroi_align_autograd(self):
+        x1 = torch.rand(3, 2 * 4, 12, 12, dtype=torch.float64,
+                        requires_grad=True)
+        x2 = random_rois(8, 3, 12, 12)
+        self.assertTrue(gradcheck(RiRoIAlign(4, 1, 0, 4), (x1, x2)))
+        self.assertTrue(gradcheck(RiRoIAlign(4, 1, 2, 4), (x1, x2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,11 @@
 from torch.autograd import Function
 
-from .. import riroi_align_cuda
+from .. import riroi_align_cpu
+try:
+    from .. import riroi_align_cuda
+except ImportError:
+    # built without a cuda toolkit, only the cpu kernel is available
+    riroi_align_cuda = None
 
 
 class RiRoIAlignFunction(Function):
@@ -32,7 +37,8 @@ class RiRoIAlignFunction(Function):
             riroi_align_cuda.forward(features, rois, out_h, out_w, spatial_scale,
                                      sample_num, nOrientation, output)
         else:
-            raise NotImplementedError
+            riroi_align_cpu.forward(features, rois, out_h, out_w, spatial_scale,
+                                    sample_num, nOrientation, output)
 
         return output
 
@@ -43,7 +49,7 @@ class RiRoIAlignFunction(Function):
         sample_num = ctx.sample_num
         nOrientation = ctx.nOrientation
         rois = ctx.saved_tensors[0]
-        assert (feature_size is not None and grad_output.is_cuda)
+        assert feature_size is not None
 
         batch_size, num_channels, data_height, data_width = feature_size
         out_w = grad_output.size(3)
@@ -53,9 +59,14 @@ class RiRoIAlignFunction(Function):
         if ctx.needs_input_grad[0]:
             grad_input = rois.new_zeros(batch_size, num_channels, data_height,
                                         data_width)
-            riroi_align_cuda.backward(grad_output.contiguous(), rois, out_h,
-                                      out_w, spatial_scale, sample_num, nOrientation,
-                                      grad_input)
+            if grad_output.is_cuda:
+                riroi_align_cuda.backward(grad_output.contiguous(), rois, out_h,
+                                          out_w, spatial_scale, sample_num, nOrientation,
+                                          grad_input)
+            else:
+                riroi_align_cpu.backward(grad_output.contiguous(), rois, out_h,
+                                         out_w, spatial_scale, sample_num, nOrientation,
+                                         grad_input)
 
         return grad_input, grad_rois, None, None, None, None
 
@@ -1,12 +1,21 @@
 from setuptools import setup
-from torch.utils.cpp_extension import BuildExtension, CUDAExtension
+from torch.utils.cpp_extension import (BuildExtension, CppExtension,
+                                       CUDAExtension, CUDA_HOME)
 
-setup(
-    name='riroi_align_cuda',
-    ext_modules=[
+ext_modules = [
+    CppExtension('riroi_align_cpu', [
+        'src/riroi_align_cpu.cpp',
+    ]),
+]
+# machines without a cuda toolkit only get the cpu kernel
+if CUDA_HOME is not None:
+    ext_modules.append(
         CUDAExtension('riroi_align_cuda', [
             'src/riroi_align_cuda.cpp',
             'src/riroi_align_kernel.cu',
-        ]),
-    ],
+        ]))
+
+setup(
+    name='riroi_align_cuda',
+    ext_modules=ext_modules,
     cmdclass={'build_ext': BuildExtension})
@@ -0,0 +1,146 @@
+import math
+import unittest
+
+import numpy as np
+import torch
+from torch.autograd import gradcheck
+
+import os.path as osp
+import sys
+sys.path.append(osp.abspath(osp.join(__file__, '../../')))
+from roi_align_rotated import RoIAlignRotated  # noqa: E402
+
+
+def bilinear_interpolate_torch(bottom, y, x):
+    """Pure PyTorch version of bilinear_interpolate in the kernels.
+
+    Args:
+        bottom (Tensor): (c, h, w) features.
+        y, x (Tensor): sampling points of any shape.
+
+    Returns:
+        Tensor: (c, *y.shape) values, differentiable w.r.t. `bottom`.
+    """
+    height, width = bottom.shape[1:]
+    valid = ~((y < -1.0) | (y > height) | (x < -1.0) | (x > width))
+    y = y.clamp(min=0)
+    x = x.clamp(min=0)
+    y_low = y.long()
+    x_low = x.long()
+    y_edge = y_low >= height - 1
+    x_edge = x_low >= width - 1
+    y_low = torch.where(y_edge, torch.full_like(y_low, height - 1), y_low)
+    x_low = torch.where(x_edge, torch.full_like(x_low, width - 1), x_low)
+    y_high = torch.where(y_edge, y_low, y_low + 1)
+    x_high = torch.where(x_edge, x_low, x_low + 1)
+    y = torch.where(y_edge, y_low.to(y), y)
+    x = torch.where(x_edge, x_low.to(x), x)
+
+    ly = y - y_low.to(y)
+    lx = x - x_low.to(x)
+    hy = 1. - ly
+    hx = 1. - lx
+    val = (hy * hx * bottom[:, y_low, x_low] +
+           hy * lx * bottom[:, y_low, x_high] +
+           ly * hx * bottom[:, y_high, x_low] +
+           ly * lx * bottom[:, y_high, x_high])
+    return val * valid.to(val)
+
+
+def roi_sampling_points(roi, out_h, out_w, spatial_scale, sample_num):
+    """(out_h, out_w, grid_h, grid_w) sampling points of a rotated roi."""
+    cx, cy, w, h = [float(v) * spatial_scale for v in roi[1:5]]
+    theta = float(roi[5])
+    w = max(w, 1.)
+    h = max(h, 1.)
+    bin_h = h / out_h
+    bin_w = w / out_w
+    grid_h = sample_num if sample_num > 0 else int(math.ceil(h / out_h))
+    grid_w = sample_num if sample_num > 0 else int(math.ceil(w / out_w))
+    ys = (-h / 2. + torch.arange(out_h, dtype=torch.float64)[:, None] * bin_h +
+          (torch.arange(grid_h, dtype=torch.float64) + .5) * bin_h / grid_h)
+    xs = (-w / 2. + torch.arange(out_w, dtype=torch.float64)[:, None] * bin_w +
+          (torch.arange(grid_w, dtype=torch.float64) + .5) * bin_w / grid_w)
+    yy = ys[:, None, :, None]
+    xx = xs[None, :, None, :]
+    x = xx * math.cos(theta) - yy * math.sin(theta) + cx
+    y = xx * math.sin(theta) + yy * math.cos(theta) + cy
+    return y, x
+
+
+def roi_align_rotated_torch(features, rois, out_size, spatial_scale,
+                            sample_num=0):
+    """Pure PyTorch reference of roi_align_rotated."""
+    outputs = []
+    for roi in rois:
+        y, x = roi_sampling_points(roi, out_size, out_size, spatial_scale,
+                                   sample_num)
+        val = bilinear_interpolate_torch(features[int(roi[0])], y.to(features),
+                                         x.to(features))
+        outputs.append(val.mean(dim=(-1, -2)))
+    return torch.stack(outputs)
+
+
+def random_rois(num, num_imgs, height, width):
+    rng = np.random.RandomState(0)
+    rois = np.zeros((num, 6))
+    rois[:, 0] = rng.randint(0, num_imgs, num)
+    # some rois cross the border of the feature map
+    rois[:, 1] = rng.uniform(-2, width + 2, num)
+    rois[:, 2] = rng.uniform(-2, height + 2, num)
+    rois[:, 3:5] = rng.uniform(0.5, 10, (num, 2))
+    rois[:, 5] = rng.uniform(-2 * np.pi, 2 * np.pi, num)
+    return torch.from_numpy(rois)
+
+
+class test_op_roi_align_rotated_cpu(unittest.TestCase):
+
+    def test_roi_align_rotated_value(self):
+        data = torch.arange(16.).view(1, 1, 4, 4)
+        rois = torch.tensor([[0, 1.0, 1.0, 2., 2., -np.pi / 2.],
+                             [0, 1.0, 1.0, 2., 2., 0],
+                             [0, 1.0, 1.0, 2., 2., np.pi / 2.],
+                             [0, 1.0, 1.0, 2., 2., np.pi]])
+        expected_feat = np.array([[[[6.5, 2.5], [7.5, 3.5]]],
+                                  [[[2.5, 3.5], [6.5, 7.5]]],
+                                  [[[3.5, 7.5], [2.5, 6.5]]],
+                                  [[[7.5, 6.5], [3.5, 2.5]]]])
+        results = RoIAlignRotated(out_size=2, spatial_scale=1)(data, rois)
+        np.testing.assert_almost_equal(results.numpy(), expected_feat,
+                                       decimal=6)
+
+    def test_roi_align_rotated_reference(self):
+        features = torch.rand(2, 6, 15, 17, dtype=torch.float64)
+        rois = random_rois(20, 2, 15, 17)
+        for spatial_scale, sample_num in ((1, 0), (0.5, 2)):
+            roi_align = RoIAlignRotated(3, spatial_scale, sample_num)
+            features.grad = None
+            features.requires_grad_()
+            out = roi_align(features, rois)
+            grad_out = torch.rand_like(out)
+            out.backward(grad_out)
+            grad = features.grad.clone()
+
+            features.grad = None
+            expected = roi_align_rotated_torch(features, rois, 3,
+                                               spatial_scale, sample_num)
+            expected.backward(grad_out)
+            np.testing.assert_allclose(out.detach().numpy(),
+                                       expected.detach().numpy(), atol=1e-10)
+            np.testing.assert_allclose(grad.numpy(), features.grad.numpy(),
+                                       atol=1e-10)
+
+            # float kernels agree up to float precision
+            out_float = roi_align(features.detach().float(), rois.float())
+            np.testing.assert_allclose(out_float.numpy(),
+                                       expected.detach().numpy(), atol=1e-4)
+
+    def test_roi_align_rotated_autograd(self):
+        x1 = torch.rand(3, 2, 12, 12, dtype=torch.float64, requires_grad=True)
+        x2 = random_rois(8, 3, 12, 12)
+        self.assertTrue(gradcheck(RoIAlignRotated(4, 1), (x1, x2)))
+        self.assertTrue(gradcheck(RoIAlignRotated(4, 1, 2), (x1, x2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
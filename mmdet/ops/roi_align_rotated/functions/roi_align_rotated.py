@@ -1,6 +1,11 @@
 from torch.autograd import Function
 
-from .. import roi_align_rotated_cuda
+from .. import roi_align_rotated_cpu
+try:
+    from .. import roi_align_rotated_cuda
+except ImportError:
+    # built without a cuda toolkit, only the cpu kernel is available
+    roi_align_rotated_cuda = None
 
 class RoIAlignRotatedFunction(Function):
 
@@ -30,7 +35,8 @@ class RoIAlignRotatedFunction(Function):
             roi_align_rotated_cuda.forward(features, rois, out_h, out_w, spatial_scale,
                                    sample_num, output)
         else:
-            raise NotImplementedError
+            roi_align_rotated_cpu.forward(features, rois, out_h, out_w, spatial_scale,
+                                          sample_num, output)
 
         return output
 
@@ -40,7 +46,7 @@ class RoIAlignRotatedFunction(Function):
         spatial_scale = ctx.spatial_scale
         sample_num = ctx.sample_num
         rois = ctx.saved_tensors[0]
-        assert (feature_size is not None and grad_output.is_cuda)
+        assert feature_size is not None
 
         batch_size, num_channels, data_height, data_width = feature_size
         out_w = grad_output.size(3)
@@ -50,9 +56,14 @@ class RoIAlignRotatedFunction(Function):
         if ctx.needs_input_grad[0]:
             grad_input = rois.new_zeros(batch_size, num_channels, data_height,
                                         data_width)
-            roi_align_rotated_cuda.backward(grad_output.contiguous(), rois, out_h,
-                                    out_w, spatial_scale, sample_num,
-                                    grad_input)
+            if grad_output.is_cuda:
+                roi_align_rotated_cuda.backward(grad_output.contiguous(), rois, out_h,
+                                                out_w, spatial_scale, sample_num,
+                                                grad_input)
+            else:
+                roi_align_rotated_cpu.backward(grad_output.contiguous(), rois, out_h,
+                                               out_w, spatial_scale, sample_num,
+                                               grad_input)
 
         return grad_input, grad_rois, None, None, None
 
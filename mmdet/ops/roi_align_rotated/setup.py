@@ -1,12 +1,21 @@
 from setuptools import setup
-from torch.utils.cpp_extension import BuildExtension, CUDAExtension
+from torch.utils.cpp_extension import (BuildExtension, CppExtension,
+                                       CUDAExtension, CUDA_HOME)
 
-setup(
-    name='roi_align_rotated_cuda',
-    ext_modules=[
+ext_modules = [
+    CppExtension('roi_align_rotated_cpu', [
+        'src/roi_align_rotated_cpu.cpp',
+    ]),
+]
+# machines without a cuda toolkit only get the cpu kernel
+if CUDA_HOME is not None:
+    ext_modules.append(
         CUDAExtension('roi_align_rotated_cuda', [
             'src/roi_align_rotated_cuda.cpp',
             'src/roi_align_rotated_kernel.cu',
-        ]),
-    ],
+        ]))
+
+setup(
+    name='roi_align_rotated_cuda',
+    ext_modules=ext_modules,
     cmdclass={'build_ext': BuildExtension})
@@ -0,0 +1,302 @@
+// CPU version of roi_align_rotated, the sampling follows
+// roi_align_rotated_kernel.cu
+#include <torch/extension.h>
+#include <ATen/Parallel.h>
+
+#include <algorithm>
+#include <cmath>
+#include <vector>
+
+// ######################################################
+#ifndef AT_CHECK
+#define AT_CHECK TORCH_CHECK
+#endif
+// #######################################################################################
+
+// the 4 neighbours and bilinear weights of one sampling point, the weights
+// are 0 when the point is outside the feature map
+template <typename scalar_t>
+struct PreCalc {
+  int pos1, pos2, pos3, pos4;
+  scalar_t w1, w2, w3, w4;
+};
+
+// sampling points of all bins of one roi, they are shared by every channel
+template <typename scalar_t>
+void pre_calc_for_bilinear_interpolate(
+    const int height, const int width, const int pooled_height,
+    const int pooled_width, const int roi_bin_grid_h, const int roi_bin_grid_w,
+    const scalar_t roi_start_h, const scalar_t roi_start_w,
+    const scalar_t bin_size_h, const scalar_t bin_size_w,
+    const scalar_t roi_center_h, const scalar_t roi_center_w,
+    const scalar_t cos_theta, const scalar_t sin_theta,
+    std::vector<PreCalc<scalar_t>>& pre_calc) {
+  int index = 0;
+  for (int ph = 0; ph < pooled_height; ph++) {
+    for (int pw = 0; pw < pooled_width; pw++) {
+      for (int iy = 0; iy < roi_bin_grid_h; iy++) {
+        const scalar_t yy = roi_start_h + ph * bin_size_h +
+            static_cast<scalar_t>(iy + .5f) * bin_size_h /
+                static_cast<scalar_t>(roi_bin_grid_h);
+        for (int ix = 0; ix < roi_bin_grid_w; ix++) {
+          const scalar_t xx = roi_start_w + pw * bin_size_w +
+              static_cast<scalar_t>(ix + .5f) * bin_size_w /
+                  static_cast<scalar_t>(roi_bin_grid_w);
+
+          // Rotate by theta around the center and translate
+          scalar_t x = xx * cos_theta - yy * sin_theta + roi_center_w;
+          scalar_t y = xx * sin_theta + yy * cos_theta + roi_center_h;
+
+          PreCalc<scalar_t>& pc = pre_calc[index++];
+          // deal with cases that inverse elements are out of feature map
+          // boundary
+          if (y < -1.0 || y > height || x < -1.0 || x > width) {
+            pc.pos1 = pc.pos2 = pc.pos3 = pc.pos4 = 0;
+            pc.w1 = pc.w2 = pc.w3 = pc.w4 = 0;
+            continue;
+          }
+
+          if (y <= 0) y = 0;
+          if (x <= 0) x = 0;
+
+          int y_low = (int)y;
+          int x_low = (int)x;
+          int y_high;
+          int x_high;
+
+          if (y_low >= height - 1) {
+            y_high = y_low = height - 1;
+            y = (scalar_t)y_low;
+          } else {
+            y_high = y_low + 1;
+          }
+
+          if (x_low >= width - 1) {
+            x_high = x_low = width - 1;
+            x = (scalar_t)x_low;
+          } else {
+            x_high = x_low + 1;
+          }
+
+          scalar_t ly = y - y_low;
+          scalar_t lx = x - x_low;
+          scalar_t hy = 1. - ly;
+          scalar_t hx = 1. - lx;
+
+          pc.pos1 = y_low * width + x_low;
+          pc.pos2 = y_low * width + x_high;
+          pc.pos3 = y_high * width + x_low;
+          pc.pos4 = y_high * width + x_high;
+          pc.w1 = hy * hx;
+          pc.w2 = hy * lx;
+          pc.w3 = ly * hx;
+          pc.w4 = ly * lx;
+        }
+      }
+    }
+  }
+}
+
+template <typename scalar_t>
+struct RoIGeometry {
+  int batch_ind;
+  int roi_bin_grid_h, roi_bin_grid_w;
+  scalar_t count;
+};
+
+template <typename scalar_t>
+RoIGeometry<scalar_t> roi_geometry(const scalar_t* offset_bottom_rois,
+                                   const scalar_t spatial_scale,
+                                   const int sample_num, const int height,
+                                   const int width, const int pooled_height,
+                                   const int pooled_width,
+                                   std::vector<PreCalc<scalar_t>>& pre_calc) {
+  RoIGeometry<scalar_t> geo;
+  geo.batch_ind = offset_bottom_rois[0];
+
+  // Do not using rounding; this implementation detail is critical
+  scalar_t roi_center_w = offset_bottom_rois[1] * spatial_scale;
+  scalar_t roi_center_h = offset_bottom_rois[2] * spatial_scale;
+  scalar_t roi_width = offset_bottom_rois[3] * spatial_scale;
+  scalar_t roi_height = offset_bottom_rois[4] * spatial_scale;
+  scalar_t theta = offset_bottom_rois[5];
+
+  // Force malformed ROIs to be 1x1
+  roi_width = std::max(roi_width, (scalar_t)1.);
+  roi_height = std::max(roi_height, (scalar_t)1.);
+  scalar_t bin_size_h =
+      static_cast<scalar_t>(roi_height) / static_cast<scalar_t>(pooled_height);
+  scalar_t bin_size_w =
+      static_cast<scalar_t>(roi_width) / static_cast<scalar_t>(pooled_width);
+
+  // We use roi_bin_grid to sample the grid and mimic integral
+  geo.roi_bin_grid_h =
+      (sample_num > 0) ? sample_num : std::ceil(roi_height / pooled_height);
+  geo.roi_bin_grid_w =
+      (sample_num > 0) ? sample_num : std::ceil(roi_width / pooled_width);
+  // We do average (integral) pooling inside a bin
+  geo.count = geo.roi_bin_grid_h * geo.roi_bin_grid_w;
+
+  pre_calc.resize(geo.roi_bin_grid_h * geo.roi_bin_grid_w * pooled_height *
+                  pooled_width);
+  pre_calc_for_bilinear_interpolate<scalar_t>(
+      height, width, pooled_height, pooled_width, geo.roi_bin_grid_h,
+      geo.roi_bin_grid_w, -roi_height / 2.0, -roi_width / 2.0, bin_size_h,
+      bin_size_w, roi_center_h, roi_center_w, std::cos(theta),
+      std::sin(theta), pre_calc);
+  return geo;
+}
+
+template <typename scalar_t>
+void ROIAlignRotatedForward(const scalar_t* bottom_data,
+                            const scalar_t* bottom_rois,
+                            const scalar_t spatial_scale, const int sample_num,
+                            const int num_rois, const int channels,
+                            const int height, const int width,
+                            const int pooled_height, const int pooled_width,
+                            scalar_t* top_data) {
+  // every roi writes its own output, split the rois between threads
+  at::parallel_for(0, num_rois, 1, [&](int64_t begin, int64_t end) {
+    std::vector<PreCalc<scalar_t>> pre_calc;
+    for (int n = begin; n < end; n++) {
+      RoIGeometry<scalar_t> geo = roi_geometry<scalar_t>(
+          bottom_rois + n * 6, spatial_scale, sample_num, height, width,
+          pooled_height, pooled_width, pre_calc);
+      const int grid_size = geo.roi_bin_grid_h * geo.roi_bin_grid_w;
+
+      for (int c = 0; c < channels; c++) {
+        const scalar_t* offset_bottom_data =
+            bottom_data + (geo.batch_ind * channels + c) * height * width;
+        scalar_t* offset_top_data =
+            top_data + (n * channels + c) * pooled_height * pooled_width;
+        const PreCalc<scalar_t>* pc = pre_calc.data();
+        for (int i = 0; i < pooled_height * pooled_width; i++) {
+          scalar_t output_val = 0.;
+          for (int j = 0; j < grid_size; j++, pc++) {
+            output_val += pc->w1 * offset_bottom_data[pc->pos1] +
+                          pc->w2 * offset_bottom_data[pc->pos2] +
+                          pc->w3 * offset_bottom_data[pc->pos3] +
+                          pc->w4 * offset_bottom_data[pc->pos4];
+          }
+          offset_top_data[i] = output_val / geo.count;
+        }
+      }
+    }
+  });
+}
+
+template <typename scalar_t>
+void ROIAlignRotatedBackward(const scalar_t* top_diff,
+                             const scalar_t* bottom_rois,
+                             const scalar_t spatial_scale,
+                             const int sample_num, const int num_rois,
+                             const int channels, const int height,
+                             const int width, const int pooled_height,
+                             const int pooled_width, scalar_t* bottom_diff) {
+  // rois overlap, so split the channels between threads instead, each thread
+  // only accumulates into its own channels and no atomics are needed
+  at::parallel_for(0, channels, 1, [&](int64_t begin, int64_t end) {
+    std::vector<PreCalc<scalar_t>> pre_calc;
+    for (int n = 0; n < num_rois; n++) {
+      RoIGeometry<scalar_t> geo = roi_geometry<scalar_t>(
+          bottom_rois + n * 6, spatial_scale, sample_num, height, width,
+          pooled_height, pooled_width, pre_calc);
+      const int grid_size = geo.roi_bin_grid_h * geo.roi_bin_grid_w;
+
+      for (int c = begin; c < end; c++) {
+        scalar_t* offset_bottom_diff =
+            bottom_diff + (geo.batch_ind * channels + c) * height * width;
+        const scalar_t* offset_top_diff =
+            top_diff + (n * channels + c) * pooled_height * pooled_width;
+        const PreCalc<scalar_t>* pc = pre_calc.data();
+        for (int i = 0; i < pooled_height * pooled_width; i++) {
+          const scalar_t top_diff_this_bin = offset_top_diff[i] / geo.count;
+          for (int j = 0; j < grid_size; j++, pc++) {
+            // the weights of points outside the feature map are 0
+            offset_bottom_diff[pc->pos1] += top_diff_this_bin * pc->w1;
+            offset_bottom_diff[pc->pos2] += top_diff_this_bin * pc->w2;
+            offset_bottom_diff[pc->pos3] += top_diff_this_bin * pc->w3;
+            offset_bottom_diff[pc->pos4] += top_diff_this_bin * pc->w4;
+          }
+        }
+      }
+    }
+  });
+}
+
+#define CHECK_CPU(x) AT_CHECK(!x.type().is_cuda(), #x, " must be a CPU tensor ")
+#define CHECK_CONTIGUOUS(x) \
+  AT_CHECK(x.is_contiguous(), #x, " must be contiguous ")
+#define CHECK_INPUT(x) \
+  CHECK_CPU(x);        \
+  CHECK_CONTIGUOUS(x)
+
+int roi_align_rotated_forward_cpu(at::Tensor features, at::Tensor rois,
+                                  int pooled_height, int pooled_width,
+                                  float spatial_scale, int sample_num,
+                                  at::Tensor output) {
+  CHECK_INPUT(features);
+  CHECK_INPUT(rois);
+  CHECK_INPUT(output);
+
+  // Number of ROIs
+  int num_rois = rois.size(0);
+  int size_rois = rois.size(1);
+
+  if (size_rois != 6) {
+    printf("wrong roi size\n");
+    return 0;
+  }
+
+  int num_channels = features.size(1);
+  int data_height = features.size(2);
+  int data_width = features.size(3);
+
+  AT_DISPATCH_FLOATING_TYPES(
+      features.type(), "ROIAlignRotatedForward", ([&] {
+        ROIAlignRotatedForward<scalar_t>(
+            features.data<scalar_t>(), rois.data<scalar_t>(),
+            scalar_t(spatial_scale), sample_num, num_rois, num_channels,
+            data_height, data_width, pooled_height, pooled_width,
+            output.data<scalar_t>());
+      }));
+  return 1;
+}
+
+int roi_align_rotated_backward_cpu(at::Tensor top_grad, at::Tensor rois,
+                                   int pooled_height, int pooled_width,
+                                   float spatial_scale, int sample_num,
+                                   at::Tensor bottom_grad) {
+  CHECK_INPUT(top_grad);
+  CHECK_INPUT(rois);
+  CHECK_INPUT(bottom_grad);
+
+  // Number of ROIs
+  int num_rois = rois.size(0);
+  int size_rois = rois.size(1);
+  if (size_rois != 6) {
+    printf("wrong roi size\n");
+    return 0;
+  }
+
+  int num_channels = bottom_grad.size(1);
+  int data_height = bottom_grad.size(2);
+  int data_width = bottom_grad.size(3);
+
+  AT_DISPATCH_FLOATING_TYPES(
+      top_grad.type(), "ROIAlignRotatedBackward", ([&] {
+        ROIAlignRotatedBackward<scalar_t>(
+            top_grad.data<scalar_t>(), rois.data<scalar_t>(),
+            scalar_t(spatial_scale), sample_num, num_rois, num_channels,
+            data_height, data_width, pooled_height, pooled_width,
+            bottom_grad.data<scalar_t>());
+      }));
+  return 1;
+}
+
+PYBIND11_MODULE(TORCH_EXTENSION_NAME, m) {
+  m.def("forward", &roi_align_rotated_forward_cpu,
+        "Roi_Align_Rotated forward (CPU)");
+  m.def("backward", &roi_align_rotated_backward_cpu,
+        "Roi_Align_Rotated backward (CPU)");
+}
@@ -1,4 +1,7 @@
 from .flops_counter import get_model_complexity_info
 from .registry import Registry, build_from_cfg
+from .stage_profiler import StageProfiler
 
-__all__ = ['Registry', 'build_from_cfg', 'get_model_complexity_info']
+__all__ = [
+    'Registry', 'build_from_cfg', 'get_model_complexity_info', 'StageProfiler'
+]
@@ -0,0 +1,358 @@
+import sys
+import time
+from collections import OrderedDict
+
+import mmcv
+import numpy as np
+import torch
+
+
+def _count_rows(out):
+    return out.size(0)
+
+
+def _count_list(out):
+    return sum(item.size(0) for item in out)
+
+
+def _count_dets(out):
+    return out[0].size(0)
+
+
+def _count_det_list(out):
+    return sum(dets.size(0) for dets, _ in out)
+
+
+# (stage, owner of the method, method, count of the output) of the test
+# forwards of the detectors, the stages a detector does not have are skipped
+STAGES = [
+    ('backbone', 'backbone', 'forward', None),
+    ('neck', 'neck', 'forward', None),
+    ('rpn_head', 'rpn_head', 'forward', None),
+    ('rpn_head.get_bboxes', 'rpn_head', 'get_bboxes', _count_list),
+    ('bbox_roi_extractor', 'bbox_roi_extractor', 'forward', _count_rows),
+    ('bbox_head', 'bbox_head', 'forward', None),
+    ('bbox_head.regress_by_class_rbbox', 'bbox_head',
+     'regress_by_class_rbbox', _count_rows),
+    ('bbox_head.get_det_bboxes', 'bbox_head', 'get_det_bboxes', _count_dets),
+    ('rbbox_roi_extractor', 'rbbox_roi_extractor', 'forward', _count_rows),
+    ('rbbox_head', 'rbbox_head', 'forward', None),
+    ('rbbox_head.get_det_rbboxes', 'rbbox_head', 'get_det_rbboxes',
+     _count_dets),
+    ('rbbox_head.get_bboxes', 'rbbox_head', 'get_bboxes', _count_det_list),
+]
+
+# functions timed where the detectors and their heads call them, i.e. in the
+# globals of the modules that define their classes
+FUNCTION_STAGES = [('multiclass_nms_rbbox', _count_dets)]
+
+
+def _reset_peak_memory():
+    if hasattr(torch.cuda, 'reset_peak_memory_stats'):
+        torch.cuda.reset_peak_memory_stats()
+    else:
+        torch.cuda.reset_max_memory_allocated()
+
+
+def _stats(values, percentiles):
+    stats = OrderedDict(mean=float(np.mean(values)))
+    for p in percentiles:
+        stats['p{}'.format(p)] = float(np.percentile(values, p))
+    stats['max'] = float(np.max(values))
+    return stats
+
+
+class StageProfiler(object):
+    """Per stage latency of the test forwards of a detector.
+
+    The profiler wraps the `forward_test` of a `BaseDetectorNew` and the
+    methods of its components listed in `STAGES`. Each test forward gives a
+    trace of the stages it went through, i.e. a trace per image when the
+    images are tested one at a time. A stage called several times in a
+    forward, e.g. `get_det_rbboxes` for each image of a batch, is summed up.
+    Stages may be nested, e.g. `multiclass_nms_rbbox` is part of
+    `rbbox_head.get_det_rbboxes`, so their times do not add up.
+
+    For each stage the trace records:
+
+    - wall: host seconds from the entry to the exit of the stage. CUDA
+      kernels run asynchronously, so this is only the launch time of the
+      stages that do not wait for their results, unless `synchronize` is
+      set.
+    - device: seconds between two CUDA events recorded on the current
+      stream at the entry and the exit of the stage, read once the forward
+      is done. Same as `wall` on the cpu.
+    - count: size of the output, i.e. the proposals of the rpn, the rois and
+      rrois of the roi extractors and the detections kept by the nms.
+    - peak_mem: peak of the allocated CUDA memory during the stage, in MB.
+
+    The `total` stage is the whole test forward, which waits for the device
+    before it ends. The profiler only has the cost of the wrappers and the
+    CUDA events, the model runs unchanged once it is detached.
+
+    Args:
+        model (nn.Module): the detector, not wrapped by `MMDataParallel`.
+        synchronize (bool): synchronize the device at the entry and exit of
+            every stage, so that the wall times include the kernels of the
+            stage. This serializes the host and the device.
+
+    Example:
+        >>> profiler = StageProfiler(model)
+        >>> with profiler:
+        ...     for data in data_loader:
+        ...         with torch.no_grad():
+        ...             result = model(return_loss=False, rescale=True,
+        ...                            **data)
+        >>> print(profiler.report(warmup=5))
+        >>> profiler.dump('profile.json', warmup=5)
+    """
+
+    def __init__(self, model, synchronize=False):
+        self.model = model
+        self.synchronize = synchronize
+        self.traces = []
+        self._patches = []
+        self._trace = None
+
+    def __enter__(self):
+        self.attach()
+        return self
+
+    def __exit__(self, *args):
+        self.detach()
+
+    @property
+    def attached(self):
+        return len(self._patches) > 0
+
+    def attach(self):
+        assert not self.attached, 'the profiler is already attached'
+        self._patch(self.model, 'forward_test', self._trace_wrapper)
+        for stage, owner, method, count in STAGES:
+            owner = getattr(self.model, owner, None)
+            if owner is not None and hasattr(owner, method):
+                self._patch(owner, method, self._stage_wrapper(stage, count))
+        for name, count in FUNCTION_STAGES:
+            for module in self._modules_calling(name):
+                self._patch(module, name, self._stage_wrapper(name, count))
+
+    def detach(self):
+        for owner, name, orig in reversed(self._patches):
+            if orig is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, orig)
+        self._patches = []
+
+    def _patch(self, owner, name, make_wrapper):
+        # methods are patched on the instances, functions in the module
+        # globals, detach restores both
+        self._patches.append((owner, name, owner.__dict__.get(name)))
+        setattr(owner, name, make_wrapper(getattr(owner, name)))
+
+    def _modules_calling(self, name):
+        owners = [self.model] + [
+            getattr(self.model, owner, None) for _, owner, _, _ in STAGES
+        ]
+        modules = []
+        for owner in owners:
+            if owner is None:
+                continue
+            for cls in type(owner).__mro__:
+                module = sys.modules.get(cls.__module__)
+                if (module is not None and name in module.__dict__
+                        and module not in modules):
+                    modules.append(module)
+        return modules
+
+    def _trace_wrapper(self, func):
+
+        def forward_test(imgs, img_metas, **kwargs):
+            if self._trace is not None:
+                return func(imgs, img_metas, **kwargs)
+            self._trace = dict(cuda=imgs[0].is_cuda, stack=[], records=[])
+            try:
+                out, total = self._run(func, (imgs, img_metas), kwargs)
+                self.traces.append(
+                    self._finish_trace(imgs[0].size(0), img_metas[0], total))
+            finally:
+                self._trace = None
+            return out
+
+        return forward_test
+
+    def _stage_wrapper(self, stage, count):
+
+        def wrap(func):
+
+            def wrapper(*args, **kwargs):
+                # only the test forwards are traced
+                if self._trace is None:
+                    return func(*args, **kwargs)
+                out, record = self._run(func, args, kwargs, stage)
+                if count is not None:
+                    record['count'] = count(out)
+                return out
+
+            return wrapper
+
+        return wrap
+
+    def _run(self, func, args, kwargs, stage=None):
+        cuda = self._trace['cuda']
+        stack = self._trace['stack']
+        record = dict(wall=0., device=None, count=None, peak_mem=None)
+        total = stage is None
+        if not total:
+            # in the order the stages are entered
+            self._trace['records'].append((stage, record))
+        if cuda:
+            if self.synchronize:
+                torch.cuda.synchronize()
+            # the peak reached so far by the enclosing stages is kept before
+            # the counter is reset for this one
+            peak = torch.cuda.max_memory_allocated()
+            for outer in stack:
+                outer['peak_mem'] = max(outer['peak_mem'], peak)
+            _reset_peak_memory()
+            record['peak_mem'] = 0
+            record['events'] = (torch.cuda.Event(enable_timing=True),
+                                torch.cuda.Event(enable_timing=True))
+            record['events'][0].record()
+        stack.append(record)
+        tic = time.perf_counter()
+        try:
+            out = func(*args, **kwargs)
+            if cuda:
+                record['events'][1].record()
+                if self.synchronize or total:
+                    torch.cuda.synchronize()
+            record['wall'] = time.perf_counter() - tic
+        finally:
+            stack.pop()
+        if cuda:
+            record['peak_mem'] = max(record['peak_mem'],
+                                     torch.cuda.max_memory_allocated())
+            if stack:
+                stack[-1]['peak_mem'] = max(stack[-1]['peak_mem'],
+                                            record['peak_mem'])
+        return out, record
+
+    def _finish_trace(self, num_imgs, img_metas, total):
+        # the total stage has synchronized the device, the events are done
+        for record in [total] + [r for _, r in self._trace['records']]:
+            if 'events' in record:
+                start, end = record.pop('events')
+                record['device'] = start.elapsed_time(end) / 1e3
+                record['peak_mem'] /= 2.**20
+            else:
+                record['device'] = record['wall']
+        stages = OrderedDict()
+        for stage, record in self._trace['records']:
+            if stage not in stages:
+                stages[stage] = OrderedDict(
+                    calls=0, wall=0., device=0., count=None, peak_mem=None)
+            acc = stages[stage]
+            acc['calls'] += 1
+            acc['wall'] += record['wall']
+            acc['device'] += record['device']
+            if record['count'] is not None:
+                acc['count'] = (acc['count'] or 0) + record['count']
+            if record['peak_mem'] is not None:
+                acc['peak_mem'] = max(acc['peak_mem'] or 0.,
+                                      record['peak_mem'])
+        return OrderedDict(
+            num_imgs=num_imgs,
+            filenames=[img_meta.get('filename') for img_meta in img_metas],
+            total=OrderedDict(
+                wall=total['wall'],
+                device=total['device'],
+                peak_mem=total['peak_mem']),
+            stages=stages)
+
+    def summary(self, warmup=0, percentiles=(50, 90, 99)):
+        """Percentiles of the stages over the traces.
+
+        Args:
+            warmup (int): number of first traces left out, e.g. the forwards
+                that pick the cudnn algorithms.
+            percentiles (Sequence[int]): percentiles of the times and counts.
+
+        Returns:
+            OrderedDict: the number of traces and images, the images per
+                second of the total wall time and the stats of each stage.
+                The stats of a stage are over the traces that went through
+                it, `calls` is its mean calls per trace.
+        """
+        traces = self.traces[warmup:]
+        assert len(traces) > 0, 'no trace after the {} warmup traces'.format(
+            warmup)
+        names = []
+        for trace in traces:
+            names.extend(name for name in trace['stages'] if name not in names)
+
+        num_imgs = sum(trace['num_imgs'] for trace in traces)
+        stages = OrderedDict()
+        for name in ['total'] + names:
+            records = [
+                trace['total'] if name == 'total' else trace['stages'][name]
+                for trace in traces if name == 'total' or name in
+                trace['stages']
+            ]
+            counts = [r['count'] for r in records if r.get('count') is not None]
+            peaks = [r['peak_mem'] for r in records if r['peak_mem'] is not None]
+            stages[name] = OrderedDict(
+                traces=len(records),
+                calls=float(np.mean([r.get('calls', 1) for r in records])),
+                wall=_stats([r['wall'] for r in records], percentiles),
+                device=_stats([r['device'] for r in records], percentiles),
+                count=_stats(counts, percentiles) if counts else None,
+                peak_mem=max(peaks) if peaks else None)
+        return OrderedDict(
+            num_traces=len(traces),
+            num_imgs=num_imgs,
+            imgs_per_s=num_imgs / sum(trace['total']['wall']
+                                      for trace in traces),
+            stages=stages)
+
+    def report(self, warmup=0, percentiles=(50, 90, 99)):
+        """The summary as a table, times in ms and memory in MB."""
+        summary = self.summary(warmup, percentiles)
+        time_keys = ['mean'] + ['p{}'.format(p) for p in percentiles]
+        header = ['stage', 'calls'] + ['wall ' + k for k in time_keys] + [
+            'device ' + k for k in time_keys
+        ] + ['count mean', 'peak MB']
+        rows = []
+        for name, stats in summary['stages'].items():
+            row = [name, '{:.1f}'.format(stats['calls'])]
+            for key in ['wall', 'device']:
+                row.extend('{:.2f}'.format(stats[key][k] * 1e3)
+                           for k in time_keys)
+            row.append('-' if stats['count'] is None else '{:.1f}'.format(
+                stats['count']['mean']))
+            row.append('-' if stats['peak_mem'] is None else '{:.1f}'.format(
+                stats['peak_mem']))
+            rows.append(row)
+        widths = [
+            max(len(row[i]) for row in [header] + rows)
+            for i in range(len(header))
+        ]
+        lines = [
+            '  '.join(cell.ljust(w) if i == 0 else cell.rjust(w)
+                      for i, (cell, w) in enumerate(zip(row, widths)))
+            for row in [header] + rows
+        ]
+        lines.append('{} traces, {} images, {:.2f} images/s'.format(
+            summary['num_traces'], summary['num_imgs'],
+            summary['imgs_per_s']))
+        return '\n'.join(lines)
+
+    def dump(self, file, warmup=0, percentiles=(50, 90, 99)):
+        """Write the summary and all the traces, warmup included, to a json
+        file."""
+        mmcv.dump(
+            OrderedDict(
+                warmup=warmup,
+                synchronize=self.synchronize,
+                summary=self.summary(warmup, percentiles),
+                traces=self.traces), file)
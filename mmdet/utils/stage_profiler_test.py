@@ -0,0 +1,139 @@
+import json
+import os
+import os.path as osp
+import tempfile
+import unittest
+import torch
+import torch.nn as nn
+from mmdet.utils.stage_profiler import StageProfiler
+
+
+def multiclass_nms_rbbox(dets, scores):
+    keep = scores > 0.5
+    return dets[keep], scores[keep]
+
+
+class ToyRPNHead(nn.Linear):
+
+    def get_bboxes(self, outs, img_metas):
+        return [outs[i, :, :5] for i in range(len(img_metas))]
+
+
+class ToyRbboxHead(nn.Linear):
+
+    def get_det_rbboxes(self, rrois, scores):
+        return multiclass_nms_rbbox(rrois, scores)
+
+
+class ToyDetector(nn.Module):
+    """The test forward of a two stage detector on (n, 10, 8) features."""
+
+    def __init__(self):
+        super(ToyDetector, self).__init__()
+        self.backbone = nn.Linear(8, 8)
+        self.rpn_head = ToyRPNHead(8, 8)
+        self.rbbox_head = ToyRbboxHead(5, 1)
+
+    def forward_test(self, imgs, img_metas):
+        x = self.backbone(imgs[0])
+        proposal_list = self.rpn_head.get_bboxes(self.rpn_head(x), img_metas[0])
+        results = []
+        for proposals in proposal_list:
+            scores = torch.sigmoid(self.rbbox_head(proposals)).squeeze(1)
+            results.append(self.rbbox_head.get_det_rbboxes(proposals, scores))
+        return results
+
+    def forward(self, img, img_meta, return_loss=True):
+        if return_loss:
+            return self.backbone(img[0]).sum()
+        return self.forward_test(img, img_meta)
+
+
+class TestStageProfiler(unittest.TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.model = ToyDetector()
+        self.imgs = [torch.randn(2, 10, 8)]
+        self.img_metas = [[dict(filename='P0000.png'), dict(filename='P0001.png')]]
+
+    def test_traces(self):
+        expected = self.model(self.imgs, self.img_metas, return_loss=False)
+        with StageProfiler(self.model) as profiler:
+            results = self.model(self.imgs, self.img_metas, return_loss=False)
+            # the train forwards are not traced
+            self.model(self.imgs, self.img_metas)
+        self.assertEqual(len(profiler.traces), 1)
+        for (dets, scores), (dets_, scores_) in zip(results, expected):
+            self.assertTrue(torch.equal(dets, dets_))
+            self.assertTrue(torch.equal(scores, scores_))
+
+        trace = profiler.traces[0]
+        self.assertEqual(trace['num_imgs'], 2)
+        self.assertEqual(trace['filenames'], ['P0000.png', 'P0001.png'])
+        self.assertEqual(list(trace['stages']), [
+            'backbone', 'rpn_head', 'rpn_head.get_bboxes', 'rbbox_head',
+            'rbbox_head.get_det_rbboxes', 'multiclass_nms_rbbox'
+        ])
+        stages = trace['stages']
+        self.assertEqual(stages['rpn_head.get_bboxes']['count'], 20)
+        self.assertEqual(stages['rbbox_head']['calls'], 2)
+        num_dets = sum(len(dets) for dets, _ in results)
+        self.assertEqual(stages['rbbox_head.get_det_rbboxes']['count'],
+                         num_dets)
+        self.assertEqual(stages['multiclass_nms_rbbox']['count'], num_dets)
+        # the nms is nested in get_det_rbboxes, everything in the total
+        self.assertLessEqual(stages['multiclass_nms_rbbox']['wall'],
+                             stages['rbbox_head.get_det_rbboxes']['wall'])
+        self.assertLessEqual(
+            sum(stages[name]['wall'] for name in
+                ['backbone', 'rpn_head', 'rbbox_head']),
+            trace['total']['wall'])
+        for stage in stages.values():
+            self.assertEqual(stage['device'], stage['wall'])
+            self.assertIsNone(stage['peak_mem'])
+
+    def test_detach(self):
+        profiler = StageProfiler(self.model)
+        profiler.attach()
+        self.assertTrue(profiler.attached)
+        profiler.detach()
+        self.assertFalse(profiler.attached)
+        self.assertNotIn('forward_test', self.model.__dict__)
+        self.assertNotIn('forward', self.model.backbone.__dict__)
+        self.assertNotIn('get_bboxes', self.model.rpn_head.__dict__)
+        self.assertEqual(multiclass_nms_rbbox.__name__, 'multiclass_nms_rbbox')
+        self.model(self.imgs, self.img_metas, return_loss=False)
+        self.assertEqual(profiler.traces, [])
+
+    def test_summary(self):
+        with StageProfiler(self.model) as profiler:
+            for _ in range(6):
+                self.model(self.imgs, self.img_metas, return_loss=False)
+        summary = profiler.summary(warmup=1, percentiles=(50, 90))
+        self.assertEqual(summary['num_traces'], 5)
+        self.assertEqual(summary['num_imgs'], 10)
+        self.assertEqual(list(summary['stages'])[:2], ['total', 'backbone'])
+        total = summary['stages']['total']
+        self.assertEqual(list(total['wall']), ['mean', 'p50', 'p90', 'max'])
+        self.assertLessEqual(total['wall']['p50'], total['wall']['max'])
+        self.assertIsNone(total['count'])
+        self.assertEqual(summary['stages']['rbbox_head']['calls'], 2.)
+        self.assertIn('rbbox_head.get_det_rbboxes', profiler.report(1))
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            filename = osp.join(tmp_dir, 'profile.json')
+            profiler.dump(filename, warmup=1)
+            with open(filename) as f:
+                profile = json.load(f)
+            self.assertEqual(len(profile['traces']), 6)
+            self.assertEqual(profile['summary']['num_traces'], 5)
+        finally:
+            if osp.exists(osp.join(tmp_dir, 'profile.json')):
+                os.remove(osp.join(tmp_dir, 'profile.json'))
+            os.rmdir(tmp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+"""Convert a COCO style annotation file to a memory mapped annotation cache.
+
+The CocoDataset based datasets (DOTA, HRSC, UCAS-AOD, ...) load the cache
+when `ann_file` is its directory. It is faster to start than the json and the
+dataloader workers share its pages.
+
+Example:
+    python tools/convert_datasets/coco_ann_cache.py \
+        data/dota1_1024/trainval1024/DOTA_trainval1024.json \
+        data/dota1_1024/trainval1024/DOTA_trainval1024_cache
+"""
+import argparse
+
+from mmdet.datasets import build_ann_cache
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Convert a COCO style json to an annotation cache')
+    parser.add_argument('ann_file', help='COCO style json file')
+    parser.add_argument('cache_dir', help='output directory')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    build_ann_cache(args.ann_file, args.cache_dir)
+    print('saved the annotation cache to {}'.format(args.cache_dir))
+
+
+if __name__ == '__main__':
+    main()
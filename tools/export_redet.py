@@ -0,0 +1,117 @@
+"""Export a trained ReDet to plain torch.nn layers for inference.
+
+The e2cnn ReResNet backbone and ReFPN neck are replaced by ReResNetPlain and
+ReFPNPlain, with expanded filters and the batch norms folded into the convs.
+The exported features are checked against the original model on a random
+input, then the checkpoint and a config using the plain modules are written.
+Loading them with `init_detector` does not need e2cnn.
+
+Example:
+    python tools/export_redet.py configs/ReDet/ReDet_re50_refpn_1x_dota1.py \
+        work_dirs/ReDet_re50_refpn_1x_dota1/epoch_12.pth \
+        work_dirs/ReDet_re50_refpn_1x_dota1/ReDet_plain.pth
+"""
+import argparse
+import os.path as osp
+import re
+import time
+from collections import OrderedDict
+
+import mmcv
+import torch
+from mmcv.runner import load_checkpoint
+
+from mmdet.models import build_detector
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Export ReDet to plain torch.nn layers')
+    parser.add_argument('config', help='config file of the trained model')
+    parser.add_argument('checkpoint', help='checkpoint file')
+    parser.add_argument('out_file', help='output checkpoint filename')
+    parser.add_argument(
+        '--out-config',
+        help='output config filename, defaults to the output checkpoint '
+        'name with a .py extension')
+    parser.add_argument(
+        '--shape',
+        type=int,
+        nargs=2,
+        default=[512, 512],
+        help='(h, w) of the random input used to check the export')
+    parser.add_argument(
+        '--tol',
+        type=float,
+        default=1e-4,
+        help='max error relative to the largest feature value')
+    args = parser.parse_args()
+    return args
+
+
+def plain_config_text(text, orientation, fixparams):
+    """Switch ReResNet/ReFPN in a config text to the plain modules."""
+    extra = ('orientation={}, fixparams={},'.format(orientation, fixparams))
+    for src, dst in (('ReResNet', 'ReResNetPlain'), ('ReFPN', 'ReFPNPlain')):
+        text, num = re.subn(
+            r'type=([\'"]){}\1,'.format(src),
+            "type='{}', {}".format(dst, extra), text)
+        assert num == 1, 'can not find type={} in the config'.format(src)
+    return text
+
+
+def check_export(model, plain_backbone, plain_neck, shape, tol):
+    x = torch.rand(1, 3, *shape)
+    with torch.no_grad():
+        t0 = time.time()
+        expected = model.neck(model.backbone(x))
+        t1 = time.time()
+        outs = plain_neck(plain_backbone(x))
+        t2 = time.time()
+    for i, (out, exp) in enumerate(zip(outs, expected)):
+        assert out.shape == exp.shape
+        err = ((out - exp).abs().max() / exp.abs().max()).item()
+        print('level {}: {}, relative error {:.2e}'.format(
+            i, tuple(out.shape), err))
+        if err > tol:
+            raise RuntimeError(
+                'exported features differ from the original at level {}: '
+                '{:.2e} > {:.2e}'.format(i, err, tol))
+    print('e2cnn forward {:.3f}s, plain forward {:.3f}s'.format(
+        t1 - t0, t2 - t1))
+
+
+def main():
+    args = parse_args()
+    cfg = mmcv.Config.fromfile(args.config)
+    assert cfg.model.backbone.type == 'ReResNet'
+    assert cfg.model.neck.type == 'ReFPN'
+    cfg.model.pretrained = None
+    model = build_detector(cfg.model, train_cfg=None, test_cfg=cfg.test_cfg)
+    checkpoint = load_checkpoint(model, args.checkpoint, map_location='cpu')
+    model.eval()
+
+    plain_backbone = model.backbone.export()
+    plain_neck = model.neck.export()
+    check_export(model, plain_backbone, plain_neck, args.shape, args.tol)
+
+    model.backbone = plain_backbone
+    model.neck = plain_neck
+    config_text = plain_config_text(cfg.text, plain_backbone.orientation,
+                                    plain_backbone.fixparams)
+    meta = checkpoint.get('meta', {})
+    meta['config'] = config_text
+    state_dict = OrderedDict(
+        (k, v.cpu()) for k, v in model.state_dict().items())
+    torch.save({'meta': meta, 'state_dict': state_dict}, args.out_file)
+
+    out_config = args.out_config
+    if out_config is None:
+        out_config = osp.splitext(args.out_file)[0] + '.py'
+    with open(out_config, 'w') as f:
+        f.write(config_text)
+    print('saved {} and {}'.format(args.out_file, out_config))
+
+
+if __name__ == '__main__':
+    main()
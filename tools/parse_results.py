@@ -5,11 +5,10 @@ import os.path as osp
 import shutil
 import tempfile
 
-import mmcv
 from mmdet.apis import init_dist
 from mmdet.core import results2json, coco_eval, \
     HBBSeg2Comp4, OBBDet2Comp4, OBBDetComp4, \
-    HBBOBB2Comp4, HBBDet2Comp4
+    HBBOBB2Comp4, HBBDet2Comp4, merge_and_eval_task1, load_results
 
 import argparse
 
@@ -31,6 +30,20 @@ def parse_args():
     parser.add_argument('--config', default='configs/DOTA/faster_rcnn_r101_fpn_1x_dota2_v3_RoITrans_v5.py')
     parser.add_argument('--type', default=r'OBB',
                         help='parse type of detector')
+    parser.add_argument('--nms_type', default=r'py_cpu_nms_poly_fast',
+                        help='nms used when merging the obb results, '
+                             'py_cpu_nms_poly_grid is faster on large scenes')
+    parser.add_argument('--in_memory', action='store_true',
+                        help='merge (and evaluate) the OBB results in memory, '
+                             'only Task1_results_nms is written')
+    parser.add_argument('--annopath', default=None,
+                        help='labelTxt files of the original images to evaluate '
+                             'the --in_memory results, e.g. data/dota/val/labelTxt/{:s}.txt')
+    parser.add_argument('--imagesetfile', default=None,
+                        help='names of the original images to evaluate')
+    parser.add_argument('--result_file', default=None,
+                        help='output of tools/test.py, a .pkl file or a .npz result table, '
+                             'defaults to work_dirs/<config>/results.pkl (or results.npz)')
     args = parser.parse_args()
 
     return args
@@ -56,12 +69,12 @@ def OBB2HBB(srcpath, dstpath):
                         outline = outline + '\n'
                     f_out.write(outline)
 
-def parse_results(config_file, resultfile, dstpath, type):
+def parse_results(config_file, resultfile, dstpath, type, nms_type='py_cpu_nms_poly_fast'):
     cfg = Config.fromfile(config_file)
 
     data_test = cfg.data['test']
     dataset = get_dataset(data_test)
-    outputs = mmcv.load(resultfile)
+    outputs = load_results(resultfile)
     if type == 'OBB':
         #  dota1 has tested
         obb_results_dict = OBBDetComp4(dataset, outputs)
@@ -98,7 +111,7 @@ def parse_results(config_file, resultfile, dstpath, type):
             os.makedirs(os.path.join(dstpath, 'Task1_results_nms'))
 
         mergebypoly_multiprocess(os.path.join(dstpath, 'Task1_results'),
-                                 os.path.join(dstpath, 'Task1_results_nms'), nms_type=r'py_cpu_nms_poly_fast', o_thresh=current_thresh)
+                                 os.path.join(dstpath, 'Task1_results_nms'), nms_type=nms_type, o_thresh=current_thresh)
 
         OBB2HBB(os.path.join(dstpath, 'Task1_results_nms'),
                          os.path.join(dstpath, 'Transed_Task2_results_nms'))
@@ -119,12 +132,34 @@ def parse_results(config_file, resultfile, dstpath, type):
         mergebyrec(os.path.join(dstpath, 'Task2_results'),
             os.path.join(dstpath, 'Task2_results_nms'))
 
+def parse_results_in_memory(config_file, resultfile, dstpath, nms_type='py_cpu_nms_poly_fast',
+                            annopath=None, imagesetfile=None):
+    cfg = Config.fromfile(config_file)
+    dataset = get_dataset(cfg.data['test'])
+    outputs = load_results(resultfile)
+    merged, aps = merge_and_eval_task1(dataset, outputs, annopath, imagesetfile, nms_type=nms_type,
+                                       nms_thr=0.1, out_dir=os.path.join(dstpath, 'Task1_results_nms'))
+    if aps is not None:
+        for cls in aps:
+            print('{}: {:.4f}'.format(cls, aps[cls]))
+        print('map: {:.4f}'.format(sum(aps.values()) / len(aps)))
+    return merged, aps
+
 if __name__ == '__main__':
     args = parse_args()
     config_file = args.config
     config_name = os.path.splitext(os.path.basename(config_file))[0]
-    pkl_file = os.path.join('work_dirs', config_name, 'results.pkl')
+    pkl_file = args.result_file
+    if pkl_file is None:
+        pkl_file = os.path.join('work_dirs', config_name, 'results.pkl')
+        if not os.path.exists(pkl_file):
+            pkl_file = os.path.join('work_dirs', config_name, 'results.npz')
     output_path = os.path.join('work_dirs', config_name)
     type = args.type
-    parse_results(config_file, pkl_file, output_path, type)
+    if args.in_memory:
+        assert type == 'OBB', 'only the OBB results can be merged in memory'
+        parse_results_in_memory(config_file, pkl_file, output_path, args.nms_type,
+                                args.annopath, args.imagesetfile)
+    else:
+        parse_results(config_file, pkl_file, output_path, type, args.nms_type)
 
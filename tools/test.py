@@ -10,9 +10,11 @@ from mmcv.runner import load_checkpoint, get_dist_info
 from mmcv.parallel import MMDataParallel, MMDistributedDataParallel
 
 from mmdet.apis import init_dist
-from mmdet.core import results2json, coco_eval
+from mmdet.core import (results2json, coco_eval, dump_results, is_det_result,
+                        ResultTableWriter, ShardedResultTable)
 from mmdet.datasets import build_dataloader, get_dataset
 from mmdet.models import build_detector
+from mmdet.utils import StageProfiler
 import time
 
 def get_time_str():
@@ -32,44 +34,65 @@ def single_gpu_test(model, data_loader, show=False, log_dir=None):
     for i, data in enumerate(data_loader):
         with torch.no_grad():
             result = model(return_loss=False, rescale=not show, **data)
-        results.append(result)
+        # a batch of several images gives a list of per image results
+        batch_size = data['img'][0].data[0].size(0)
+        results.extend([result] if batch_size == 1 else result)
 
         if show:
             model.module.show_result(data, result, dataset.img_norm_cfg)
 
-        batch_size = data['img'][0].size(0)
         for _ in range(batch_size):
             prog_bar.update()
 
     return results
 
 
-def multi_gpu_test(model, data_loader, tmpdir=None):
+def multi_gpu_test(model, data_loader, tmpdir=None, stream=False):
+    """Test with a model on each rank.
+
+    With `stream`, each rank appends its results to a result table shard in
+    `tmpdir` as they come instead of holding them, and rank 0 gets the
+    shards as a `ShardedResultTable`. The shards are left in `tmpdir`,
+    which must be shared by the ranks and is removed by the caller.
+    """
     model.eval()
     results = []
     dataset = data_loader.dataset
     rank, world_size = get_dist_info()
+    if stream:
+        writer = ResultTableWriter(
+            osp.join(tmpdir, 'part_{}.npz'.format(rank)))
     if rank == 0:
         prog_bar = mmcv.ProgressBar(len(dataset))
     for i, data in enumerate(data_loader):
         with torch.no_grad():
             result = model(return_loss=False, rescale=True, **data)
-        results.append(result)
+        # a batch of several images gives a list of per image results
+        batch_size = data['img'][0].data[0].size(0)
+        batch_results = [result] if batch_size == 1 else result
+        if stream:
+            for result in batch_results:
+                writer.write(result)
+        else:
+            results.extend(batch_results)
 
         if rank == 0:
-            batch_size = data['img'][0].size(0)
             for _ in range(batch_size * world_size):
                 prog_bar.update()
 
     # collect results from all ranks
+    if stream:
+        writer.close()
+        return collect_result_shards(len(dataset), tmpdir)
     results = collect_results(results, len(dataset), tmpdir)
 
     return results
 
 
-def collect_results(result_part, size, tmpdir=None):
-    rank, world_size = get_dist_info()
-    # create a tmp dir if it is not specified
+def get_tmpdir(tmpdir=None):
+    """Directory shared by all the ranks, a new one created by rank 0 is
+    broadcast if `tmpdir` is not given."""
+    rank, _ = get_dist_info()
     if tmpdir is None:
         MAX_LEN = 512
         # 32 is whitespace
@@ -86,6 +109,27 @@ def collect_results(result_part, size, tmpdir=None):
         tmpdir = dir_tensor.cpu().numpy().tobytes().decode().rstrip()
     else:
         mmcv.mkdir_or_exist(tmpdir)
+    return tmpdir
+
+
+def collect_result_shards(size, tmpdir):
+    """Result table shards of all the ranks, read as one table by rank 0.
+
+    The images padded by the sampler are dropped, see `ShardedResultTable`.
+    """
+    rank, world_size = get_dist_info()
+    dist.barrier()
+    if rank != 0:
+        return None
+    return ShardedResultTable([
+        osp.join(tmpdir, 'part_{}.npz'.format(i)) for i in range(world_size)
+    ], size)
+
+
+def collect_results(result_part, size, tmpdir=None):
+    rank, world_size = get_dist_info()
+    # create a tmp dir if it is not specified
+    tmpdir = get_tmpdir(tmpdir)
     # dump the part result to the dir
     mmcv.dump(result_part, osp.join(tmpdir, 'part_{}.pkl'.format(rank)))
     dist.barrier()
@@ -113,16 +157,46 @@ def parse_args():
     parser = argparse.ArgumentParser(description='MMDet test detector')
     parser.add_argument('config', help='test config file path')
     parser.add_argument('checkpoint', help='checkpoint file')
-    parser.add_argument('--out', help='output result file')
+    parser.add_argument(
+        '--out',
+        help='output result file, a .pkl file or a .npz result table '
+        '(see mmdet.core.ResultTable)')
     parser.add_argument(
         '--eval',
         type=str,
         nargs='+',
         choices=['proposal', 'proposal_fast', 'bbox', 'segm', 'keypoints'],
         help='eval types')
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=1,
+        help='images per gpu in a test forward, the detector must support '
+        'batched testing (ReDet, RoITransformer, TwoStageDetectorRbbox)')
     parser.add_argument('--show', action='store_true', help='show results')
     parser.add_argument('--tmpdir', help='tmp dir for writing some results')
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='distributed test only: stream the detections of each rank to '
+        'a result table shard in the tmp dir instead of collecting all the '
+        'results on rank 0')
     parser.add_argument('--log_dir', help='log the inference speed')
+    parser.add_argument(
+        '--profile',
+        help='single gpu test only: json file of the per stage latency of '
+        'each test forward and of their percentiles (see '
+        'mmdet.utils.StageProfiler)')
+    parser.add_argument(
+        '--profile_warmup',
+        type=int,
+        default=5,
+        help='first test forwards left out of the profile percentiles')
+    parser.add_argument(
+        '--profile_sync',
+        action='store_true',
+        help='synchronize the device at each profiled stage, the wall times '
+        'then include the kernels of the stage')
     parser.add_argument(
         '--launcher',
         choices=['none', 'pytorch', 'slurm', 'mpi'],
@@ -136,8 +210,9 @@ def parse_args():
 def main():
     args = parse_args()
 
-    if args.out is not None and not args.out.endswith(('.pkl', '.pickle')):
-        raise ValueError('The output file must be a pkl file.')
+    if args.out is not None and not args.out.endswith(
+            ('.pkl', '.pickle', '.npz')):
+        raise ValueError('The output file must be a pkl or npz file.')
 
     cfg = mmcv.Config.fromfile(args.config)
     # set cudnn_benchmark
@@ -153,12 +228,16 @@ def main():
         distributed = True
         init_dist(args.launcher, **cfg.dist_params)
 
+    assert not (args.show and args.batch_size > 1), \
+        'results can only be shown with --batch-size 1'
+    assert not (args.profile and distributed), \
+        'the stages can only be profiled in a single gpu test'
+
     # build the dataloader
-    # TODO: support multiple images per gpu (only minor changes are needed)
     dataset = get_dataset(cfg.data.test)
     data_loader = build_dataloader(
         dataset,
-        imgs_per_gpu=1,
+        imgs_per_gpu=args.batch_size,
         workers_per_gpu=cfg.data.workers_per_gpu,
         dist=distributed,
         shuffle=False)
@@ -174,16 +253,32 @@ def main():
         model.CLASSES = dataset.CLASSES
 
     if not distributed:
+        if args.profile:
+            profiler = StageProfiler(model, synchronize=args.profile_sync)
+            profiler.attach()
         model = MMDataParallel(model, device_ids=[0])
         outputs = single_gpu_test(model, data_loader, args.show, args.log_dir)
+        if args.profile:
+            profiler.detach()
+            print('\n' + profiler.report(args.profile_warmup))
+            print('writing the profile to {}'.format(args.profile))
+            profiler.dump(args.profile, args.profile_warmup)
     else:
         model = MMDistributedDataParallel(model.cuda())
-        outputs = multi_gpu_test(model, data_loader, args.tmpdir)
+        if args.stream:
+            shard_dir = get_tmpdir(args.tmpdir)
+            outputs = multi_gpu_test(
+                model, data_loader, shard_dir, stream=True)
+        else:
+            outputs = multi_gpu_test(model, data_loader, args.tmpdir)
 
     rank, _ = get_dist_info()
     if args.out and rank == 0:
         print('\nwriting results to {}'.format(args.out))
-        mmcv.dump(outputs, args.out)
+        if args.out.endswith('.npz'):
+            assert is_det_result(outputs[0]), \
+                'only detection results can be written to a result table'
+        dump_results(outputs, args.out)
         eval_types = args.eval
         if eval_types:
             print('Starting evaluate {}'.format(' and '.join(eval_types)))
@@ -202,6 +297,9 @@ def main():
                         result_file = args.out + '.{}.json'.format(name)
                         results2json(dataset, outputs_, result_file)
                         coco_eval(result_file, eval_types, dataset.coco)
+    if isinstance(outputs, ShardedResultTable):
+        del outputs
+        shutil.rmtree(shard_dir)
 
 
 if __name__ == '__main__':
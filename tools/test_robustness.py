@@ -16,8 +16,9 @@ from robustness_eval import get_results
 
 from mmdet import datasets
 from mmdet.apis import init_dist, set_random_seed
-from mmdet.core import (eval_map, fast_eval_recall, results2json,
-                        wrap_fp16_model)
+from mmdet.core import (ResultTableWriter, ShardedResultTable, dump_results,
+                        eval_map, fast_eval_recall, load_results,
+                        results2json, wrap_fp16_model)
 from mmdet.datasets import build_dataloader, build_dataset
 from mmdet.models import build_detector
 
@@ -77,7 +78,7 @@ def voc_eval_with_return(result_file,
                          iou_thr=0.5,
                          print_summary=True,
                          only_ap=True):
-    det_results = mmcv.load(result_file)
+    det_results = load_results(result_file)
     gt_bboxes = []
     gt_labels = []
     gt_ignore = []
@@ -127,43 +128,64 @@ def single_gpu_test(model, data_loader, show=False):
     for i, data in enumerate(data_loader):
         with torch.no_grad():
             result = model(return_loss=False, rescale=not show, **data)
-        results.append(result)
+        # a batch of several images gives a list of per image results
+        batch_size = data['img'][0].data[0].size(0)
+        results.extend([result] if batch_size == 1 else result)
 
         if show:
             model.module.show_result(data, result, dataset.img_norm_cfg)
 
-        batch_size = data['img'][0].size(0)
         for _ in range(batch_size):
             prog_bar.update()
     return results
 
 
-def multi_gpu_test(model, data_loader, tmpdir=None):
+def multi_gpu_test(model, data_loader, tmpdir=None, stream=False):
+    """Test with a model on each rank.
+
+    With `stream`, each rank appends its results to a result table shard in
+    `tmpdir` as they come instead of holding them, and rank 0 gets the
+    shards as a `ShardedResultTable`. The shards are left in `tmpdir`,
+    which must be shared by the ranks and is removed by the caller.
+    """
     model.eval()
     results = []
     dataset = data_loader.dataset
     rank, world_size = get_dist_info()
+    if stream:
+        writer = ResultTableWriter(
+            osp.join(tmpdir, 'part_{}.npz'.format(rank)))
     if rank == 0:
         prog_bar = mmcv.ProgressBar(len(dataset))
     for i, data in enumerate(data_loader):
         with torch.no_grad():
             result = model(return_loss=False, rescale=True, **data)
-        results.append(result)
+        # a batch of several images gives a list of per image results
+        batch_size = data['img'][0].data[0].size(0)
+        batch_results = [result] if batch_size == 1 else result
+        if stream:
+            for result in batch_results:
+                writer.write(result)
+        else:
+            results.extend(batch_results)
 
         if rank == 0:
-            batch_size = data['img'][0].size(0)
             for _ in range(batch_size * world_size):
                 prog_bar.update()
 
     # collect results from all ranks
+    if stream:
+        writer.close()
+        return collect_result_shards(len(dataset), tmpdir)
     results = collect_results(results, len(dataset), tmpdir)
 
     return results
 
 
-def collect_results(result_part, size, tmpdir=None):
-    rank, world_size = get_dist_info()
-    # create a tmp dir if it is not specified
+def get_tmpdir(tmpdir=None):
+    """Directory shared by all the ranks, a new one created by rank 0 is
+    broadcast if `tmpdir` is not given."""
+    rank, _ = get_dist_info()
     if tmpdir is None:
         MAX_LEN = 512
         # 32 is whitespace
@@ -180,6 +202,27 @@ def collect_results(result_part, size, tmpdir=None):
         tmpdir = dir_tensor.cpu().numpy().tobytes().decode().rstrip()
     else:
         mmcv.mkdir_or_exist(tmpdir)
+    return tmpdir
+
+
+def collect_result_shards(size, tmpdir):
+    """Result table shards of all the ranks, read as one table by rank 0.
+
+    The images padded by the sampler are dropped, see `ShardedResultTable`.
+    """
+    rank, world_size = get_dist_info()
+    dist.barrier()
+    if rank != 0:
+        return None
+    return ShardedResultTable([
+        osp.join(tmpdir, 'part_{}.npz'.format(i)) for i in range(world_size)
+    ], size)
+
+
+def collect_results(result_part, size, tmpdir=None):
+    rank, world_size = get_dist_info()
+    # create a tmp dir if it is not specified
+    tmpdir = get_tmpdir(tmpdir)
     # dump the part result to the dir
     mmcv.dump(result_part, osp.join(tmpdir, 'part_{}.pkl'.format(rank)))
     dist.barrier()
@@ -246,8 +289,20 @@ def parse_args():
         help='Print summaries for every corruption and severity')
     parser.add_argument(
         '--workers', type=int, default=32, help='workers per gpu')
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=1,
+        help='images per gpu in a test forward, the detector must support '
+        'batched testing (ReDet, RoITransformer, TwoStageDetectorRbbox)')
     parser.add_argument('--show', action='store_true', help='show results')
     parser.add_argument('--tmpdir', help='tmp dir for writing some results')
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='distributed test only: stream the detections of each rank to '
+        'a result table shard in the tmp dir instead of collecting all the '
+        'results on rank 0')
     parser.add_argument('--seed', type=int, default=None, help='random seed')
     parser.add_argument(
         '--launcher',
@@ -281,8 +336,12 @@ def main():
         ('Please specify at least one operation (save or show the results) '
          'with the argument "--out" or "--show"')
 
-    if args.out is not None and not args.out.endswith(('.pkl', '.pickle')):
-        raise ValueError('The output file must be a pkl file.')
+    if args.out is not None and not args.out.endswith(
+            ('.pkl', '.pickle', '.npz')):
+        raise ValueError('The output file must be a pkl or npz file.')
+
+    assert not (args.show and args.batch_size > 1), \
+        'results can only be shown with --batch-size 1'
 
     cfg = mmcv.Config.fromfile(args.config)
     # set cudnn_benchmark
@@ -363,12 +422,10 @@ def main():
                                                        corruption_severity))
 
             # build the dataloader
-            # TODO: support multiple images per gpu
-            #       (only minor changes are needed)
             dataset = build_dataset(cfg.data.test)
             data_loader = build_dataloader(
                 dataset,
-                imgs_per_gpu=1,
+                imgs_per_gpu=args.batch_size,
                 workers_per_gpu=args.workers,
                 dist=distributed,
                 shuffle=False)
@@ -393,14 +450,28 @@ def main():
                 outputs = single_gpu_test(model, data_loader, args.show)
             else:
                 model = MMDistributedDataParallel(model.cuda())
-                outputs = multi_gpu_test(model, data_loader, args.tmpdir)
+                if args.stream:
+                    # one shard dir per corruption and severity, rank 0
+                    # removes it while the other ranks may already be
+                    # writing the shards of the next one
+                    shard_dir = args.tmpdir
+                    if shard_dir is not None:
+                        shard_dir = osp.join(
+                            shard_dir, '{}_{}'.format(corruption,
+                                                      corruption_severity))
+                    shard_dir = get_tmpdir(shard_dir)
+                    outputs = multi_gpu_test(
+                        model, data_loader, shard_dir, stream=True)
+                else:
+                    outputs = multi_gpu_test(model, data_loader, args.tmpdir)
 
             rank, _ = get_dist_info()
             if args.out and rank == 0:
+                # the aggregated results are pickled for a .npz output too
                 eval_results_filename = (
                     osp.splitext(args.out)[0] + '_results' +
-                    osp.splitext(args.out)[1])
-                mmcv.dump(outputs, args.out)
+                    osp.splitext(args.out)[1].replace('.npz', '.pkl'))
+                dump_results(outputs, args.out)
                 eval_types = args.eval
                 if cfg.dataset_type == 'VOCDataset':
                     if eval_types:
@@ -443,6 +514,10 @@ def main():
                         print('\nNo task was selected for evaluation;'
                               '\nUse --eval to select a task')
 
+            if isinstance(outputs, ShardedResultTable):
+                del outputs
+                shutil.rmtree(shard_dir)
+
             # save results after each evaluation
             mmcv.dump(aggregated_results, eval_results_filename)
 